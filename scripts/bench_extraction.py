@@ -0,0 +1,361 @@
+# bench_extraction.py
+# -*- coding: utf-8 -*-
+"""
+Extraction benchmark
+
+PyMuPDF 로 합성 PDF 를 만들어 추출 단계별 성능을 잰다.
+
+  python scripts/bench_extraction.py --out bench.json
+  python scripts/bench_extraction.py --out new.json --compare bench.json
+  python scripts/bench_extraction.py --scenario figure_heavy --repeat 3
+
+합성 PDF 는 페이지 수, 텍스트 밀도, '그림 x-y'/'표 x-y' 캡션 수, 벡터 path 수,
+TOC 깊이를 시나리오마다 다르게 만든다. 각 시나리오는 별도 프로세스에서 실행되어
+peak RSS 가 시나리오끼리 섞이지 않는다.
+
+측정 항목:
+ - _extract_text_blocks        pages/sec
+ - _get_diagram_rects          pages/sec
+ - _union_diagram_for_caption  calls/sec
+ - extract_one_chapter (전체)  pages/sec, figures/sec, 출력 바이트, peak RSS,
+                               캡션이 없어 get_drawings() 를 건너뛴 페이지 수
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scripts.extract_chapter as extract_chapter
+
+
+# ---------------------------------------------------------
+# 시나리오
+# ---------------------------------------------------------
+# density: 페이지당 본문 줄 수 배율 (1.0 ≈ 40줄)
+# captions: 페이지당 캡션 수, paths: 그림 하나당 벡터 path 수
+# caption_pages: 캡션이 있는 페이지 비율
+# decor: 페이지마다 그리는 장식용 작은 path 수 (밑줄, 박스 테두리 등)
+# rasters: 그림 중 벡터 도식 대신 삽입 JPEG(사진)인 비율 (사진 몇 장이 여러 페이지에 반복됨)
+SCENARIOS = {
+    "small":        {"pages": 20,  "density": 1.0, "captions": 1, "paths": 20,  "caption_pages": 0.5, "toc_depth": 1},
+    "dense_text":   {"pages": 100, "density": 2.0, "captions": 0, "paths": 0,   "caption_pages": 0.0, "toc_depth": 2},
+    "prose_mostly": {"pages": 100, "density": 1.0, "captions": 1, "paths": 30,  "caption_pages": 0.1, "toc_depth": 2},
+    "decor_heavy":  {"pages": 100, "density": 1.0, "captions": 1, "paths": 30,  "caption_pages": 0.1, "toc_depth": 2,
+                     "decor": 300},
+    "figure_heavy": {"pages": 60,  "density": 0.5, "captions": 3, "paths": 80,  "caption_pages": 1.0, "toc_depth": 2},
+    "deep_toc":     {"pages": 120, "density": 1.0, "captions": 1, "paths": 20,  "caption_pages": 0.3, "toc_depth": 4},
+    "photo_heavy":  {"pages": 60,  "density": 0.5, "captions": 2, "paths": 0,   "caption_pages": 1.0, "toc_depth": 2,
+                     "rasters": 1.0},
+}
+
+PAGE_W, PAGE_H = 595, 842
+KOREAN_FONT = "korea"  # PyMuPDF 내장 CJK 폰트
+
+_WORDS = ("스택", "큐", "자료구조", "알고리즘", "포인터", "배열", "연결 리스트", "노드",
+          "tree", "graph", "hash", "pointer", "정렬", "탐색", "함수", "변수")
+
+
+def make_synthetic_pdf(path, pages=50, density=1.0, captions=1, paths=20,
+                       caption_pages=0.5, toc_depth=2, decor=0, rasters=0.0, seed=0):
+    """
+    합성 PDF 를 path 에 저장하고 {"pages", "captions", "toc_items"} 통계를 반환.
+    """
+    rng = random.Random(seed)
+    photos = _make_photos(rng) if rasters else []
+    doc = fitz.open()
+    n_captions = 0
+    chapter_no = 1
+    fig_no = 0
+
+    for p in range(pages):
+        page = doc.new_page(width=PAGE_W, height=PAGE_H)
+
+        # 머리말/쪽 번호
+        page.insert_text((50, 30), f"{chapter_no}장 합성 교재", fontname=KOREAN_FONT, fontsize=8)
+        page.insert_text((PAGE_W / 2, PAGE_H - 20), str(p + 1), fontsize=8)
+
+        figs = captions if rng.random() < caption_pages else 0
+        fig_height = 180
+        body_bottom = PAGE_H - 50 - figs * (fig_height + 30)
+
+        # 본문
+        y = 60
+        n_lines = int(40 * density)
+        line_h = max((body_bottom - 60) / max(n_lines, 1), 6)
+        for _ in range(n_lines):
+            if y > body_bottom:
+                break
+            line = " ".join(rng.choice(_WORDS) for _ in range(10))
+            page.insert_text((50, y), line, fontname=KOREAN_FONT, fontsize=min(9, line_h * 0.8))
+            y += line_h
+
+        # 장식용 path (각각 별도 path 로 그려 get_drawings 결과가 커지게)
+        for _ in range(decor):
+            x0 = rng.uniform(50, PAGE_W - 100)
+            y0 = rng.uniform(60, body_bottom)
+            page.draw_line(fitz.Point(x0, y0), fitz.Point(x0 + rng.uniform(10, 80), y0), width=0.3)
+
+        # 그림/표 + 캡션
+        y = body_bottom + 10
+        for _ in range(figs):
+            top = y
+            if rng.random() < rasters:
+                # 같은 사진 스트림은 PyMuPDF 가 하나의 xref 로 공유한다
+                page.insert_image(fitz.Rect(80, top, 380, top + fig_height), stream=rng.choice(photos))
+            else:
+                shape = page.new_shape()
+                for _ in range(paths):
+                    x0 = rng.uniform(60, 400)
+                    y0 = rng.uniform(top, top + fig_height - 60)
+                    w = rng.uniform(10, 150)
+                    h = rng.uniform(10, 60)
+                    shape.draw_rect(fitz.Rect(x0, y0, x0 + w, y0 + h))
+                shape.finish(color=(0, 0, 0), width=0.5)
+                shape.commit()
+
+            fig_no += 1
+            label = "그림" if fig_no % 3 else "표"
+            page.insert_text(
+                (80, top + fig_height + 12),
+                f"{label} {chapter_no}-{fig_no} 합성 도식 설명",
+                fontname=KOREAN_FONT, fontsize=9,
+            )
+            n_captions += 1
+            y = top + fig_height + 30
+
+        if (p + 1) % 20 == 0:
+            chapter_no += 1
+            fig_no = 0
+
+    # 중첩 TOC: 20페이지마다 장, 그 안에서 깊이마다 절을 반씩 나눔
+    toc = []
+
+    def add_level(level, start, end, prefix):
+        toc.append([level, f"{prefix} 합성 항목", start + 1])
+        if level >= toc_depth or end - start < 2:
+            return
+        mid = (start + end) // 2
+        add_level(level + 1, start, mid, f"{prefix}.1")
+        add_level(level + 1, mid + 1, end, f"{prefix}.2")
+
+    for i, s in enumerate(range(0, pages, 20), start=1):
+        add_level(1, s, min(s + 19, pages - 1), str(i))
+
+    doc.set_toc(toc)
+    doc.save(path)
+    doc.close()
+    return {"pages": pages, "captions": n_captions, "toc_items": len(toc)}
+
+
+def _make_photos(rng, n=4, size=(900, 540)):
+    """사진 대용 JPEG 바이트 n 장 (그라데이션 + 노이즈)"""
+    from PIL import Image, ImageDraw, ImageFilter
+    import io
+
+    photos = []
+    for _ in range(n):
+        im = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(im)
+        for _ in range(60):
+            x, y = rng.randrange(size[0]), rng.randrange(size[1])
+            r = rng.randrange(10, 120)
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+        im = im.filter(ImageFilter.GaussianBlur(3))
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=85)
+        photos.append(buf.getvalue())
+    return photos
+
+
+# ---------------------------------------------------------
+# 측정
+# ---------------------------------------------------------
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 는 bytes, Linux 는 KB
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def _dir_bytes(root):
+    total = 0
+    for dirpath, _, files in os.walk(root):
+        for f in files:
+            total += os.path.getsize(os.path.join(dirpath, f))
+    return total
+
+
+def _rate(n, sec):
+    return round(n / sec, 2) if sec > 0 else None
+
+
+def run_scenario(name, params, repeat=1, seed=0):
+    """한 시나리오를 측정해서 dict 로 반환 (별도 프로세스에서 호출됨)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, f"{name}.pdf")
+        info = make_synthetic_pdf(pdf_path, seed=seed, **params)
+        doc = fitz.open(pdf_path)
+        pages = doc.page_count
+
+        best = {}
+
+        def keep_best(key, sec):
+            best[key] = min(best.get(key, sec), sec)
+
+        union_calls = 0
+        for run in range(repeat):
+            # 1) 텍스트 블록
+            t0 = time.perf_counter()
+            blocks_per_page = [extract_chapter._extract_text_blocks(doc.load_page(p))[0] for p in range(pages)]
+            keep_best("text_blocks", time.perf_counter() - t0)
+
+            # 2) 벡터 rect
+            t0 = time.perf_counter()
+            rects_per_page = [extract_chapter._get_diagram_rects(doc.load_page(p)) for p in range(pages)]
+            keep_best("diagram_rects", time.perf_counter() - t0)
+
+            # 3) 캡션별 union
+            union_calls = 0
+            t0 = time.perf_counter()
+            for blocks, rects in zip(blocks_per_page, rects_per_page):
+                for tb in blocks:
+                    if extract_chapter._is_caption_text(tb["text"]):
+                        extract_chapter._union_diagram_for_caption(tb["bbox"], rects)
+                        union_calls += 1
+            keep_best("union", time.perf_counter() - t0)
+
+            # 4) 전체 챕터 경로 (GUI 와 같이 TOC 항목 하나 = 챕터)
+            out_root = os.path.join(tmp, f"out{run}")
+            chapters = extract_chapter.get_toc_items(doc)
+            figures = 0
+            drawings_skipped = 0
+            t0 = time.perf_counter()
+            for ch in chapters:
+                out_path = extract_chapter.extract_one_chapter(doc, ch, out_root)
+                with open(out_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                figures += len(data["images"])
+                drawings_skipped += data["meta"]["drawing_analysis"]["skipped"]
+            keep_best("chapter", time.perf_counter() - t0)
+            out_bytes = _dir_bytes(out_root)
+            chapter_pages = sum(c["end"] - c["start"] + 1 for c in chapters)
+
+        doc.close()
+
+    return {
+        "params": params,
+        "pdf": info,
+        "text_blocks": {"sec": round(best["text_blocks"], 4), "pages_per_sec": _rate(pages, best["text_blocks"])},
+        "diagram_rects": {"sec": round(best["diagram_rects"], 4), "pages_per_sec": _rate(pages, best["diagram_rects"])},
+        "union_diagram": {"calls": union_calls, "sec": round(best["union"], 4), "calls_per_sec": _rate(union_calls, best["union"])},
+        "chapter": {
+            "sec": round(best["chapter"], 4),
+            "pages_per_sec": _rate(chapter_pages, best["chapter"]),
+            "figures": figures,
+            "figures_per_sec": _rate(figures, best["chapter"]),
+            "drawings_skipped_pages": drawings_skipped,
+            "output_bytes": out_bytes,
+        },
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(names, repeat=1, seed=0):
+    results = {}
+    for name in names:
+        # 시나리오마다 새 프로세스 → peak RSS 분리
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results[name] = pool.submit(run_scenario, name, SCENARIOS[name], repeat, seed).result()
+        print(f"[bench] {name}: {results[name]['chapter']['pages_per_sec']} pages/s, "
+              f"{results[name]['chapter']['figures_per_sec']} figures/s, "
+              f"peak RSS {results[name]['peak_rss_kb']} KB")
+
+    return {
+        "commit": _git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+# ---------------------------------------------------------
+# 커밋 간 비교
+# ---------------------------------------------------------
+COMPARE_METRICS = [
+    ("text_blocks", "pages_per_sec"),
+    ("diagram_rects", "pages_per_sec"),
+    ("union_diagram", "calls_per_sec"),
+    ("chapter", "pages_per_sec"),
+    ("chapter", "figures_per_sec"),
+    ("chapter", "output_bytes"),
+    ("peak_rss_kb", None),
+]
+
+
+def compare(old, new):
+    lines = [f"base {old.get('commit')} → new {new.get('commit')}"]
+    for name, res in new["results"].items():
+        base = old.get("results", {}).get(name)
+        if not base:
+            continue
+        lines.append(f"[{name}]")
+        for section, key in COMPARE_METRICS:
+            a = base.get(section) if key is None else base.get(section, {}).get(key)
+            b = res.get(section) if key is None else res.get(section, {}).get(key)
+            label = section if key is None else f"{section}.{key}"
+            if not a or b is None:
+                lines.append(f"  {label:32s} {a} → {b}")
+                continue
+            lines.append(f"  {label:32s} {a} → {b} ({(b - a) / a * 100:+.1f}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="extract_chapter 성능 벤치마크")
+    ap.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="실행할 시나리오 (기본: 전체)")
+    ap.add_argument("--repeat", type=int, default=1, help="반복 횟수 (가장 빠른 값 사용)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="결과 JSON 저장 경로")
+    ap.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = ap.parse_args(argv)
+
+    report = run_suite(args.scenario or list(SCENARIOS), repeat=args.repeat, seed=args.seed)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[bench] 저장됨: {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print(compare(json.load(f), report))
+
+
+if __name__ == "__main__":
+    main()
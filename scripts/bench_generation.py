@@ -0,0 +1,281 @@
+# bench_generation.py
+# -*- coding: utf-8 -*-
+"""
+Generation benchmark (fake LLM)
+
+쉬운 해설서/퀴즈 파이프라인을 실제 API 대신 지연 시간과 응답 크기를
+설정할 수 있는 가짜 completion backend 로 돌려서, 프롬프트 구성·응답 파싱·
+HTML 렌더링이 챕터 수와 동시성에 따라 어떻게 동작하는지 잰다.
+
+  python scripts/bench_generation.py --chapters 120 --latency lognormal:0.7,0.4 --concurrency 1,4,8
+  python scripts/bench_generation.py --chapters 50 --latency fixed:2 --time-scale 0.01 --quiz --out gen.json
+  python scripts/bench_generation.py --chapters 50 --structured --invalid-rate 0.1 --time-scale 0.01
+
+지연 프로필:
+  fixed:S              항상 S 초
+  uniform:A,B          A~B 초 균등분포
+  lognormal:MU,SIGMA   exp(N(MU, SIGMA)) 초 (중앙값 e^MU)
+--time-scale 로 모든 지연을 줄여 빠르게 돌릴 수 있다 (보고되는 지연도 축소된 값).
+
+보고 항목: chapters/min, 챕터당 지연 p50/p95, 네트워크 대기 밖에서 쓴 CPU 시간,
+동시성 설정별 비교.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scripts.easy_explanation_pipeline as explanation_pipeline
+import scripts.llm_client as llm_client
+import scripts.quiz_pipeline as quiz_pipeline
+
+
+# ---------------------------------------------------------
+# 가짜 completion backend
+# ---------------------------------------------------------
+def parse_latency(spec: str):
+    """'fixed:1', 'uniform:0.5,2', 'lognormal:0.7,0.4' → rng 를 받아 초를 돌려주는 함수"""
+    kind, _, args = spec.partition(":")
+    vals = [float(x) for x in args.split(",") if x]
+    if kind == "fixed" and len(vals) == 1:
+        return lambda rng: vals[0]
+    if kind == "uniform" and len(vals) == 2:
+        return lambda rng: rng.uniform(vals[0], vals[1])
+    if kind == "lognormal" and len(vals) == 2:
+        return lambda rng: rng.lognormvariate(vals[0], vals[1])
+    raise ValueError(f"알 수 없는 지연 프로필: {spec}")
+
+
+_SECTION_TITLES = [
+    "1. 핵심 개념 쉽게 설명하기",
+    "2. 중요한 도식·표 해설",
+    "3. 기초 지식 보충",
+    "4. 예시·비유로 다시 설명",
+    "5. 반드시 기억해야 하는 포인트",
+]
+
+
+def _fake_response(chars: int) -> str:
+    """파이프라인 파서가 섹션을 찾을 수 있는 형태의 응답"""
+    per = max(chars // len(_SECTION_TITLES), 20)
+    parts = []
+    for title in _SECTION_TITLES:
+        body = ("스택은 LIFO 구조이다. " * (per // 14 + 1))[:per]
+        parts.append(f"{title}\n{body}\n")
+    parts.append("부록\n")
+    return "\n".join(parts)
+
+
+def _fake_json_response(chars: int, invalid: bool = False) -> str:
+    """explanation_schema.EasyExplanation 형태의 JSON 응답 (invalid 이면 takeaways 누락)"""
+    per = max(chars // len(_SECTION_TITLES), 20)
+    body = ("스택은 LIFO 구조이다. " * (per // 14 + 1))[:per]
+    data = {
+        "core_concepts": body,
+        "figure_explanations": [{"figure": i, "explanation": body[: per // 4]} for i in range(1, 5)],
+        "background": body,
+        "examples": body,
+        "takeaways": [body[:40]] * 5,
+    }
+    if invalid:
+        del data["takeaways"]
+    return json.dumps(data, ensure_ascii=False)
+
+
+class FakeCompletions:
+    """
+    response_format(json_schema) 이 있으면 JSON 을 돌려준다. invalid_rate 비율만큼은
+    스키마에 맞지 않는 JSON 을 돌려주고, 수리 요청(REPAIR_SYSTEM_MESSAGE)에는 항상 올바른 JSON 을 준다.
+    """
+
+    def __init__(self, latency, response_chars, time_scale=1.0, seed=0, invalid_rate=0.0):
+        self.latency = latency
+        self.response_chars = response_chars
+        self.time_scale = time_scale
+        self.invalid_rate = invalid_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.repairs = 0
+
+    def create(self, model=None, messages=None, response_format=None, **kwargs):
+        repair = bool(messages) and messages[0].get("content") == explanation_pipeline.REPAIR_SYSTEM_MESSAGE
+        with self._lock:
+            delay = self.latency(self._rng) * self.time_scale
+            chars = max(int(self._rng.gauss(self.response_chars, self.response_chars * 0.2)), 100)
+            invalid = not repair and self._rng.random() < self.invalid_rate
+            self.calls += 1
+            self.repairs += repair
+
+        if repair:
+            delay *= 0.3  # 수리 요청은 본문 없이 짧다
+        time.sleep(delay)
+        prompt_chars = sum(len(m.get("content") or "") for m in messages or [])
+        if response_format is not None:
+            content = _fake_json_response(chars, invalid)
+        else:
+            content = _fake_response(chars)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_chars // 2,
+                completion_tokens=len(content) // 2,
+                total_tokens=(prompt_chars + len(content)) // 2,
+            ),
+        )
+
+
+class FakeClient:
+    def __init__(self, completions):
+        self.chat = SimpleNamespace(completions=completions)
+
+
+# ---------------------------------------------------------
+# 합성 챕터
+# ---------------------------------------------------------
+def make_chapters(root, n, pages=12, blocks_per_page=12, block_chars=180, images=4, seed=0):
+    rng = random.Random(seed)
+    words = ("스택", "큐", "자료구조", "알고리즘", "포인터", "배열", "노드", "tree", "hash", "정렬")
+    dirs = []
+    for i in range(1, n + 1):
+        d = os.path.join(root, f"chapter_{i:02d}")
+        os.makedirs(d, exist_ok=True)
+        data = {
+            "chapter_index": i,
+            "title": f"{i}장 합성 챕터",
+            "start_page": 1,
+            "end_page": pages,
+            "domain": "default",
+            "pages": [
+                {
+                    "page_number": p + 1,
+                    "text_blocks": [
+                        " ".join(rng.choice(words) for _ in range(block_chars // 4))[:block_chars]
+                        for _ in range(blocks_per_page)
+                    ],
+                }
+                for p in range(pages)
+            ],
+            "images": [
+                {
+                    "file": f"chapter{i:02d}_p{k + 1:04d}_diagram01.png",
+                    "page_number": k + 1,
+                    "caption": f"그림 {i}-{k + 1} 합성 도식",
+                    "local_text": ["도식 주변 설명"],
+                    "kind": "figure",
+                }
+                for k in range(images)
+            ],
+            "meta": {},
+        }
+        with open(os.path.join(d, "chapter.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        dirs.append(d)
+    return dirs
+
+
+# ---------------------------------------------------------
+# 실행
+# ---------------------------------------------------------
+def _percentile(values, q):
+    if not values:
+        return None
+    s = sorted(values)
+    k = max(math.ceil(q / 100 * len(s)) - 1, 0)
+    return s[k]
+
+
+def _run_chapter(chap_dir, quiz, structured=False):
+    t0 = time.perf_counter()
+    c0 = time.thread_time()
+    html = explanation_pipeline.easy_explain_chapter(chap_dir, structured=structured)
+    explanation_pipeline.save_explanation(chap_dir, html)
+    if quiz:
+        data = explanation_pipeline.load_chapter(chap_dir)
+        text = "\n".join(t for p in data["pages"] for t in p["text_blocks"])
+        captions = [img["caption"] for img in data["images"]]
+        quiz_html = quiz_pipeline.generate_quiz(chap_dir, chapter_text=text, images=captions)
+        quiz_pipeline.save_quiz(chap_dir, quiz_html)
+    return time.perf_counter() - t0, time.thread_time() - c0
+
+
+def run_once(chapter_dirs, concurrency, quiz=False, structured=False):
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda d: _run_chapter(d, quiz, structured), chapter_dirs))
+    wall = time.perf_counter() - t0
+
+    latencies = [r[0] for r in results]
+    cpu = [r[1] for r in results]
+    return {
+        "concurrency": concurrency,
+        "chapters": len(chapter_dirs),
+        "wall_sec": round(wall, 3),
+        "chapters_per_min": round(len(chapter_dirs) / wall * 60, 2) if wall else None,
+        "latency_p50_sec": round(_percentile(latencies, 50), 4),
+        "latency_p95_sec": round(_percentile(latencies, 95), 4),
+        "cpu_total_sec": round(sum(cpu), 4),
+        "cpu_per_chapter_ms": round(sum(cpu) / len(cpu) * 1000, 3),
+        "cpu_share": round(sum(cpu) / sum(latencies), 4) if sum(latencies) else None,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="쉬운 해설서/퀴즈 생성 벤치마크 (가짜 LLM)")
+    ap.add_argument("--chapters", type=int, default=100)
+    ap.add_argument("--latency", default="lognormal:0.7,0.4", help="지연 프로필 (fixed/uniform/lognormal)")
+    ap.add_argument("--time-scale", type=float, default=1.0, help="지연 배율 (예: 0.01)")
+    ap.add_argument("--response-chars", type=int, default=6000, help="평균 응답 길이(문자)")
+    ap.add_argument("--concurrency", default="1,4,8", help="쉼표로 구분한 동시 실행 수 목록")
+    ap.add_argument("--quiz", action="store_true", help="퀴즈 생성도 포함")
+    ap.add_argument("--structured", action="store_true", help="구조화 출력(JSON schema) 모드")
+    ap.add_argument("--invalid-rate", type=float, default=0.0,
+                    help="구조화 출력에서 스키마에 맞지 않는 응답 비율 (수리 요청 발생)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    completions = FakeCompletions(parse_latency(args.latency), args.response_chars, args.time_scale, args.seed,
+                                  invalid_rate=args.invalid_rate)
+    fake = FakeClient(completions)
+    llm_client.client = fake
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        dirs = make_chapters(tmp, args.chapters, seed=args.seed)
+        for c in [int(x) for x in args.concurrency.split(",") if x]:
+            r = run_once(dirs, c, quiz=args.quiz, structured=args.structured)
+            runs.append(r)
+            print(f"[bench] concurrency={c}: {r['chapters_per_min']} chapters/min, "
+                  f"p50 {r['latency_p50_sec']}s, p95 {r['latency_p95_sec']}s, "
+                  f"CPU {r['cpu_per_chapter_ms']} ms/chapter")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "latency": args.latency,
+        "time_scale": args.time_scale,
+        "response_chars": args.response_chars,
+        "quiz": args.quiz,
+        "structured": args.structured,
+        "llm_calls": completions.calls,
+        "repair_calls": completions.repairs,
+        "runs": runs,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[bench] 저장됨: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
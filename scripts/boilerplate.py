@@ -0,0 +1,145 @@
+# boilerplate.py
+# -*- coding: utf-8 -*-
+"""
+Running header/footer 제거
+
+챕터 안의 여러 페이지에서 같은 위치(위/아래 여백)에 반복되는 블록
+— 머리말, 꼬리말, 쪽 번호, 반복되는 장 제목 — 을 찾아 프롬프트에서 뺀다.
+
+블록은 (위치 band, 정규화된 텍스트) 를 key 로 묶는다. 숫자는 '#' 으로
+정규화하므로 "12 | 3장 자료구조" 와 "13 | 3장 자료구조" 는 같은 key 가 된다.
+"""
+import re
+
+_DIGITS = re.compile(r"\d+")
+_SPACE = re.compile(r"\s+")
+
+# 여백에 단독으로 있는 쪽 번호: "12", "- 12 -", "12 / 300", "p. 12"
+PAGE_NUMBER_PATTERN = re.compile(r'^(p\.?\s*)?[-–—\s]*#[-–—\s]*(/\s*#)?[-–—\s]*$')
+
+
+def normalize(text: str) -> str:
+    t = _DIGITS.sub("#", text.lower())
+    return _SPACE.sub(" ", t).strip()
+
+
+def _band(bbox, page_height, margin):
+    if not bbox or not page_height:
+        return None
+    y0, y1 = bbox[1], bbox[3]
+    if y1 <= page_height * margin:
+        return "top"
+    if y0 >= page_height * (1 - margin):
+        return "bottom"
+    return None
+
+
+def block_key(block, page_height, margin=0.1):
+    """여백에 있는 블록이면 (band, 정규화 텍스트), 아니면 None"""
+    band = _band(block.get("bbox"), page_height, margin)
+    if band is None:
+        return None
+    return (band, normalize(block.get("text", "")))
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 (영문은 4자당 1, 한글 등 비 ASCII 는 1자당 1)"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+# ---------------------------------------------------------
+# 반복 블록 판별
+# ---------------------------------------------------------
+def find_running_keys(keys_per_page, min_ratio=0.4, min_pages=3):
+    """
+    keys_per_page: 페이지별 block_key 목록
+    전체 페이지의 min_ratio 이상(최소 min_pages 페이지)에서 반복되는 key 집합을 반환.
+    홀/짝 페이지 머리말이 다른 책도 잡히도록 기본 비율은 0.5 보다 낮게 둔다.
+    """
+    n_pages = len(keys_per_page)
+    counts = {}
+    for keys in keys_per_page:
+        for k in set(k for k in keys if k is not None):
+            counts[k] = counts.get(k, 0) + 1
+
+    threshold = max(min_pages, min_ratio * n_pages)
+    return {k for k, c in counts.items() if c >= threshold}
+
+
+def is_boilerplate(key, running_keys):
+    if key is None:
+        return False
+    if key in running_keys:
+        return True
+    # 쪽 번호는 반복 횟수와 관계없이 제거
+    return bool(PAGE_NUMBER_PATTERN.match(key[1]))
+
+
+def page_keys(blocks, page_height, margin=0.1):
+    """한 페이지 블록들의 block_key 목록"""
+    return [block_key(b, page_height, margin) for b in blocks]
+
+
+def split_page(blocks, keys, running_keys, totals):
+    """
+    한 페이지 블록을 (남길 텍스트, 제거할 텍스트) 로 나눈다.
+    totals 는 new_totals() dict 이고 글자/토큰 수가 누적된다.
+    """
+    k_list, r_list = [], []
+    for b, key in zip(blocks, keys):
+        text = b["text"]
+        tokens = estimate_tokens(text)
+        totals["total_chars"] += len(text)
+        totals["total_tokens"] += tokens
+        if is_boilerplate(key, running_keys):
+            r_list.append(text)
+            totals["removed_blocks"] += 1
+            totals["removed_chars"] += len(text)
+            totals["removed_tokens"] += tokens
+        else:
+            k_list.append(text)
+    return k_list, r_list
+
+
+def new_totals():
+    return {"removed_blocks": 0, "removed_chars": 0, "total_chars": 0, "removed_tokens": 0, "total_tokens": 0}
+
+
+def make_report(totals, running_keys):
+    """split_page 누적 결과 → chapter.json meta 에 기록할 절감 통계"""
+    total_chars = totals["total_chars"]
+    return {
+        "removed_blocks": totals["removed_blocks"],
+        "removed_chars": totals["removed_chars"],
+        "total_chars": total_chars,
+        "est_tokens_saved": totals["removed_tokens"],
+        "est_tokens_total": totals["total_tokens"],
+        "saved_ratio": round(totals["removed_chars"] / total_chars, 4) if total_chars else 0.0,
+        "patterns": sorted(f"{band}: {text}" for band, text in running_keys),
+    }
+
+
+def strip_pages(pages, margin=0.1, min_ratio=0.4, min_pages=3):
+    """
+    pages: [{"blocks": [{"text", "bbox"}, ...], "height": float}, ...]
+
+    반환: (kept, removed, report)
+      kept    - 페이지별 남길 텍스트 목록
+      removed - 페이지별 제거된 텍스트 목록
+      report  - chapter.json meta 에 기록할 절감 통계
+
+    페이지를 한꺼번에 메모리에 둘 수 없으면 page_keys → find_running_keys →
+    split_page → make_report 를 페이지 단위로 직접 호출한다.
+    """
+    keys_per_page = [page_keys(p["blocks"], p.get("height"), margin) for p in pages]
+    running = find_running_keys(keys_per_page, min_ratio=min_ratio, min_pages=min_pages)
+
+    kept, removed = [], []
+    totals = new_totals()
+    for p, keys in zip(pages, keys_per_page):
+        k_list, r_list = split_page(p["blocks"], keys, running, totals)
+        kept.append(k_list)
+        removed.append(r_list)
+
+    return kept, removed, make_report(totals, running)
@@ -0,0 +1,290 @@
+# condense.py
+# -*- coding: utf-8 -*-
+"""
+Extractive condensation (TextRank, CPU only)
+
+LLM 에 보내기 전에 챕터 본문을 문장 단위로 나눠 그래프 기반 순위(TextRank)로
+중요한 문장만 남긴다. 다음 문장은 순위와 관계없이 항상 남긴다:
+
+  - 그림/표 캡션 주변 설명(images[].local_text)에 들어 있는 문장
+  - 정의: 문단 첫 문장이 용어를 소개하는 모양("~란", "~이라고 한다", "is defined as" ...)이거나
+    "정의 3.1" / "Definition" 표제로 시작하는 문단
+  - 수식이 들어 있는 문장
+  - 코드 블록: 추출 때 모노스페이스 글꼴로 표시된 블록, 또는 줄 대부분이 코드 모양
+    (세미콜론/중괄호로 끝남, 줄 맨 앞 def/return/import ...)인 블록 (나누지 않고 통째로)
+
+문장 벡터는 단어를 고정 차원으로 hashing 한 TF-IDF 이고, 유사도 행렬과
+PageRank 반복을 NumPy 로 계산한다.
+
+  python scripts/condense.py <output 또는 chapter 폴더> --ratio 0.5 [--check]
+"""
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import argparse
+
+import numpy as np
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scripts.text_index as text_index
+
+HASH_DIM = 4096        # 단어 hashing 차원
+DAMPING = 0.85
+MAX_ITER = 100
+TOLERANCE = 1e-6
+MIN_SENTENCE_CHARS = 8  # 이보다 짧은 조각은 앞 문장에 붙인다
+
+# 문장 끝: 마침표/물음표/느낌표 뒤 공백, 또는 줄바꿈
+_SENTENCE_END = re.compile(r"(?<=[.?!。])\s+|\n+")
+
+# 정의: 블록(문단)의 첫 문장이 용어를 소개하는 모양이거나, "정의 3.1" / "Definition" 표제로 시작하는 블록
+DEFINITION_LABEL = re.compile(r"^(정의|definition|def\.)\s*[\d.\-]*\s*[:.)]?(\s|$)", re.I)
+DEFINITION_LEAD = re.compile(
+    r"^[^.?!]{1,60}?(이?란\s|(이)?라고\s*(한다|부른다)|(으)?로\s*정의(한다|된다)|을?를?\s*의미한다|"
+    r"\bis defined as\b|\bis called\b|\brefers to\b|\bis the term for\b)",
+    re.I,
+)
+FORMULA_PATTERN = re.compile(
+    r"([∑∏∫√≤≥≠≈±×÷∞∂∆∇]|[\w)\]]\s*(==?|<=|>=|≠)\s*[\w(\-]|\w\^[\w{(]|\b[A-Za-z]_\{?\w|"
+    r"\d\s*[+*/×÷^]\s*\d|\d\s+[-−]\s+\d)"
+)
+# 코드: 본문 단어(for/if/while ...)가 아니라 줄 모양으로 판단한다
+CODE_LINE_PATTERN = re.compile(
+    r"([;{}]\s*$|^[{}]|^(def|class)\s+\w+.*:\s*$|^return\b|^#include\b|^(from\s+[\w.]+\s+)?import\s+[\w.]+"
+    r"(\s+as\s+\w+)?\s*$|^(if|elif|else|for|while|try|except)\b.*:\s*$|^(\s{2,}|\t)\S.*[=();\[\]])"
+)
+RATIO_TOLERANCE = 0.1  # 보호 문장 때문에 목표 비율을 이만큼 넘으면 report 에 off_target 표시
+
+
+def is_code_block(block: str) -> bool:
+    """블록 줄의 절반 이상이 코드 모양(세미콜론/중괄호로 끝남, 줄 맨 앞 def/return 등)이면 코드"""
+    lines = [ln for ln in block.split("\n") if ln.strip()]
+    if not lines:
+        return False
+    code = sum(1 for ln in lines if CODE_LINE_PATTERN.search(ln.rstrip()))
+    return code * 2 >= len(lines)
+
+
+def split_sentences(text: str):
+    parts = [s.strip() for s in _SENTENCE_END.split(text or "") if s and s.strip()]
+    sentences = []
+    for s in parts:
+        if sentences and len(s) < MIN_SENTENCE_CHARS:
+            sentences[-1] += " " + s
+        else:
+            sentences.append(s)
+    return sentences
+
+
+def is_protected(sentence: str, first_in_block: bool = False) -> bool:
+    """수식 문장, 또는 블록 첫 문장인 정의 문장이면 True (코드 블록은 split_units 에서 통째로 보호)"""
+    return bool(
+        FORMULA_PATTERN.search(sentence)
+        or (first_in_block and (DEFINITION_LEAD.search(sentence) or DEFINITION_LABEL.search(sentence)))
+    )
+
+
+def split_units(blocks, code_blocks=()):
+    """
+    blocks → [(문장, 블록 번호, 보호 여부)].
+    코드 블록(모노스페이스 글꼴로 표시된 블록 또는 코드 모양 줄이 대부분인 블록)은 나누지 않고 한 단위로 보호하고,
+    "정의" 표제로 시작하는 블록은 문장 전체를 보호한다.
+    """
+    units = []
+    for b, block in enumerate(blocks):
+        if b in code_blocks or is_code_block(block):
+            units.append((block.strip(), b, True))
+            continue
+        labelled = bool(DEFINITION_LABEL.search(block.lstrip()))
+        for i, s in enumerate(split_sentences(block)):
+            units.append((s, b, labelled or is_protected(s, first_in_block=i == 0)))
+    return units
+
+
+def _term_matrix(sentences):
+    """문장 × HASH_DIM TF-IDF 행렬 (행 L2 정규화, float32)"""
+    rows, cols = [], []
+    for i, s in enumerate(sentences):
+        for term in text_index.query_terms(s):
+            rows.append(i)
+            cols.append(zlib.crc32(term.encode("utf-8")) % HASH_DIM)
+
+    n = len(sentences)
+    tf = np.zeros((n, HASH_DIM), dtype=np.float32)
+    if rows:
+        np.add.at(tf, (np.array(rows), np.array(cols)), 1.0)
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((n + 1) / (df + 1), dtype=np.float32) + 1.0
+    x = tf * idf
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    np.divide(x, norms, out=x, where=norms > 0)
+    return x
+
+
+def textrank(sentences):
+    """문장별 TextRank 점수 (numpy 배열, 합 1)"""
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    x = _term_matrix(sentences)
+    sim = x @ x.T
+    np.fill_diagonal(sim, 0.0)
+
+    # 전이 행렬을 따로 만들지 않고 out-weight 로 나눈 점수를 sim 에 곱한다 (n×n 행렬 하나만 유지)
+    out_weight = sim.sum(axis=1)
+    dangling = out_weight == 0  # 다른 문장과 겹치는 단어가 없는 문장 → 모든 문장으로 고르게
+    inv_weight = np.where(dangling, 0.0, 1.0 / np.where(dangling, 1.0, out_weight)).astype(np.float32)
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(MAX_ITER):
+        spread = sim.T @ (scores * inv_weight) + scores[dangling].sum() / n
+        new = (1 - DAMPING) / n + DAMPING * spread
+        if np.abs(new - scores).sum() < TOLERANCE:
+            scores = new
+            break
+        scores = new
+    return scores
+
+
+def condense_blocks(blocks, ratio: float = 0.5, keep_texts=(), code_blocks=(), max_chars: int = None):
+    """
+    blocks(텍스트 블록 목록)를 문장 단위로 ratio 글자 비율까지 줄인다.
+    keep_texts 안에 들어 있는 문장, 코드 블록(code_blocks: 블록 번호), 정의/수식 문장은 항상 남긴다.
+    보호 문장만으로 목표를 RATIO_TOLERANCE 넘게 초과하면 report["on_target"] 이 False.
+
+    max_chars 를 주면 결과 본문(구분자 포함)이 그 길이를 넘지 않는다 (프롬프트 예산).
+    보호 문장만으로도 넘으면 보호 문장도 TextRank 순위대로 예산까지만 남긴다.
+
+    반환: (남긴 블록 목록 - 원래 순서, report)
+    """
+    if not 0 < ratio <= 1:
+        raise ValueError(f"condense ratio must be in (0, 1]: {ratio}")
+
+    units = split_units(blocks, set(code_blocks))
+    sentences = [u[0] for u in units]
+    owner = [u[1] for u in units]
+
+    keep_blob = "\n".join(keep_texts)
+    protected = np.array(
+        [p or (len(s) >= MIN_SENTENCE_CHARS and s in keep_blob) for s, _, p in units], dtype=bool
+    )
+    lengths = np.array([len(s) for s in sentences], dtype=np.int64)
+    cost = lengths + 1  # 이어 붙일 때 구분자 (공백/줄바꿈)
+    chars_in = int(lengths.sum())
+    target = ratio * chars_in
+    if max_chars is not None:
+        target = min(target, max_chars)
+
+    keep = protected.copy()
+    used = int(cost[keep].sum())
+    scores = None
+    if ratio >= 1 and (max_chars is None or int(cost.sum()) <= max_chars):
+        keep[:] = True
+    else:
+        if max_chars is not None and used > max_chars:
+            scores = textrank(sentences)
+            keep[:] = False
+            used = 0
+            for i in np.argsort(-scores, kind="stable"):
+                if protected[i] and used + cost[i] <= max_chars:
+                    keep[i] = True
+                    used += int(cost[i])
+        if used < target:
+            if scores is None:
+                scores = textrank(sentences)
+            for i in np.argsort(-scores, kind="stable"):
+                if keep[i] or protected[i]:
+                    continue
+                if used + cost[i] > target:
+                    continue
+                keep[i] = True
+                used += int(cost[i])
+
+    out = {}
+    for i in np.flatnonzero(keep):
+        out.setdefault(owner[i], []).append(sentences[i])
+    kept_blocks = [" ".join(out[b]) for b in sorted(out)]
+
+    chars_out = int(lengths[keep].sum())
+    achieved = chars_out / chars_in if chars_in else 1.0
+    report = {
+        "target_ratio": ratio,
+        "sentences_in": len(sentences),
+        "sentences_out": int(keep.sum()),
+        "protected": int(protected.sum()),
+        "chars_in": chars_in,
+        "chars_out": chars_out,
+        "ratio": round(achieved, 4),
+        # 텍스트가 없는 챕터(그림만 있거나 OCR 하지 않은 스캔본)는 줄일 것이 없으므로 목표 달성으로 본다
+        "on_target": chars_in == 0 or achieved <= ratio + RATIO_TOLERANCE,
+    }
+    return kept_blocks, report
+
+
+def chapter_blocks(data: dict):
+    """chapter.json dict → (텍스트 블록 목록, 코드 블록 번호 목록). 코드 블록은 추출 때 모노스페이스 글꼴로 표시된 것."""
+    blocks, code = [], []
+    for p in data.get("pages", []):
+        code += [len(blocks) + i for i in p.get("code_blocks", [])]
+        blocks += p.get("text_blocks", [])
+    return blocks, code
+
+
+def condense_chapter(data: dict, ratio: float = 0.5, max_chars: int = None):
+    """chapter.json dict → (줄인 본문 텍스트, report). 그림/표 local_text 문장은 항상 남긴다."""
+    blocks, code = chapter_blocks(data)
+    keep_texts = [t for img in data.get("images", []) for t in (img.get("local_text") or [])]
+    kept, report = condense_blocks(blocks, ratio, keep_texts, code, max_chars)
+    return "\n".join(kept), report
+
+
+# ---------------------------------------------------------
+# CLI
+# ---------------------------------------------------------
+def _chapter_dirs(path):
+    if os.path.isfile(os.path.join(path, "chapter.json")):
+        return [path]
+    return [
+        os.path.join(path, name) for name in sorted(os.listdir(path))
+        if os.path.isfile(os.path.join(path, name, "chapter.json"))
+    ]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="챕터 본문 추출 요약 (TextRank) 압축률 확인")
+    ap.add_argument("path", help="추출 출력 폴더 또는 챕터 폴더")
+    ap.add_argument("--ratio", type=float, default=0.5, help="남길 글자 비율 (0~1]")
+    ap.add_argument("--check", action="store_true",
+                    help=f"결과 비율이 목표 + {RATIO_TOLERANCE} 를 넘는 챕터가 있으면 exit code 1")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    total_in = total_out = 0
+    off_target = []
+    for chapter_dir in _chapter_dirs(args.path):
+        with open(os.path.join(chapter_dir, "chapter.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        _, report = condense_chapter(data, args.ratio)
+        total_in += report["chars_in"]
+        total_out += report["chars_out"]
+        print(f"{os.path.basename(chapter_dir)}: {report['chars_in']} → {report['chars_out']} chars "
+              f"(ratio {report['ratio']}, 문장 {report['sentences_out']}/{report['sentences_in']}, "
+              f"보호 {report['protected']})" + ("" if report["on_target"] else "  ! 목표 초과"))
+        if not report["on_target"]:
+            off_target.append(os.path.basename(chapter_dir))
+
+    if total_in:
+        print(f"[condense] 전체 {total_in} → {total_out} chars (ratio {total_out / total_in:.4f}), "
+              f"{time.perf_counter() - t0:.2f}s")
+    if args.check and off_target:
+        sys.exit(f"[condense] 목표 비율 {args.ratio} 초과 (보호 문장 과다): {', '.join(off_target)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,14 +16,32 @@ This module exposes:
  - load_chapter(chapter_dir)
 
 The produced HTML strictly follows the structure required by the PRD.
+
+With structured=True the model returns JSON matching explanation_schema.EasyExplanation
+(strict json_schema response_format) instead of HTML. An invalid response gets one cheap
+repair request (the broken JSON + validation errors, without the chapter text) before
+falling back to one free-form (HTML) request parsed by section headings. structured=True
+is the default, as in the GUI and the job service.
 """
 import os
+import re
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
+import time
+import hashlib
+from html import escape as html_escape
+
+import scripts.condense as condense
+import scripts.explanation_schema as explanation_schema
+import scripts.instrument as instrument
+import scripts.llm_client as llm_client
+import scripts.text_index as text_index
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+MODEL = "gpt-4.1"
+# Bump when the prompt/section format changes in a way that should invalidate old outputs
+PROMPT_VERSION = 2
+FINGERPRINT_FILE = "easy_explanation.fingerprint.json"
+# Chapter text budget in the prompt; longer chapters get passages retrieved from the text index
+PROMPT_TEXT_CHARS = 15000
 
 
 def load_chapter(chapter_dir: str) -> dict:
@@ -35,6 +53,7 @@ def load_chapter(chapter_dir: str) -> dict:
 def filter_images(images, diagram_only: bool = False):
     # Keep only figure/table/diagram with non-empty caption
     selected = []
+    seen = set()
     for img in images:
         kind = img.get("kind", "other")
         if kind not in ("figure", "table", "diagram"):
@@ -44,6 +63,12 @@ def filter_images(images, diagram_only: bool = False):
         caption = (img.get("caption") or "").strip()
         if not caption:
             continue
+        # Same shared figure (figure_store) with the same caption is sent to the prompt only once;
+        # a reused figure under a different caption keeps its own caption and local_text
+        key = (img.get("phash") or img.get("file"), caption)
+        if key in seen:
+            continue
+        seen.add(key)
         selected.append(img)
     return selected
 
@@ -77,166 +102,209 @@ def build_domain_instruction(domain: str) -> str:
     )
 
 
-def build_system_message() -> str:
-    # Enforce no-hallucination and strict grounding in the original text
+def build_system_message(structured: bool = True) -> str:
+    # Enforce no-hallucination and strict grounding in the original text.
+    # Rule 4 follows the output mode so it never contradicts the JSON schema response_format
+    if structured:
+        output_rule = "4) 출력은 주어진 JSON 스키마에 맞는 JSON 하나뿐이다. HTML 태그, 마크다운, JSON 밖의 설명을 쓰지 마라.\n"
+    else:
+        output_rule = "4) HTML 구조는 엄격히 PRD에 명시된 태그와 순서를 따라야 한다.\n"
     return (
         "너는 '쉬운 해설서(Easy Explanation Guide)'를 작성하는 전문가이다.\n"
         "아래 지침을 반드시 지켜라:\n"
         "1) 절대로 원문(chapter.json의 text, 캡션, 주변설명)에 나오지 않는 개념·정의·공식·코드·그래프·숫자를 생성하지 마라.\n"
         "2) 모든 설명은 반드시 원문 근거에 기반해야 하며, 필요한 경우 원문 위치(페이지 번호)를 참조하라.\n"
         "3) 사용자가 추가한 지시문(user_instruction)은 프롬프트의 마지막에만 반영하라(우선순위: 시스템 메시지 > 본문 지시 > 사용자 지시).\n"
-        "4) HTML 구조는 엄격히 PRD에 명시된 태그와 순서를 따라야 한다.\n"
+        + output_rule +
         "5) 간결하고 학생 친화적인 한국어로 작성하되, 사실을 왜곡하지 마라.\n"
     )
 
 
-def build_prompt(chapter_text: str, images_desc: str, domain_instruction: str, user_instruction: str) -> str:
+REPAIR_SYSTEM_MESSAGE = (
+    "너는 JSON 수리기이다. 주어진 JSON 을 오류 목록에 맞게 고쳐 스키마에 맞는 JSON 만 출력하라.\n"
+    "내용은 바꾸지 말고, 빠진 필드는 원래 JSON 의 내용에서 옮기거나 빈 값으로 채워라."
+)
+
+
+def build_prompt(chapter_text: str, images_desc: str, domain_instruction: str, user_instruction: str,
+                 structured: bool = True) -> str:
     prompt = []
-    prompt.append("챕터 원문(일부):\n" + chapter_text[:15000])
+    prompt.append("챕터 원문(일부):\n" + chapter_text[:PROMPT_TEXT_CHARS])
     prompt.append("\n도메인별 지침:\n" + domain_instruction)
     prompt.append("\n이미지/표 정보(캡션 등):\n" + images_desc)
-    prompt.append(
-        "\n출력 제약:\n- 결과는 완성된 HTML 문서의 <body> 안에 들어갈 본문만 작성하지 말고, PRD에 맞는 전체 HTML 문서를 생성하라.\n- 절대 원문에 없는 개념/공식/코드/그래프/숫자를 추가하지 마라.\n"
-    )
+    if structured:
+        prompt.append(
+            "\n출력 제약:\n- 주어진 JSON 스키마에 맞는 JSON 만 출력하라. 각 필드는 PRD의 다섯 섹션에 해당한다.\n"
+            "- figure_explanations 에는 위 이미지/표 목록의 번호(figure)마다 해설을 하나씩 작성하라.\n"
+            "- 값에는 HTML 태그나 마크다운을 쓰지 말고 일반 문장으로 작성하라.\n"
+            "- 절대 원문에 없는 개념/공식/코드/그래프/숫자를 추가하지 마라.\n"
+        )
+    else:
+        prompt.append(
+            "\n출력 제약:\n- 결과는 완성된 HTML 문서의 <body> 안에 들어갈 본문만 작성하지 말고, PRD에 맞는 전체 HTML 문서를 생성하라.\n- 절대 원문에 없는 개념/공식/코드/그래프/숫자를 추가하지 마라.\n"
+        )
     if user_instruction:
         prompt.append("\n사용자 추가 지시(아래에만 반영):\n" + user_instruction)
     return "\n\n".join(prompt)
 
 
-def render_prd_html(title: str, sections: dict, figures_html: str, appendix_html: str) -> str:
-    # Construct HTML exactly as PRD requested but with modern design
-    
-    css = """
-    <style>
-        @import url('https://cdn.jsdelivr.net/gh/orioncactus/pretendard/dist/web/static/pretendard.css');
-        
-        :root {
-            --primary-color: #2563eb;
-            --bg-color: #f8fafc;
-            --card-bg: #ffffff;
-            --text-main: #1e293b;
-            --text-sub: #475569;
-            --border-color: #e2e8f0;
-        }
-
-        body {
-            font-family: Pretendard, -apple-system, BlinkMacSystemFont, system-ui, Roboto, sans-serif;
-            background-color: var(--bg-color);
-            color: var(--text-main);
-            line-height: 1.75;
-            margin: 0;
-            padding: 40px 20px;
-        }
-
-        .container {
-            max_width: 800px;
-            margin: 0 auto;
-            background: var(--card-bg);
-            padding: 60px;
-            border-radius: 16px;
-            box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1), 0 2px 4px -1px rgba(0, 0, 0, 0.06);
-        }
-
-        h1 {
-            font-size: 2.5rem;
-            font-weight: 800;
-            color: #0f172a;
-            margin-bottom: 2rem;
-            padding-bottom: 1rem;
-            border-bottom: 2px solid var(--border-color);
-            letter-spacing: -0.025em;
-        }
-
-        h2 {
-            font-size: 1.75rem;
-            font-weight: 700;
-            color: #1e293b;
-            margin-top: 3rem;
-            margin-bottom: 1.5rem;
-            display: flex;
-            align-items: center;
-        }
-        
-        h2::before {
-            content: '';
-            display: inline-block;
-            width: 6px;
-            height: 28px;
-            background-color: var(--primary-color);
-            margin-right: 12px;
-            border-radius: 3px;
-        }
-
-        p {
-            margin-bottom: 1.25rem;
-            font-size: 1.1rem;
-            color: var(--text-sub);
-        }
-
-        ul {
-            padding-left: 1.5rem;
-            margin-bottom: 1.5rem;
-        }
-
-        li {
-            margin-bottom: 0.75rem;
-            color: var(--text-sub);
-            font-size: 1.1rem;
-        }
-
-        figure {
-            margin: 2.5rem 0;
-            background: #f1f5f9;
-            padding: 20px;
-            border-radius: 12px;
-            text-align: center;
-        }
-
-        img {
-            max-width: 100%;
-            height: auto;
-            border-radius: 8px;
-            box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
-        }
+def _paragraphs(text: str) -> str:
+    """Plain text (structured output) → escaped HTML with line breaks kept"""
+    return html_escape(text.strip()).replace("\n", "<br>")
+
+
+# Remote web font; site_export replaces it with local font files (or the system font stack)
+FONT_IMPORT = "@import url('https://cdn.jsdelivr.net/gh/orioncactus/pretendard/dist/web/static/pretendard.css');"
+
+# Page stylesheet, inlined into each easy_explanation.html and shared as one hashed file by site_export
+EXPLANATION_CSS = """\
+:root {
+    --primary-color: #2563eb;
+    --bg-color: #f8fafc;
+    --card-bg: #ffffff;
+    --text-main: #1e293b;
+    --text-sub: #475569;
+    --border-color: #e2e8f0;
+}
+
+body {
+    font-family: Pretendard, -apple-system, BlinkMacSystemFont, system-ui, Roboto, sans-serif;
+    background-color: var(--bg-color);
+    color: var(--text-main);
+    line-height: 1.75;
+    margin: 0;
+    padding: 40px 20px;
+}
+
+.container {
+    max-width: 800px;
+    margin: 0 auto;
+    background: var(--card-bg);
+    padding: 60px;
+    border-radius: 16px;
+    box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1), 0 2px 4px -1px rgba(0, 0, 0, 0.06);
+}
+
+h1 {
+    font-size: 2.5rem;
+    font-weight: 800;
+    color: #0f172a;
+    margin-bottom: 2rem;
+    padding-bottom: 1rem;
+    border-bottom: 2px solid var(--border-color);
+    letter-spacing: -0.025em;
+}
+
+h2 {
+    font-size: 1.75rem;
+    font-weight: 700;
+    color: #1e293b;
+    margin-top: 3rem;
+    margin-bottom: 1.5rem;
+    display: flex;
+    align-items: center;
+}
+
+h2::before {
+    content: '';
+    display: inline-block;
+    width: 6px;
+    height: 28px;
+    background-color: var(--primary-color);
+    margin-right: 12px;
+    border-radius: 3px;
+}
+
+p {
+    margin-bottom: 1.25rem;
+    font-size: 1.1rem;
+    color: var(--text-sub);
+}
+
+ul {
+    padding-left: 1.5rem;
+    margin-bottom: 1.5rem;
+}
+
+li {
+    margin-bottom: 0.75rem;
+    color: var(--text-sub);
+    font-size: 1.1rem;
+}
+
+figure {
+    margin: 2.5rem 0;
+    background: #f1f5f9;
+    padding: 20px;
+    border-radius: 12px;
+    text-align: center;
+}
+
+img {
+    max-width: 100%;
+    height: auto;
+    border-radius: 8px;
+    box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1);
+}
+
+figcaption {
+    margin-top: 12px;
+    font-size: 0.95rem;
+    color: #64748b;
+    font-weight: 500;
+}
+
+hr {
+    border: 0;
+    height: 1px;
+    background: var(--border-color);
+    margin: 4rem 0;
+}
+
+.badge {
+    display: inline-block;
+    padding: 4px 12px;
+    background-color: #dbeafe;
+    color: #1e40af;
+    border-radius: 9999px;
+    font-size: 0.875rem;
+    font-weight: 600;
+    margin-bottom: 1rem;
+}
+
+@media (max-width: 768px) {
+    .container {
+        padding: 30px 20px;
+    }
+    h1 {
+        font-size: 2rem;
+    }
+    h2 {
+        font-size: 1.5rem;
+    }
+}
+"""
 
-        figcaption {
-            margin-top: 12px;
-            font-size: 0.95rem;
-            color: #64748b;
-            font-weight: 500;
-        }
 
-        hr {
-            border: 0;
-            height: 1px;
-            background: var(--border-color);
-            margin: 4rem 0;
-        }
-
-        .badge {
-            display: inline-block;
-            padding: 4px 12px;
-            background-color: #dbeafe;
-            color: #1e40af;
-            border-radius: 9999px;
-            font-size: 0.875rem;
-            font-weight: 600;
-            margin-bottom: 1rem;
+def render_prd_html(title: str, sections, figures_html: str, appendix_html: str) -> str:
+    """
+    sections: explanation_schema.EasyExplanation (structured output, plain text) or the
+    legacy dict scraped from a free-form response (values inserted as-is).
+    """
+    # Construct HTML exactly as PRD requested but with modern design
+    if not isinstance(sections, dict):
+        sections = {
+            "core_concepts": _paragraphs(sections.core_concepts),
+            "figure_explanations": [
+                f"<strong>{f.figure})</strong> {_paragraphs(f.explanation)}"
+                for f in sorted(sections.figure_explanations, key=lambda f: f.figure)
+            ],
+            "background": _paragraphs(sections.background),
+            "examples": _paragraphs(sections.examples),
+            "takeaways": [_paragraphs(t) for t in sections.takeaways],
         }
 
-        @media (max-width: 768px) {
-            .container {
-                padding: 30px 20px;
-            }
-            h1 {
-                font-size: 2rem;
-            }
-            h2 {
-                font-size: 1.5rem;
-            }
-        }
-    </style>
-    """
+    css = f"<style>\n{FONT_IMPORT}\n{EXPLANATION_CSS}</style>"
 
     body = []
     body.append(f'<div class="container">')
@@ -286,73 +354,8 @@ def render_prd_html(title: str, sections: dict, figures_html: str, appendix_html
     return "\n".join(html)
 
 
-def easy_explain_chapter(
-    chapter_dir: str,
-    domain: str = "default",
-    use_images: str = "include",
-    diagram_only: bool = False,
-    progress_callback=None,
-    stop_flag=None,
-    user_instruction: str = "",
-) -> str:
-    """
-    Generate the Easy Explanation Guide HTML for a chapter and return it.
-    """
-    data = load_chapter(chapter_dir)
-
-    # domain override from chapter.json if present
-    if data.get("domain") in ("math", "it", "biz") and domain == "default":
-        domain = data["domain"]
-
-    # collect text
-    texts = []
-    for p in data.get("pages", []):
-        texts.extend(p.get("text_blocks", []))
-    chapter_text = "\n".join(texts)[:20000]
-
-    if progress_callback:
-        progress_callback(0.1)
-
-    # images
-    if use_images == "no_images":
-        images = []
-    else:
-        images = filter_images(data.get("images", []), diagram_only=diagram_only)
-
-    # build image description text for prompt
-    img_descs = []
-    for i, img in enumerate(images, start=1):
-        cap = (img.get("caption") or "").strip()
-        loc = " ".join(img.get("local_text", []) or [])[:200]
-        page_no = img.get("page_number")
-        page_ref = f"(p.{page_no})" if page_no is not None else ""
-        img_descs.append(f"{i}) [{img.get('kind','figure')}] {cap} {page_ref}\n주변설명: {loc}\n파일: {img.get('file')}")
-    images_desc = "\n\n".join(img_descs) if img_descs else "없음"
-
-    if progress_callback:
-        progress_callback(0.2)
-
-    domain_instruction = build_domain_instruction(domain)
-    system_message = build_system_message()
-    prompt_text = build_prompt(chapter_text, images_desc, domain_instruction, user_instruction)
-
-    if stop_flag and stop_flag():
-        return "[중단됨]"
-
-    # call LLM
-    res = client.chat.completions.create(
-        model="gpt-4.1",
-        messages=[
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": prompt_text},
-        ],
-    )
-
-    content = res.choices[0].message.content
-
-    if progress_callback:
-        progress_callback(0.8)
-
+def _parse_sections_regex(content: str) -> dict:
+    """Legacy parsing of a free-form response into the PRD section dict"""
     # We expect the LLM to return structured text pieces that we must map to PRD sections.
     # To keep the code robust even if LLM returns full HTML, attempt to extract plain pieces by
     # asking the model to honor the PRD, but fall back to wrapping the whole content into
@@ -371,8 +374,6 @@ def easy_explain_chapter(
     try:
         txt = content
         # Try to find the five sections by heading markers
-        import re
-
         def extract_between(h1, h2, text):
             p = re.search(re.escape(h1) + r"(.*?)" + re.escape(h2), text, flags=re.S)
             return p.group(1).strip() if p else None
@@ -412,13 +413,186 @@ def easy_explain_chapter(
         # Fallback - place all content in core_concepts
         sections["core_concepts"] = content
 
+    return sections
+
+
+def _message_text(res):
+    """Response text, or None when the model refused (message.refusal) or returned no content"""
+    message = res.choices[0].message
+    if getattr(message, "refusal", None) or message.content is None:
+        return None
+    return message.content
+
+
+def _refusal_error(res, what: str) -> RuntimeError:
+    reason = getattr(res.choices[0].message, "refusal", None) or "빈 응답"
+    return RuntimeError(f"{what}: 모델이 응답을 거절했습니다 ({reason})")
+
+
+def _add_usage(usage: dict, res):
+    for k, v in instrument.usage_dict(getattr(res, "usage", None)).items():
+        usage[k] = usage.get(k, 0) + v
+
+
+def _repair(content: str, err) -> tuple:
+    """Ask the model to fix only the invalid JSON; returns (response, repaired text or None if refused)"""
+    res = llm_client.get_client().chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": REPAIR_SYSTEM_MESSAGE},
+            {"role": "user", "content": f"오류 목록:\n{explanation_schema.error_summary(err)}\n\nJSON:\n{content}"},
+        ],
+        response_format=explanation_schema.response_format(),
+    )
+    return res, _message_text(res)
+
+
+def _parse_response(content: str, structured: bool, times: dict, usage: dict):
+    """
+    Response → (sections, mode). mode: "structured" / "repaired" / "regex".
+    Repair request usage is added to usage (in place).
+    Returns (None, "invalid") when structured output is still invalid after one repair;
+    the caller then asks for a free-form answer instead of running the heading regexes over JSON.
+    """
+    if not structured:
+        return _parse_sections_regex(content), "regex"
+
+    try:
+        return explanation_schema.EasyExplanation.model_validate_json(content), "structured"
+    except explanation_schema.ValidationError as err:
+        with instrument.timed(times, "llm_repair"):
+            res, repaired = _repair(content, err)
+        _add_usage(usage, res)
+        if repaired is None:
+            return None, "invalid"
+        try:
+            return explanation_schema.EasyExplanation.model_validate_json(repaired), "repaired"
+        except explanation_schema.ValidationError:
+            return None, "invalid"
+
+
+def easy_explain_chapter(
+    chapter_dir: str,
+    domain: str = "default",
+    use_images: str = "include",
+    diagram_only: bool = False,
+    progress_callback=None,
+    stop_flag=None,
+    user_instruction: str = "",
+    condense_ratio: float = None,
+    structured: bool = True,
+) -> str:
+    """
+    Generate the Easy Explanation Guide HTML for a chapter and return it.
+
+    condense_ratio: if set (0~1], the chapter text is first condensed offline to about
+    that share of characters (TextRank; captions' local text, definitions, formulas and
+    code are always kept) before it goes into the prompt.
+    structured: request JSON matching explanation_schema.EasyExplanation instead of HTML.
+    """
+    times = {}
+    t0 = time.perf_counter()
+    data = load_chapter(chapter_dir)
+
+    # domain override from chapter.json if present
+    if data.get("domain") in ("math", "it", "biz") and domain == "default":
+        domain = data["domain"]
+
+    # collect text
+    texts = []
+    for p in data.get("pages", []):
+        texts.extend(p.get("text_blocks", []))
+    chapter_text = "\n".join(texts)
+
+    if progress_callback:
+        progress_callback(0.1)
+
+    # images
+    if use_images == "no_images":
+        images = []
+    else:
+        images = filter_images(data.get("images", []), diagram_only=diagram_only)
+
+    condense_report = None
+    if condense_ratio:
+        with instrument.timed(times, "condense"):
+            # condense to the prompt budget too, so fit_text below keeps the condensed text
+            # (protected definitions/formulas/code) instead of swapping in raw index passages
+            chapter_text, condense_report = condense.condense_chapter(data, condense_ratio, PROMPT_TEXT_CHARS)
+
+    # Long chapters: instead of a blind prefix, retrieve passages related to the title,
+    # each caption and the user instruction from the local text index (if built)
+    queries = [data.get("title", ""), user_instruction]
+    queries += [f"{img.get('caption', '')} {' '.join(img.get('local_text') or [])}" for img in images]
+    chapter_text = text_index.fit_text(chapter_dir, chapter_text, PROMPT_TEXT_CHARS, queries)
+
+    # build image description text for prompt
+    img_descs = []
+    for i, img in enumerate(images, start=1):
+        cap = (img.get("caption") or "").strip()
+        loc = " ".join(img.get("local_text", []) or [])[:200]
+        page_no = img.get("page_number")
+        page_ref = f"(p.{page_no})" if page_no is not None else ""
+        img_descs.append(f"{i}) [{img.get('kind','figure')}] {cap} {page_ref}\n주변설명: {loc}\n파일: {img.get('file')}")
+    images_desc = "\n\n".join(img_descs) if img_descs else "없음"
+
+    if progress_callback:
+        progress_callback(0.2)
+
+    domain_instruction = build_domain_instruction(domain)
+    system_message = build_system_message(structured)
+    prompt_text = build_prompt(chapter_text, images_desc, domain_instruction, user_instruction, structured)
+    times["prompt_build"] = time.perf_counter() - t0 - times.get("condense", 0.0)
+
+    if stop_flag and stop_flag():
+        return "[중단됨]"
+
+    # call LLM
+    extra = {"response_format": explanation_schema.response_format()} if structured else {}
+    with instrument.timed(times, "llm"):
+        res = llm_client.get_client().chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt_text},
+            ],
+            **extra,
+        )
+
+    content = _message_text(res)
+    if content is None:
+        raise _refusal_error(res, os.path.basename(os.path.normpath(chapter_dir)))
+    usage = instrument.usage_dict(getattr(res, "usage", None))
+
+    if progress_callback:
+        progress_callback(0.8)
+
+    sections, parse_mode = _parse_response(content, structured, times, usage)
+    if sections is None:
+        # Structured output still invalid after the repair: request the free-form HTML answer once
+        free_prompt = build_prompt(chapter_text, images_desc, domain_instruction, user_instruction, structured=False)
+        with instrument.timed(times, "llm_fallback"):
+            res = llm_client.get_client().chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": build_system_message(structured=False)},
+                    {"role": "user", "content": free_prompt},
+                ],
+            )
+        _add_usage(usage, res)
+        content = _message_text(res)
+        if content is None:
+            raise _refusal_error(res, os.path.basename(os.path.normpath(chapter_dir)))
+        sections, parse_mode = _parse_sections_regex(content), "freeform"
+    t0 = time.perf_counter()
+
     # Build figures HTML for section 2 and appendix
     figures_html_parts = []
     appendix_parts = []
     for img in images:
         cap = (img.get("caption") or "").strip()
         kind = img.get("kind", "figure")
-        img_tag = f'<figure class="{kind}">\n  <img src="{img.get("file")}" alt="{cap}">\n  <figcaption>{cap}</figcaption>\n</figure>'
+        img_tag = f'<figure class="{kind}">\n  <img src="{img.get("file")}" alt="{cap}" loading="lazy" decoding="async">\n  <figcaption>{cap}</figcaption>\n</figure>'
         figures_html_parts.append(img_tag)
         appendix_parts.append(img_tag)
 
@@ -429,6 +603,13 @@ def easy_explain_chapter(
     title = data.get("title") or os.path.basename(chapter_dir)
 
     html = render_prd_html(title, sections, figures_html, appendix_html)
+    times["html_render"] = time.perf_counter() - t0
+
+    instrument.get_recorder().emit(
+        "chapter", stage="explain", chapter=os.path.basename(os.path.normpath(chapter_dir)),
+        prompt_chars=len(prompt_text), times=times, usage=usage,
+        condense=condense_report, parse=parse_mode,
+    )
 
     if progress_callback:
         progress_callback(1.0)
@@ -436,8 +617,63 @@ def easy_explain_chapter(
     return html
 
 
-def save_explanation(chapter_dir: str, html: str) -> str:
+def save_explanation(chapter_dir: str, html: str, fingerprint: dict = None) -> str:
     out_path = os.path.join(chapter_dir, "easy_explanation.html")
     with open(out_path, "w", encoding="utf-8") as f:
         f.write(html)
+    if fingerprint is not None:
+        with open(os.path.join(chapter_dir, FINGERPRINT_FILE), "w", encoding="utf-8") as f:
+            json.dump(fingerprint, f, ensure_ascii=False, indent=2)
     return out_path
+
+
+# ---------------------------------------------------------
+# Incremental regeneration
+# ---------------------------------------------------------
+def compute_fingerprint(
+    chapter_dir: str,
+    domain: str = "default",
+    use_images: str = "include",
+    diagram_only: bool = False,
+    user_instruction: str = "",
+    condense_ratio: float = None,
+    structured: bool = True,
+) -> dict:
+    """
+    Fingerprint of everything that determines easy_explanation.html:
+    chapter.json content, options, model and prompt template.
+    """
+    with open(os.path.join(chapter_dir, "chapter.json"), "rb") as f:
+        chapter_hash = hashlib.sha256(f.read()).hexdigest()
+
+    # Hash the template text itself so prompt edits invalidate outputs even without a version bump
+    template = build_system_message(structured) + build_prompt("", "", build_domain_instruction(domain), "", structured)
+    if structured:
+        template += json.dumps(explanation_schema.response_format(), sort_keys=True, ensure_ascii=False)
+    fp = {
+        "chapter_sha256": chapter_hash,
+        "options": {
+            "domain": domain,
+            "use_images": use_images,
+            "diagram_only": bool(diagram_only),
+            "user_instruction": user_instruction or "",
+            "condense_ratio": condense_ratio or None,
+            "structured": bool(structured),
+        },
+        "model": MODEL,
+        "prompt_version": PROMPT_VERSION,
+        "template_sha256": hashlib.sha256(template.encode("utf-8")).hexdigest(),
+    }
+    fp["key"] = hashlib.sha256(json.dumps(fp, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return fp
+
+
+def is_up_to_date(chapter_dir: str, fingerprint: dict) -> bool:
+    """True if easy_explanation.html exists and was generated with the same fingerprint"""
+    if not os.path.exists(os.path.join(chapter_dir, "easy_explanation.html")):
+        return False
+    try:
+        with open(os.path.join(chapter_dir, FINGERPRINT_FILE), "r", encoding="utf-8") as f:
+            return json.load(f).get("key") == fingerprint["key"]
+    except (OSError, ValueError):
+        return False
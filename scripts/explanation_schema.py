@@ -0,0 +1,54 @@
+# explanation_schema.py
+# -*- coding: utf-8 -*-
+"""
+Structured output schema for the Easy Explanation Guide
+
+구조화 출력 모드에서 모델은 HTML 대신 이 스키마에 맞는 JSON 을 돌려준다
+(OpenAI response_format json_schema, strict). 모든 필드는 필수이고 스키마에 없는
+필드는 허용하지 않는다 (extra="forbid" → additionalProperties: false).
+
+값은 HTML 태그 없는 일반 텍스트이며, HTML 은 render_prd_html 이 만든다.
+"""
+from typing import List
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+__all__ = ["FigureExplanation", "EasyExplanation", "ValidationError", "response_format", "error_summary"]
+
+
+class FigureExplanation(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    figure: int = Field(description="프롬프트의 이미지/표 목록 번호 (1부터)")
+    explanation: str = Field(description="이 도식·표가 보여주는 내용을 쉽게 풀어 쓴 해설")
+
+
+class EasyExplanation(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    core_concepts: str = Field(description="1. 핵심 개념 쉽게 설명하기")
+    figure_explanations: List[FigureExplanation] = Field(description="2. 중요한 도식·표 해설 (도식·표마다 하나)")
+    background: str = Field(description="3. 기초 지식 보충")
+    examples: str = Field(description="4. 예시·비유로 다시 설명")
+    takeaways: List[str] = Field(description="5. 반드시 기억해야 하는 포인트 (3~8개)")
+
+
+def response_format() -> dict:
+    """chat.completions.create(response_format=...) 에 넘길 strict json_schema"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "easy_explanation",
+            "strict": True,
+            "schema": EasyExplanation.model_json_schema(),
+        },
+    }
+
+
+def error_summary(err: ValidationError, limit: int = 10) -> str:
+    """수리 요청에 넣을 짧은 오류 목록 (필드 경로: 메시지)"""
+    lines = []
+    for e in err.errors()[:limit]:
+        loc = ".".join(str(p) for p in e.get("loc", ())) or "(root)"
+        lines.append(f"- {loc}: {e.get('msg')}")
+    return "\n".join(lines)
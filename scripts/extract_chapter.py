@@ -4,6 +4,15 @@ import fitz  # PyMuPDF
 import os
 import json
 import re
+import time
+
+import scripts.boilerplate as boilerplate
+import scripts.figure_store as figure_store
+import scripts.instrument as instrument
+import scripts.memory_guard as memory_guard
+import scripts.page_store as page_store
+import scripts.profiling as profiling
+import scripts.ocr_fallback as ocr_fallback
 
 
 # ---------------------------------------------------------
@@ -56,9 +65,34 @@ def get_toc_items(doc):
     return items
 
 
+def chapters_for(doc, title, levels=1):
+    """
+    TOC 에서 levels 이하 항목 → (챕터 목록, "toc"). TOC 가 없으면 문서 전체를 한 챕터로 (→ "none").
+    GUI 없이 책 전체를 처리하는 도구(watch_folder, shard_plan)가 쓴다.
+    """
+    try:
+        items = [t for t in get_toc_items(doc) if t["level"] <= levels]
+    except RuntimeError:
+        return [{"index": 1, "title": title, "start": 0, "end": doc.page_count - 1, "dir_name": "chapter_01"}], "none"
+    # 걸러낸 항목은 다음 남은 항목 직전까지 (하위 절 페이지도 포함)
+    ends = [max(nxt["start"] - 1, t["start"]) for t, nxt in zip(items, items[1:])] + [doc.page_count - 1]
+    return [{
+        "index": t["index"], "title": t["title"], "start": t["start"], "end": end,
+        "dir_name": f"chapter_{t['index']:02d}",
+    } for t, end in zip(items, ends)], "toc"
+
+
 # ---------------------------------------------------------
 # 텍스트 블록 추출
 # ---------------------------------------------------------
+_MONO_FONT = re.compile(r"mono|courier|consol|menlo|code", re.I)
+
+
+def _is_mono_span(span):
+    # flags bit 3: 고정폭 글꼴 (글꼴 descriptor 가 없으면 이름으로)
+    return bool(span.get("flags", 0) & 8) or bool(_MONO_FONT.search(span.get("font", "")))
+
+
 def _extract_text_blocks(page):
     blocks = page.get_text("dict")["blocks"]
     text_blocks = []
@@ -69,18 +103,24 @@ def _extract_text_blocks(page):
             continue
 
         txt = ""
+        mono = True
         for line in b.get("lines", []):
             for span in line.get("spans", []):
                 txt += span.get("text", "")
+                if mono and span.get("text", "").strip() and not _is_mono_span(span):
+                    mono = False
             txt += "\n"
 
         txt = txt.strip()
         if txt:
-            text_blocks.append({
+            entry = {
                 "index": idx,
                 "text": txt,
                 "bbox": b.get("bbox"),
-            })
+            }
+            if mono:
+                entry["mono"] = True  # 코드 블록 후보 (condense 에서 통째로 보호)
+            text_blocks.append(entry)
             page_texts.append(txt)
 
     return text_blocks, page_texts
@@ -89,13 +129,18 @@ def _extract_text_blocks(page):
 # ---------------------------------------------------------
 # 도식/표 벡터 rect 후보 얻기
 # ---------------------------------------------------------
-def _get_diagram_rects(page, min_size=50):
+def _get_diagram_rects(page, min_size=50, drawings=None):
     """
     page.get_drawings() 에서 path 단위로 추출한 rect 들 중
     도식 가능성이 있는 것만 필터링.
+    drawings 를 주면 (get_drawings(extended=True) 결과) 다시 부르지 않고 그 안의 path 만 쓴다.
     """
     rects = []
-    for d in page.get_drawings():
+    if drawings is None:
+        drawings = page.get_drawings()
+    for d in drawings:
+        if d.get("type") in ("clip", "group"):
+            continue
         r = d.get("rect")
         if not r:
             continue
@@ -145,39 +190,170 @@ def _union_diagram_for_caption(caption_bbox, diagram_rects, max_distance=700):
     return fitz.Rect(x0, y0, x1, y1)
 
 
+# ---------------------------------------------------------
+# 페이지에 삽입된 raster 이미지 (사진, 스크린샷)
+# ---------------------------------------------------------
+# 원본 스트림을 그대로 저장해도 브라우저가 보여줄 수 있는 형식
+RASTER_EXTS = {"png", "jpeg", "jpg", "gif", "bmp", "webp"}
+# 원본 스트림 색이 페이지에 보이는 색과 같은 색공간 (브라우저는 색 정보가 없으면 sRGB 로 본다).
+# CMYK, Indexed, sRGB 가 아닌 ICC 프로파일 등은 렌더링한다.
+_PLAIN_COLORSPACE = re.compile(r"^(DeviceRGB|DeviceGray)$|^ICCBased\(RGB,.*sRGB", re.I)
+
+
+def _clip_rects(drawings):
+    """clip path 영역 (get_drawings(extended=True) 결과의 scissor)"""
+    return [fitz.Rect(d["scissor"]) for d in drawings if d.get("type") == "clip" and d.get("scissor")]
+
+
+def _is_plain_placement(info, clips):
+    """
+    원본 스트림이 페이지에 보이는 모습과 같은 배치인가:
+    회전/뒤집기 없는 축 정렬 transform, clip path 에 잘리지 않음, RGB/Gray(sRGB) 색공간, mask 없음.
+    """
+    a, b, c, d = info["transform"][:4]
+    if abs(b) > 1e-3 or abs(c) > 1e-3 or a <= 0 or d <= 0:
+        return False
+    if info.get("has-mask") or not _PLAIN_COLORSPACE.search(info.get("cs-name") or ""):
+        return False
+    r = fitz.Rect(info["bbox"])
+    # 어떤 clip 이 이 이미지에 걸리는지는 알 수 없으므로, 일부만 덮는 clip 이 있으면 잘린 것으로 본다
+    return not any(clip.intersects(r) and not (clip + (-1, -1, 1, 1)).contains(r) for clip in clips)
+
+
+def _get_raster_rects(page, clips, min_size=50):
+    """
+    page.get_image_info(xrefs=True) 에서 (rect, xref) 목록. clips 는 _clip_rects 결과.
+    페이지 밖이나 clip path 로 잘렸거나, 회전/뒤집혀 배치됐거나, 색공간/mask 때문에 원본과 다르게 보이는
+    이미지는 원본을 그대로 쓸 수 없으므로 xref 를 0 으로 둔다 (→ 보이는 영역을 렌더링).
+    """
+    rasters = []
+    for info in page.get_image_info(xrefs=True):
+        r = fitz.Rect(info["bbox"])
+        visible = r & page.rect
+        if visible.width < min_size or visible.height < min_size:
+            continue
+        xref = info.get("xref", 0) if visible == r else 0
+        if xref and not _is_plain_placement(info, clips):
+            xref = 0
+        rasters.append((visible, xref))
+    return rasters
+
+
+def _raster_for_caption(caption_bbox, rasters, max_distance=700):
+    """캡션 위쪽에서 가장 가까운 raster 이미지 (rect, xref), 없으면 None"""
+    cx0, cy0, cx1, cy1 = caption_bbox
+
+    best = None
+    for r, xref in rasters:
+        if r.y1 > cy0 + 5:
+            continue
+        gap = cy0 - r.y1
+        if gap > max_distance:
+            continue
+        if r.x1 < cx0 - 80 or r.x0 > cx1 + 80:
+            continue
+        if best is None or gap < best[0]:
+            best = (gap, r, xref)
+
+    return best[1:] if best else None
+
+
+def _save_raster(doc, xref, out_dir, fname_base, xref_cache):
+    """
+    xref 이미지의 원본 스트림 바이트를 그대로 파일로 저장 (렌더링/재인코딩 없음).
+    같은 xref 는 한 번만 저장하고 파일 이름을 재사용한다.
+    smask/Decode/mask 가 있거나, RGB/Gray 가 아닌 색공간이거나, jpx/jb2 처럼 브라우저가 못 여는 형식이면
+    None (→ 렌더링).
+    """
+    if xref <= 0:
+        return None
+    if xref in xref_cache:
+        return xref_cache[xref]
+
+    fname = None
+    # /Decode 배열, (S)Mask, stencil mask 는 원본 스트림 색/투명도가 페이지와 달라진다
+    plain = all(doc.xref_get_key(xref, k)[0] == "null" for k in ("Decode", "SMask", "Mask")) \
+        and doc.xref_get_key(xref, "ImageMask")[1] != "true"
+    info = doc.extract_image(xref) if plain else None
+    if info and not info.get("smask") and info.get("ext") in RASTER_EXTS \
+            and _PLAIN_COLORSPACE.search(info.get("cs-name") or ""):
+        fname = f"{fname_base}.{info['ext']}"
+        with open(os.path.join(out_dir, fname), "wb") as f:
+            f.write(info["image"])
+
+    xref_cache[xref] = fname
+    return fname
+
+
 # ---------------------------------------------------------
 # 페이지 내 이미지/도식/표 추출 핵심
 # ---------------------------------------------------------
-def _process_images(page, chapter_idx, page_abs_index, out_dir, text_blocks):
+def _process_images(page, chapter_idx, page_abs_index, out_dir, text_blocks, times=None, meta=None,
+                    xref_cache=None, zoom=3):
     images = []
-    diagram_rects = _get_diagram_rects(page)
+    if xref_cache is None:
+        xref_cache = {}
+    caption_blocks = [tb for tb in text_blocks if _is_caption_text(tb["text"])]
+
+    # 도식은 캡션 기준으로만 잘라내므로, 캡션이 없는 페이지는 get_drawings() 를 건너뛴다
+    if meta is not None:
+        meta["captions"] = len(caption_blocks)
+        meta["drawings"] = "analyzed" if caption_blocks else "skipped"
+    if not caption_blocks:
+        return images
+
+    # 도식 rect 와 raster 의 clip 판정을 get_drawings(extended=True) 한 번으로
+    with instrument.timed(times, "get_drawings"):
+        drawings = page.get_drawings(extended=True)
+        diagram_rects = _get_diagram_rects(page, drawings=drawings)
+        clips = _clip_rects(drawings)
+    del drawings
+    with instrument.timed(times, "image_info"):
+        raster_rects = _get_raster_rects(page, clips)
 
     diagram_counter = 0
+    image_counter = 0
 
     # 캡션 기준으로 도식/표 추출
-    for tb in text_blocks:
-        text = tb["text"]
-        if not _is_caption_text(text):
-            continue
-
-        caption = text.strip()
+    for tb in caption_blocks:
+        caption = tb["text"].strip()
         cap_bbox = tb["bbox"]
 
         # 1) 캡션과 가장 관련 있는 도식 rect들을 union
         diag_rect = _union_diagram_for_caption(cap_bbox, diagram_rects)
+
+        # 1-1) 캡션 바로 위가 삽입 이미지면 원본 스트림을 그대로 저장
+        raster = _raster_for_caption(cap_bbox, raster_rects)
+        fname = None
+        xref = 0
+        if raster is not None and (diag_rect is None or raster[0].y1 >= diag_rect.y1 - 5):
+            diag_rect, xref = raster
+            image_counter += 1
+            with instrument.timed(times, "extract_image"):
+                fname = _save_raster(
+                    page.parent, xref, out_dir,
+                    f"chapter{chapter_idx:02d}_p{page_abs_index+1:04d}_image{image_counter:02d}",
+                    xref_cache,
+                )
+
         if diag_rect is None:
             continue
 
-        # 2) 렌더링
-        pix = page.get_pixmap(
-            matrix=fitz.Matrix(3, 3),
-            clip=diag_rect
-        )
-
-        diagram_counter += 1
-        fname = f"chapter{chapter_idx:02d}_p{page_abs_index+1:04d}_diagram{diagram_counter:02d}.png"
-        save_path = os.path.join(out_dir, fname)
-        pix.save(save_path)
+        # 2) 렌더링 (벡터 도식, 또는 원본을 그대로 쓸 수 없는 이미지)
+        if fname is None:
+            with instrument.timed(times, "render"):
+                pix = page.get_pixmap(
+                    matrix=fitz.Matrix(zoom, zoom),
+                    clip=diag_rect
+                )
+
+            diagram_counter += 1
+            fname = f"chapter{chapter_idx:02d}_p{page_abs_index+1:04d}_diagram{diagram_counter:02d}.png"
+            save_path = os.path.join(out_dir, fname)
+            with instrument.timed(times, "encode"):
+                pix.save(save_path)
+            del pix
+            xref = 0
 
         # 3) caption 뒤 몇 개 텍스트를 local_text 로
         local_list = []
@@ -194,14 +370,17 @@ def _process_images(page, chapter_idx, page_abs_index, out_dir, text_blocks):
         if caption.startswith("표") or cap_low.startswith("table"):
             kind = "table"
 
-        images.append({
+        entry = {
             "file": fname,
             "page_number": page_abs_index + 1,
             "bbox": list(diag_rect),
             "caption": caption,
             "local_text": local_list,
             "kind": kind
-        })
+        }
+        if xref:
+            entry["xref"] = xref
+        images.append(entry)
 
     return images
 
@@ -209,28 +388,108 @@ def _process_images(page, chapter_idx, page_abs_index, out_dir, text_blocks):
 # ---------------------------------------------------------
 # 페이지 분석
 # ---------------------------------------------------------
-def extract_page_blocks(page, chapter_idx, page_abs_index, out_dir, domain="default"):
-    text_blocks, page_texts = _extract_text_blocks(page)
-    images = _process_images(page, chapter_idx, page_abs_index, out_dir, text_blocks)
+def extract_page_blocks(page, chapter_idx, page_abs_index, out_dir, domain="default", profiler=None,
+                        xref_cache=None, zoom=3):
+    times = {}
+    meta = {}
+    with profiling.page_scope(profiler, page_abs_index + 1):
+        with instrument.timed(times, "text_parse"):
+            text_blocks, page_texts = _extract_text_blocks(page)
+        images = _process_images(page, chapter_idx, page_abs_index, out_dir, text_blocks, times, meta,
+                                 xref_cache=xref_cache, zoom=zoom)
+
+    instrument.get_recorder().emit(
+        "page", chapter=chapter_idx, page=page_abs_index + 1, times=times, images=len(images),
+        drawings=meta["drawings"]
+    )
 
     return {
         "page_texts": page_texts,
+        "text_blocks": text_blocks,
+        "page_height": page.rect.height,
         "images": images,
-        "meta": {}
+        "meta": meta
     }
 
 
 # ---------------------------------------------------------
 # chapter.json 생성
 # ---------------------------------------------------------
-def extract_one_chapter(doc, chapter_info, out_root, domain="default"):
+def chapter_dir_name(chapter_info):
+    """챕터 출력 폴더 이름 (그룹 등은 chapter_info["dir_name"] 으로 지정)"""
+    return chapter_info.get("dir_name") or f"chapter_{chapter_info['index']:02d}"
+
+
+class _PageSpool:
+    """
+    memory_limit_mb 모드에서 페이지 결과를 JSONL 파일로 흘려 쓰고,
+    chapter.json 을 쓸 때 순서대로 다시 읽는다 (list 대신 사용).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, "w", encoding="utf-8")
+
+    def append(self, page):
+        self._f.write(json.dumps(page, ensure_ascii=False) + "\n")
+
+    def __iter__(self):
+        self._f.close()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        self._f.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _dump_json_streaming(f, data, key, items):
+    """
+    json.dump(data, f, ensure_ascii=False, indent=2) 와 같은 내용을 쓰되,
+    data[key] 배열은 items 에서 하나씩 받아 써서 배열 전체를 메모리에 만들지 않는다.
+    """
+    def dumps(value, depth):
+        return json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n" + "  " * depth)
+
+    f.write("{")
+    for n, (k, v) in enumerate(data.items()):
+        f.write(",\n  " if n else "\n  ")
+        f.write(json.dumps(k, ensure_ascii=False) + ": ")
+        if k != key:
+            f.write(dumps(v, 1))
+            continue
+        empty = True
+        f.write("[")
+        for item in items:
+            f.write("\n    " if empty else ",\n    ")
+            f.write(dumps(item, 2))
+            empty = False
+        f.write("]" if empty else "\n  ]")
+    f.write("\n}" if data else "}")
+
+
+def extract_one_chapter(doc, chapter_info, out_root, domain="default", strip_boilerplate=True,
+                        ocr=False, ocr_workers=None, figure_store_dir=None, profile=None,
+                        memory_limit_mb=None):
+    """
+    memory_limit_mb 를 주면 메모리 제한 모드로 동작한다:
+    페이지 결과를 디스크(_pages.spool.jsonl)에 흘려 쓰고 chapter.json 도 페이지 단위로 쓰며,
+    RSS 가 한도에 가까워지면 MuPDF 캐시를 비우고 렌더링 배율과 OCR worker 수를 낮춘다.
+    """
     idx = chapter_info["index"]
     start = chapter_info["start"]
     end = chapter_info["end"]
     title = chapter_info["title"]
 
-    save_dir = os.path.join(out_root, f"chapter_{idx:02d}")
+    save_dir = os.path.join(out_root, chapter_dir_name(chapter_info))
     os.makedirs(save_dir, exist_ok=True)
+    t_start = time.perf_counter()
+    times = {}
+    # profile="sampled"/"deterministic" (또는 LECTURENOTE_PROFILE) 일 때만 페이지 프로파일링
+    profiler = profiling.make_profiler(profile)
+    guard = memory_guard.MemoryGuard(memory_limit_mb) if memory_limit_mb else None
 
     chapter_data = {
         "chapter_index": idx,
@@ -245,24 +504,210 @@ def extract_one_chapter(doc, chapter_info, out_root, domain="default"):
 
     all_images = []
     all_meta = []
+    # 페이지별 {"page_number", "blocks", "height"} (메모리 제한 모드에서는 디스크에)
+    pages = _PageSpool(os.path.join(save_dir, "_pages.spool.jsonl")) if guard else []
+    # 반복 블록 판별용: 페이지별 여백 블록 key 만 메모리에 둔다
+    margin_keys = []
+    ocr_targets = []
+    ocr_results = {}
+    xref_cache = {}  # 여러 페이지에 반복되는 삽입 이미지는 한 번만 저장
+    page_texts = []  # book page store 용 (0-based 페이지, chapter.json 과 같은 최종 텍스트)
+
+    try:
+        for p in range(start, end + 1):
+            zoom = memory_guard.DEFAULT_ZOOM
+            if guard:
+                guard.check()
+                zoom = guard.zoom
+
+            page = doc.load_page(p)
+            result = extract_page_blocks(page, idx, p, save_dir, domain, profiler=profiler,
+                                         xref_cache=xref_cache, zoom=zoom)
+
+            # 스캔/깨진 텍스트 페이지 판별 (OCR 은 이 페이지들에만 적용)
+            page_class = ocr_fallback.classify_page(page, result["page_texts"])
+            result["meta"]["page_class"] = page_class
+            if ocr and ocr_fallback.needs_ocr(page_class):
+                ocr_targets.append(p)
+            if guard and zoom != memory_guard.DEFAULT_ZOOM:
+                result["meta"]["zoom"] = zoom
+            del page
+
+            blocks = [{"text": b["text"], "bbox": b["bbox"], "mono": b.get("mono", False)}
+                      for b in result["text_blocks"]]
+            pages.append({"page_number": p + 1, "blocks": blocks, "height": result["page_height"]})
+            margin_keys.append([k for k in boilerplate.page_keys(blocks, result["page_height"]) if k])
+
+            all_images.extend(result["images"])
+            all_meta.append({
+                "page_number": p + 1,
+                "meta": result.get("meta", {})
+            })
 
-    for p in range(start, end + 1):
-        page = doc.load_page(p)
-        result = extract_page_blocks(page, idx, p, save_dir, domain)
+        # OCR fallback: 대상 페이지의 텍스트 블록을 OCR 결과로 교체
+        if ocr_targets:
+            workers = guard.ocr_workers(ocr_workers) if guard else ocr_workers
+            with instrument.timed(times, "ocr"):
+                ocr_results = ocr_fallback.run_ocr(
+                    doc.name, ocr_targets, os.path.join(out_root, "_ocr_cache"), workers=workers
+                )
+            for p, blocks in ocr_results.items():
+                i = p - start
+                all_meta[i]["meta"]["ocr"] = True
+                height = doc.load_page(p).rect.height
+                margin_keys[i] = [k for k in boilerplate.page_keys(blocks, height) if k]
+            chapter_data["meta"]["ocr_pages"] = [p + 1 for p in sorted(ocr_results)]
+
+        # 머리말/꼬리말/쪽 번호 등 반복 블록 (여기서는 key 만 찾고, 제거는 페이지를 쓸 때)
+        running = boilerplate.find_running_keys(margin_keys) if strip_boilerplate else None
+        totals = boilerplate.new_totals()
+        if running is not None:
+            chapter_data["meta"]["boilerplate"] = None  # 페이지를 다 쓴 뒤 채움
+
+        def page_entries():
+            for page in pages:
+                blocks = ocr_results.get(page["page_number"] - 1, page["blocks"])
+                entry = {"page_number": page["page_number"]}
+                if running is None:
+                    entry["text_blocks"] = [b["text"] for b in blocks]
+                else:
+                    keys = boilerplate.page_keys(blocks, page["height"])
+                    entry["text_blocks"], removed = boilerplate.split_page(blocks, keys, running, totals)
+                    if removed:
+                        entry["boilerplate"] = removed
+                # 모노스페이스 글꼴 블록 (text_blocks 안의 번호)
+                mono = {b["text"] for b in blocks if b.get("mono")}
+                code = [i for i, t in enumerate(entry["text_blocks"]) if t in mono]
+                if code:
+                    entry["code_blocks"] = code
+                page_texts.append((page["page_number"] - 1, "\n".join(entry["text_blocks"])))
+                yield entry
+            if running is not None:
+                chapter_data["meta"]["boilerplate"] = boilerplate.make_report(totals, running)
+
+        # 중복/유사 그림을 공유 store 파일로 합치기
+        if figure_store_dir and all_images:
+            with instrument.timed(times, "figure_dedupe"):
+                chapter_data["meta"]["figure_dedupe"] = figure_store.dedupe_images(all_images, save_dir, figure_store_dir)
+
+        if profiler is not None:
+            report = profiler.write(os.path.join(save_dir, "_profile"))
+            chapter_data["meta"]["profile_outliers"] = [o["page_number"] for o in report["outliers"]]
+
+        chapter_data["images"] = all_images
+        chapter_data["meta"]["pages"] = all_meta
+        chapter_data["meta"]["drawing_analysis"] = {
+            "pages": len(all_meta),
+            "skipped": sum(1 for m in all_meta if m["meta"].get("drawings") == "skipped"),
+        }
+
+        out_path = os.path.join(save_dir, "chapter.json")
+        with instrument.timed(times, "write_json"):
+            if guard:
+                chapter_data["meta"]["memory"] = guard.report()
+                # "meta" 는 "pages" 뒤에 쓰이므로 boilerplate 통계가 채워진 다음에 기록된다
+                with open(out_path, "w", encoding="utf-8") as f:
+                    _dump_json_streaming(f, chapter_data, "pages", page_entries())
+            else:
+                chapter_data["pages"] = list(page_entries())
+                with open(out_path, "w", encoding="utf-8") as f:
+                    json.dump(chapter_data, f, ensure_ascii=False, indent=2)
+
+        # 책 단위 page store 에 이 챕터 페이지만 기록 (OCR 보정·반복 블록 제거 후 텍스트)
+        with instrument.timed(times, "page_store"):
+            page_store.write_pages(out_root, doc, page_texts)
+    finally:
+        if guard:
+            pages.close()
+
+    times["pages"] = time.perf_counter() - t_start - sum(times.values())
+    instrument.get_recorder().emit(
+        "chapter", stage="extract", chapter=idx, pages=end - start + 1,
+        images=len(all_images), times=times,
+    )
 
-        chapter_data["pages"].append({
-            "page_number": p + 1,
-            "text_blocks": result["page_texts"]
-        })
+    return out_path
 
-        all_images.extend(result["images"])
-        all_meta.append({
-            "page_number": p + 1,
-            "meta": result.get("meta", {})
-        })
 
-    chapter_data["images"] = all_images
-    chapter_data["meta"]["pages"] = all_meta
+# ---------------------------------------------------------
+# 이미 추출된 챕터들로 새 챕터(그룹) 구성 - PDF 재추출 없음
+# ---------------------------------------------------------
+def _rebase_file(file, src_dir, dst_dir):
+    """src_dir 기준 상대 경로를 dst_dir 기준 상대 경로로 바꾼다 (HTML src 로 쓰이므로 '/' 사용)"""
+    path = os.path.join(src_dir, file)
+    return os.path.relpath(path, dst_dir).replace(os.sep, "/")
+
+
+def compose_chapter(chapter_info, source_dirs, out_root, domain="default"):
+    """
+    source_dirs 의 chapter.json 에 있는 페이지 결과(텍스트/그림/메타)를 모아
+    chapter_info 의 start~end 범위 chapter.json 을 만든다.
+    그림 파일은 다시 렌더링하지 않고 원래 파일을 상대 경로로 참조한다.
+
+    범위의 페이지가 하나라도 source 에 없으면 None 을 반환한다 (→ 일반 추출 필요).
+    """
+    idx = chapter_info["index"]
+    start = chapter_info["start"]
+    end = chapter_info["end"]
+    title = chapter_info["title"]
+
+    save_dir = os.path.join(out_root, chapter_dir_name(chapter_info))
+
+    pages = {}
+    images = {}
+    metas = {}
+    sources = []
+
+    for src_dir in source_dirs:
+        path = os.path.join(src_dir, "chapter.json")
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            src = json.load(f)
+
+        src_images = {}
+        for img in src.get("images", []):
+            src_images.setdefault(img.get("page_number"), []).append(img)
+        src_metas = {m.get("page_number"): m.get("meta", {}) for m in src.get("meta", {}).get("pages", [])}
+
+        used = False
+        for pg in src.get("pages", []):
+            n = pg.get("page_number")
+            # 겹치는 TOC 범위는 먼저 나온 source 의 결과를 사용
+            if n in pages or not (start + 1 <= n <= end + 1):
+                continue
+            pages[n] = pg
+            metas[n] = src_metas.get(n, {})
+            rebased = []
+            for img in src_images.get(n, []):
+                img = dict(img)
+                img["file"] = _rebase_file(img["file"], src_dir, save_dir)
+                rebased.append(img)
+            images[n] = rebased
+            used = True
+
+        if used:
+            sources.append(os.path.relpath(src_dir, out_root).replace(os.sep, "/"))
+
+    if len(pages) != end - start + 1:
+        return None
+
+    os.makedirs(save_dir, exist_ok=True)
+
+    numbers = range(start + 1, end + 2)
+    chapter_data = {
+        "chapter_index": idx,
+        "title": title,
+        "start_page": start + 1,
+        "end_page": end + 1,
+        "domain": domain,
+        "pages": [pages[n] for n in numbers],
+        "images": [img for n in numbers for img in images[n]],
+        "meta": {
+            "pages": [{"page_number": n, "meta": metas[n]} for n in numbers],
+            "composed_from": sources,
+        }
+    }
 
     out_path = os.path.join(save_dir, "chapter.json")
     with open(out_path, "w", encoding="utf-8") as f:
@@ -0,0 +1,173 @@
+# figure_store.py
+# -*- coding: utf-8 -*-
+"""
+Content-addressed figure store
+
+같은 로고, 반복되는 도식, 겹치는 TOC 범위에서 다시 렌더링된 그림들은
+파일 이름만 다를 뿐 (거의) 같은 이미지다. perceptual hash(pHash) 가
+가까운 그림은 하나의 파일로 모으고 images[].file 이 공유 파일을 가리키게 한다.
+
+  <store>/index.json        pHash → 파일 정보
+  <store>/<phash>.<ext>     공유 그림 파일
+
+store 는 여러 챕터/책이 같이 쓸 수 있다 (기본: <output>/_figures).
+여러 프로세스가 동시에 추출할 때는 dedupe_images 가 <store>/.lock 으로 index 갱신을 직렬화한다.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+from contextlib import contextmanager
+
+import imagehash
+from PIL import Image
+
+DEFAULT_MAX_DISTANCE = 4     # pHash(64bit) hamming 거리
+MAX_ASPECT_DIFF = 0.1        # 비율이 다른 그림은 pHash 가 가까워도 합치지 않는다
+LOCK_FILE = ".lock"
+LOCK_STALE_SEC = 600         # 이보다 오래된 lock 파일은 죽은 프로세스가 남긴 것으로 본다
+
+
+@contextmanager
+def locked(root: str):
+    """store 의 index.json 읽기~저장 구간을 프로세스 간 직렬화 (O_EXCL lock 파일, Windows/Linux 공통)"""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, LOCK_FILE)
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > LOCK_STALE_SEC:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue  # 그 사이 풀렸음
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield
+    finally:
+        os.remove(path)
+
+
+class FigureStore:
+    def __init__(self, root: str, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.root = root
+        self.max_distance = max_distance
+        os.makedirs(root, exist_ok=True)
+
+        self._index_path = os.path.join(root, "index.json")
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                self.figures = json.load(f).get("figures", {})
+        except (OSError, ValueError):
+            self.figures = {}
+        # 키는 pHash 16진수 (shard merge 에서 내용이 다른 같은 pHash 는 "<phash>-<sha 8자리>")
+        self._hashes = [(int(h.split("-")[0], 16), h) for h in self.figures]
+
+    def save(self):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"figures": self.figures}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self._index_path)
+
+    def _find(self, value: int, size):
+        w, h = size
+        best = None
+        for other, key in self._hashes:
+            dist = (value ^ other).bit_count()
+            if dist > self.max_distance:
+                continue
+            ow, oh = self.figures[key]["size"]
+            if abs(w / h - ow / oh) > MAX_ASPECT_DIFF * (ow / oh):
+                continue
+            if best is None or dist < best[0]:
+                best = (dist, key)
+        return best[1] if best else None
+
+    def _new_key(self, phash: str, path: str) -> str:
+        """
+        매칭되지 않은 그림의 키. pHash 가 이미 다른 그림(비율이 다르거나 가깝기만 한 그림)의 키이면
+        shard merge 와 같은 "<phash>-<sha 8자리>" 키를 쓴다 (기존 파일을 덮어쓰지 않게).
+        """
+        if phash not in self.figures:
+            return phash
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return f"{phash}-{digest.hexdigest()[:8]}"
+
+    def add(self, path: str):
+        """
+        그림 파일을 store 에 넣고 (store 안 파일 경로, phash) 를 반환.
+        이미 비슷한 그림이 있으면 그 파일을 재사용한다. 원본 파일은 지우지 않는다.
+        기존 파일 내용은 매칭된 그림의 pHash 가 똑같을 때만 (더 큰 해상도로) 바뀐다.
+        """
+        with Image.open(path) as im:
+            size = im.size
+            h = imagehash.phash(im)
+        value = int(str(h), 16)
+
+        key = self._find(value, size)
+        ext = os.path.splitext(path)[1].lower() or ".png"
+        larger = key is not None and size[0] * size[1] > self.figures[key]["size"][0] * self.figures[key]["size"][1]
+        if larger and key != str(h):
+            # pHash 가 가깝기만 한 더 큰 그림: 다른 챕터/책이 보는 기존 파일은 그대로 두고 따로 저장
+            key = None
+        if key is None:
+            key = self._new_key(str(h), path)
+            if key not in self.figures:
+                self.figures[key] = {"file": f"{key}{ext}", "size": list(size), "refs": 0}
+                self._hashes.append((value, key))
+                shutil.copyfile(path, os.path.join(self.root, self.figures[key]["file"]))
+        elif larger and os.path.splitext(self.figures[key]["file"])[1] == ext:
+            # pHash 가 똑같은 같은 형식의 더 큰 해상도 사본이면 대표 파일 내용을 교체 (파일 이름은 유지)
+            self.figures[key]["size"] = list(size)
+            shutil.copyfile(path, os.path.join(self.root, self.figures[key]["file"]))
+
+        self.figures[key]["refs"] += 1
+        return os.path.join(self.root, self.figures[key]["file"]), key
+
+
+def dedupe_images(images, chapter_dir, store_root, max_distance=DEFAULT_MAX_DISTANCE):
+    """
+    images(chapter.json 의 images 목록)의 파일을 store 로 옮기고
+    file 을 chapter_dir 기준 공유 파일 상대 경로로 바꾼다 (제자리 수정).
+    반환: {"figures": 전체 그림 수, "shared": 기존 그림과 합쳐진 수, "bytes_saved": 절감 바이트}
+    """
+    with locked(store_root):
+        store = FigureStore(store_root, max_distance=max_distance)
+        stats = {"figures": 0, "shared": 0, "bytes_saved": 0}
+        known = set(store.figures)
+        moved = {}  # 같은 파일을 가리키는 그림(반복되는 삽입 이미지)은 한 번만 옮긴다
+
+        for img in images:
+            src = os.path.join(chapter_dir, img["file"])
+            # 이미 다른 폴더(공유 store, 다른 챕터)를 가리키는 그림은 건너뜀
+            if os.path.dirname(os.path.abspath(src)) != os.path.abspath(chapter_dir):
+                continue
+            if src in moved:
+                img["file"], img["phash"] = moved[src]
+                continue
+            if not os.path.exists(src):
+                continue
+
+            stored, key = store.add(src)
+            stats["figures"] += 1
+            if key in known:
+                stats["shared"] += 1
+                stats["bytes_saved"] += os.path.getsize(src)
+            known.add(key)
+
+            os.remove(src)
+            img["file"] = os.path.relpath(stored, chapter_dir).replace(os.sep, "/")
+            img["phash"] = key
+            moved[src] = (img["file"], key)
+
+        store.save()
+    return stats
@@ -0,0 +1,85 @@
+# generation.py
+# -*- coding: utf-8 -*-
+"""
+Chapter generation runners
+
+추출이 끝난 챕터 폴더 하나에 쉬운 해설서(easy_explanation.html)나 퀴즈(quiz.html)를 만들어 저장한다.
+job_service(HTTP 작업), watch_folder(감시 폴더), shard_plan(shard 실행)이 같은 함수를 쓴다.
+
+  result = generation.run_explain("job-1a2b", out_root, "chapter_03", options)
+  result = generation.RUNNERS["quiz"]("watch-quiz-chapter_03", out_root, "chapter_03", options)
+
+options 는 DEFAULT_OPTIONS[종류] 를 채운 dict. 실행마다 <out_root>/_runs/ 에 run 기록을 남긴다.
+"""
+import os
+import json
+
+import scripts.instrument as instrument
+
+# 작업 종류별 옵션 기본값 (job_service 의 dedupe 키에 들어가므로 빠진 옵션은 기본값으로 채운다)
+DEFAULT_OPTIONS = {
+    "explain": {"domain": "default", "use_images": "include", "diagram_only": False, "user_instruction": "",
+                "condense_ratio": None, "structured": True},
+    "quiz": {"domain": "default", "num_questions": 6, "condense_ratio": None},
+}
+
+
+def run_summary():
+    """instrument.finish_run() 의 요약 중 작업 결과에 남길 부분 (run 이 없으면 None)"""
+    s = instrument.finish_run()
+    return {"run_id": s["run_id"], "elapsed_sec": s["elapsed_sec"], "tokens": s["tokens"]} if s else None
+
+
+def run_explain(run_name, out_root, dir_name, options, force=False, progress=None, stop_flag=None):
+    """쉬운 해설서. fingerprint 가 같은 결과가 있으면 (force 가 아니면) LLM 호출 없이 건너뛴다."""
+    import scripts.easy_explanation_pipeline as explanation_pipeline
+
+    chapter_dir = os.path.join(out_root, dir_name)
+    args = (chapter_dir, options["domain"], options["use_images"], options["diagram_only"],
+            options["user_instruction"], options["condense_ratio"], options["structured"])
+    fingerprint = explanation_pipeline.compute_fingerprint(*args)
+    if not force and explanation_pipeline.is_up_to_date(chapter_dir, fingerprint):
+        return {"skipped": True, "files": [os.path.join(chapter_dir, "easy_explanation.html")]}
+
+    instrument.start_run(os.path.join(out_root, "_runs"), run_name)
+    try:
+        html = explanation_pipeline.easy_explain_chapter(
+            chapter_dir, domain=options["domain"], use_images=options["use_images"],
+            diagram_only=options["diagram_only"], progress_callback=progress, stop_flag=stop_flag,
+            user_instruction=options["user_instruction"], condense_ratio=options["condense_ratio"],
+            structured=options["structured"],
+        )
+    finally:
+        run = run_summary()
+    if stop_flag and stop_flag():
+        raise RuntimeError("취소됨")
+    out_path = explanation_pipeline.save_explanation(chapter_dir, html, fingerprint)
+    return {"skipped": False, "run": run, "files": [out_path]}
+
+
+def run_quiz(run_name, out_root, dir_name, options, force=False, progress=None, stop_flag=None):
+    """퀴즈. 본문은 책 page store 에서 챕터(그룹) 범위로 읽는다."""
+    import scripts.page_store as page_store
+    import scripts.quiz_pipeline as quiz_pipeline
+
+    chapter_dir = os.path.join(out_root, dir_name)
+    with open(os.path.join(chapter_dir, "chapter.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    # 본문은 책 page store 에서 start~end 범위로 (그룹도 같은 방법), 없으면 chapter.json 에서
+    text = page_store.range_text_or_none(out_root, data["start_page"] - 1, data["end_page"] - 1)
+    if text is None:
+        text = "\n".join(t for p in data.get("pages", []) for t in p.get("text_blocks", []))
+    captions = [img.get("caption") for img in data.get("images", []) if img.get("caption")]
+
+    instrument.start_run(os.path.join(out_root, "_runs"), run_name)
+    try:
+        html = quiz_pipeline.generate_quiz(
+            chapter_dir, domain=options["domain"], chapter_text=text, images=captions,
+            num_questions=options["num_questions"], condense_ratio=options["condense_ratio"],
+        )
+    finally:
+        run = run_summary()
+    return {"run": run, "files": [quiz_pipeline.save_quiz(chapter_dir, html)]}
+
+
+RUNNERS = {"explain": run_explain, "quiz": run_quiz}
@@ -1,23 +1,57 @@
 # gui_extract.py
 # -*- coding: utf-8 -*-
+import time
+
+_T0 = time.perf_counter()  # time-to-first-window 측정 기준
+
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import customtkinter as ctk
 import threading
+import importlib
 import os
+import json
 import webbrowser
-import fitz
 import sys
 
 # Add the project root directory to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import scripts.extract_chapter as extract_chapter
-import scripts.easy_explanation_pipeline as explanation_pipeline
+import scripts.instrument as instrument
+from scripts.toc_view import TocListView
+from scripts.ui_bridge import UiBridge
 
 ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
 ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
 
+
+# ---------------------------------------------------------
+# 무거운 모듈(PyMuPDF, 추출/해설 파이프라인)은 처음 쓸 때 import
+# ---------------------------------------------------------
+HEAVY_MODULES = (
+    "fitz",
+    "scripts.extract_chapter",
+    "scripts.thumbnails",
+    "scripts.easy_explanation_pipeline",
+)
+
+_modules = {}
+_modules_lock = threading.Lock()
+
+UI_DRAIN_MS = 50        # worker 메시지 반영 주기
+PREVIEW_BATCH = 8       # 미리보기 썸네일을 한 번에 렌더링할 페이지 수
+MAX_LOG_LINES = 2000    # 로그 창에 남길 최대 줄 수
+
+
+def _lazy(name):
+    mod = _modules.get(name)
+    if mod is None:
+        with _modules_lock:
+            mod = _modules.get(name) or importlib.import_module(name)
+            _modules[name] = mod
+    return mod
+
+
 class FullGUI(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -85,6 +119,29 @@ class FullGUI(ctk.CTk):
         self.diagram_only.set("off")
         self.diagram_only.grid(row=0, column=9, padx=5, pady=5)
 
+        ctk.CTkLabel(opt, text="OCR 보정:").grid(row=0, column=10, padx=5, pady=5)
+        self.ocr_mode = ctk.CTkComboBox(opt, values=["off", "auto"], width=80)
+        self.ocr_mode.set("off")
+        self.ocr_mode.grid(row=0, column=11, padx=5, pady=5)
+
+        # 아주 큰 PDF 용: 페이지 결과를 디스크로 흘려 쓰고 한도 근처에서 렌더링 배율을 낮춤
+        ctk.CTkLabel(opt, text="메모리 한도(MB):").grid(row=0, column=12, padx=5, pady=5)
+        self.memory_limit = ctk.CTkComboBox(opt, values=["off", "1024", "2048", "4096"], width=80)
+        self.memory_limit.set("off")
+        self.memory_limit.grid(row=0, column=13, padx=5, pady=5)
+
+        # LLM 호출 전 본문을 TextRank 로 줄일 비율 (off = 원문 그대로)
+        ctk.CTkLabel(opt, text="본문 압축:").grid(row=0, column=14, padx=5, pady=5)
+        self.condense_ratio = ctk.CTkComboBox(opt, values=["off", "0.7", "0.5", "0.3"], width=70)
+        self.condense_ratio.set("off")
+        self.condense_ratio.grid(row=0, column=15, padx=5, pady=5)
+
+        # 해설서를 JSON schema 구조화 출력으로 받을지 (off = 예전 HTML 응답 + 정규식 파싱)
+        ctk.CTkLabel(opt, text="구조화 출력:").grid(row=0, column=16, padx=5, pady=5)
+        self.structured_output = ctk.CTkComboBox(opt, values=["on", "off"], width=60)
+        self.structured_output.set("on")
+        self.structured_output.grid(row=0, column=17, padx=5, pady=5)
+
         # -------------------------------
         # 사용자 요약 지시문 입력
         # -------------------------------
@@ -107,6 +164,10 @@ class FullGUI(ctk.CTk):
         ctk.CTkButton(group_opt, text="▶ 선택 항목으로 그룹 생성", command=self.create_group).pack(side="left", padx=10, pady=5)
         ctk.CTkButton(group_opt, text="선택 그룹 삭제", command=self.delete_group, fg_color="transparent", border_width=1).pack(side="left", padx=5, pady=5)
 
+        # 아무것도 선택하지 않았을 때 전체(그룹이 있으면 전체 그룹, 없으면 전체 목차)를 처리
+        self.process_all = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(group_opt, text="선택 없으면 전체 처리", variable=self.process_all).pack(side="right", padx=10, pady=5)
+
         # -------------------------------
         # TOC 리스트 (좌), 그룹 리스트(우)
         # -------------------------------
@@ -114,6 +175,7 @@ class FullGUI(ctk.CTk):
         list_frame.grid(row=4, column=0, padx=10, pady=5, sticky="nsew")
         list_frame.grid_columnconfigure(0, weight=1)
         list_frame.grid_columnconfigure(1, weight=1)
+        list_frame.grid_columnconfigure(2, weight=1)
         list_frame.grid_rowconfigure(0, weight=1)
 
         # ----- 원본 TOC -----
@@ -122,10 +184,10 @@ class FullGUI(ctk.CTk):
         
         ctk.CTkLabel(toc_frame, text="PDF 원본 목차(TOC)").pack(pady=2)
 
-        self.toc_scroll = ctk.CTkScrollableFrame(toc_frame, label_text="")
-        self.toc_scroll.pack(fill="both", expand=True, padx=5, pady=5)
+        # 보이는 줄만 그리는 목록 (선택 상태는 self.toc_view.selected)
+        self.toc_view = TocListView(toc_frame, on_select=self.preview_toc_item)
+        self.toc_view.pack(fill="both", expand=True, padx=5, pady=5)
 
-        self.toc_vars = {}
         self.toc_items = []  # [{index, title, start, end, level}, ...]
 
         # ----- 사용자 그룹 -----
@@ -140,10 +202,26 @@ class FullGUI(ctk.CTk):
         self.group_scroll.pack(fill="both", expand=True, padx=5, pady=5)
         
         self.group_widgets = [] # To keep track of group widgets for selection
-        self.selected_group_index = None
+        self.selected_groups = set()  # 선택된 그룹 위치(0-based)
 
         self.user_groups = []  # [{"group_index":1, "title":"...", "items":[3,4,5], "start":.., "end":..}]
 
+        # ----- 페이지 미리보기 -----
+        preview_frame = ctk.CTkFrame(list_frame)
+        preview_frame.grid(row=0, column=2, padx=5, pady=5, sticky="nsew")
+
+        self.preview_label = ctk.CTkLabel(preview_frame, text="페이지 미리보기")
+        self.preview_label.pack(pady=2)
+
+        self.preview_scroll = ctk.CTkScrollableFrame(preview_frame)
+        self.preview_scroll.pack(fill="both", expand=True, padx=5, pady=5)
+        self.preview_more = ctk.CTkButton(preview_frame, text="더 보기", command=self.preview_next_batch)
+
+        self.thumbs = None          # ThumbnailCache (PDF 별)
+        self.preview_pages = []     # 미리보기 대상 페이지(0-based) 전체
+        self.preview_shown = 0      # 렌더링 요청한 개수
+        self.preview_gen = 0        # 선택이 바뀌면 증가 → 이전 요청 결과 버림
+
         # -------------------------------
         # 작업 실행 버튼
         # -------------------------------
@@ -153,6 +231,11 @@ class FullGUI(ctk.CTk):
         ctk.CTkButton(btn_frame, text="선택 챕터 추출", command=self.start_extract, width=200).pack(side="left", padx=5)
         ctk.CTkButton(btn_frame, text="선택 챕터 쉬운 해설서 생성", command=self.start_summary, width=200).pack(side="left", padx=5)
         ctk.CTkButton(btn_frame, text="생성 중단", command=self.stop_summary, fg_color="darkred", width=100).pack(side="left", padx=5)
+        ctk.CTkButton(btn_frame, text="사이트 내보내기", command=self.start_site_export, width=120).pack(side="left", padx=5)
+
+        # 변경 없는 챕터도 다시 생성
+        self.force_regen = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(btn_frame, text="강제 재생성", variable=self.force_regen).pack(side="left", padx=10)
 
         # -------------------------------
         # 진행 상태
@@ -164,6 +247,42 @@ class FullGUI(ctk.CTk):
         self.log = ctk.CTkTextbox(self, height=150)
         self.log.grid(row=7, column=0, padx=10, pady=10, sticky="ew")
 
+        # worker thread 는 ui 에 메시지만 넣고, main loop 가 주기적으로 모아서 반영
+        self.ui = UiBridge()
+        self.after(UI_DRAIN_MS, self._drain_ui)
+
+        # 창이 처음 그려진 뒤 시작 시간 기록 + 무거운 모듈 미리 로드
+        self._startup_logged = False
+        self.bind("<Map>", self._on_first_map, add="+")
+
+    # -----------------------------------------------------
+    # 시작 시간 측정 / 백그라운드 모듈 로드
+    # -----------------------------------------------------
+    def _on_first_map(self, event=None):
+        if self._startup_logged:
+            return
+        self._startup_logged = True
+        elapsed = time.perf_counter() - _T0
+        self.log_write(f"[INFO] 창 표시까지 {elapsed:.2f}s")
+
+        if "--startup-time" in sys.argv:
+            print(f"time_to_first_window_sec={elapsed:.3f}")
+            self.after(0, self.destroy)
+            return
+
+        self.after(200, lambda: threading.Thread(target=self._warm_up, daemon=True).start())
+
+    def _warm_up(self):
+        t0 = time.perf_counter()
+        for name in HEAVY_MODULES:
+            try:
+                _lazy(name)
+            except Exception as e:
+                # 실제 사용 시점에 다시 시도하며 그때 오류가 드러난다
+                self.log_write(f"[WARN] {name} 로드 실패: {e}")
+                return
+        self.log_write(f"[INFO] 추출/해설 모듈 준비 완료 ({time.perf_counter() - t0:.2f}s)")
+
     # -----------------------------------------------------
     # PDF / 폴더
     # -----------------------------------------------------
@@ -185,34 +304,84 @@ class FullGUI(ctk.CTk):
         if not pdf:
             return messagebox.showerror("오류", "PDF 파일을 선택하세요.")
 
-        doc = fitz.open(pdf)
-        try:
-            self.toc_items = extract_chapter.get_toc_items(doc)
-        finally:
-            doc.close()
+        self.log_write(f"[INFO] 목차 불러오는 중: {os.path.basename(pdf)}")
+        threading.Thread(target=self.load_toc_worker, args=(pdf,), daemon=True).start()
 
-        # 기존 위젯 초기화
-        for w in self.toc_scroll.winfo_children():
-            w.destroy()
-        self.toc_vars = {}
+    def load_toc_worker(self, pdf):
+        # PDF 열기/TOC 파싱은 UI 스레드 밖에서
+        try:
+            fitz = _lazy("fitz")
+            extract_chapter = _lazy("scripts.extract_chapter")
+            doc = fitz.open(pdf)
+            try:
+                items = extract_chapter.get_toc_items(doc)
+            finally:
+                doc.close()
+        except Exception as e:
+            self.ui.call(messagebox.showerror, "오류", f"목차를 불러오지 못했습니다: {e}")
+            return
+        self.ui.call(self.on_toc_loaded, pdf, items)
+
+    def on_toc_loaded(self, pdf, items):
+        self.toc_items = items
+        self.toc_view.set_items(self.toc_items)
+
+        if self.thumbs is not None:
+            self.thumbs.close()
+        self.thumbs = _lazy("scripts.thumbnails").ThumbnailCache(pdf)
+        self.show_preview(None, [])
 
-        # 목록 다시 그리기
-        for item in self.toc_items:
-            idx = item["index"]
-            title = item["title"]
-            start = item["start"]
-            end = item["end"]
-            level = item["level"]
+        self.log_write(f"[INFO] 목차 항목 {len(self.toc_items)}개 불러옴")
 
-            indent = "    " * (level - 1)
-            text = f"{indent}[{idx:02d}] {title} (p {start+1}~{end+1})"
+    # -----------------------------------------------------
+    # 페이지 범위 미리보기 (썸네일은 필요할 때만 렌더링)
+    # -----------------------------------------------------
+    def preview_toc_item(self, item):
+        pages = list(range(item["start"], item["end"] + 1))
+        self.show_preview(f"[{item['index']:02d}] {item['title']}", pages)
 
-            var = ctk.BooleanVar()
-            chk = ctk.CTkCheckBox(self.toc_scroll, text=text, variable=var)
-            chk.pack(anchor="w", pady=2)
-            self.toc_vars[idx] = var
+    def show_preview(self, title, pages):
+        self.preview_gen += 1
+        for w in self.preview_scroll.winfo_children():
+            w.destroy()
+        self.preview_pages = pages
+        self.preview_shown = 0
+        if title:
+            self.preview_label.configure(text=f"미리보기: {title} ({len(pages)}쪽)")
+        else:
+            self.preview_label.configure(text="페이지 미리보기")
+        self.preview_next_batch()
+
+    def preview_next_batch(self):
+        if self.thumbs is None:
+            return
+        batch = self.preview_pages[self.preview_shown:self.preview_shown + PREVIEW_BATCH]
+        self.preview_shown += len(batch)
+        if self.preview_shown < len(self.preview_pages):
+            self.preview_more.pack(pady=(0, 5))
+        else:
+            self.preview_more.pack_forget()
+        if batch:
+            threading.Thread(
+                target=self.preview_worker, args=(self.thumbs, batch, self.preview_gen), daemon=True
+            ).start()
+
+    def preview_worker(self, thumbs, pages, gen):
+        for p in pages:
+            if gen != self.preview_gen:
+                return
+            try:
+                img = thumbs.get(p)
+            except Exception as e:
+                self.log_write(f"[WARN] 미리보기 실패 p{p+1}: {e}")
+                return
+            self.ui.call(self.add_thumbnail, gen, p, img)
 
-        self.log_write(f"[INFO] 목차 항목 {len(self.toc_items)}개 불러옴")
+    def add_thumbnail(self, gen, page_index, img):
+        if gen != self.preview_gen:
+            return
+        image = ctk.CTkImage(light_image=img, dark_image=img, size=img.size)
+        ctk.CTkLabel(self.preview_scroll, image=image, text=f"p {page_index+1}", compound="top").pack(pady=4)
 
     # -----------------------------------------------------
     # 그룹 생성
@@ -221,8 +390,7 @@ class FullGUI(ctk.CTk):
         if not self.group_mode.get():
             return messagebox.showwarning("주의", "먼저 '사용자 지정 그룹 모드'를 선택하세요.")
 
-        selected = [i for i, item in enumerate(self.toc_items, start=1)
-                    if self.toc_vars[i].get()]
+        selected = self.toc_view.selected_indices()
 
         if not selected:
             return messagebox.showwarning("주의", "그룹으로 묶을 항목을 선택하세요.")
@@ -249,9 +417,7 @@ class FullGUI(ctk.CTk):
         self.user_groups.append(group)
 
         # 그룹 생성 후 사용한 항목은 자동으로 선택 해제
-        for idx in selected:
-            if idx in self.toc_vars:
-                self.toc_vars[idx].set(False)
+        self.toc_view.deselect(selected)
 
         self.update_group_list()
         self.log_write(f"[그룹 생성] {title} (p {start+1}~{end+1})")
@@ -260,31 +426,34 @@ class FullGUI(ctk.CTk):
     # 그룹 삭제
     # -----------------------------------------------------
     def delete_group(self):
-        if self.selected_group_index is None:
+        if not self.selected_groups:
             return messagebox.showwarning("주의", "삭제할 그룹을 선택하세요.")
 
-        idx = self.selected_group_index
-        group = self.user_groups[idx]
-        del self.user_groups[idx]
-        self.selected_group_index = None
+        removed = [g for i, g in enumerate(self.user_groups) if i in self.selected_groups]
+        self.user_groups = [g for i, g in enumerate(self.user_groups) if i not in self.selected_groups]
+        self.selected_groups = set()
 
         # index 재정렬
         for i, g in enumerate(self.user_groups, start=1):
             g["group_index"] = i
 
         self.update_group_list()
-        self.log_write(f"[그룹 삭제] {group['title']}")
+        for group in removed:
+            self.log_write(f"[그룹 삭제] {group['title']}")
 
     # -----------------------------------------------------
     # 그룹 표시
     # -----------------------------------------------------
     def update_group_list(self):
-        for w in self.group_scroll.winfo_children():
-            w.destroy()
-        self.group_widgets = []
-        
+        # 기존 버튼은 재사용하고, 개수 차이만큼만 만들거나 지운다
+        while len(self.group_widgets) > len(self.user_groups):
+            self.group_widgets.pop().destroy()
+
         for i, g in enumerate(self.user_groups):
             txt = f"[그룹 {g['group_index']:02d}] {g['title']} (p {g['start']+1}~{g['end']+1})"
+            if i < len(self.group_widgets):
+                self.group_widgets[i].configure(text=txt, fg_color="transparent")
+                continue
             # Using Button to simulate listbox selection
             btn = ctk.CTkButton(self.group_scroll, text=txt, fg_color="transparent", border_width=1, 
                                 text_color=("gray10", "gray90"), anchor="w",
@@ -292,15 +461,63 @@ class FullGUI(ctk.CTk):
             btn.pack(fill="x", pady=2)
             self.group_widgets.append(btn)
 
+    @staticmethod
+    def group_dir_name(group):
+        # 그룹 폴더는 페이지 범위로 이름을 지어 TOC 항목의 chapter_XX 와 겹치지 않게 한다
+        return f"group_p{group['start']+1:04d}-{group['end']+1:04d}"
+
     def select_group(self, index):
-        self.selected_group_index = index
+        # 클릭할 때마다 선택/해제 (여러 그룹 선택 가능)
+        self.selected_groups ^= {index}
+        g = self.user_groups[index]
+        self.show_preview(f"그룹 {g['group_index']:02d} {g['title']}", list(range(g["start"], g["end"] + 1)))
         # Visual feedback
         for i, btn in enumerate(self.group_widgets):
-            if i == index:
+            if i in self.selected_groups:
                 btn.configure(fg_color=("gray75", "gray25"))
             else:
                 btn.configure(fg_color="transparent")
 
+    # -----------------------------------------------------
+    # 처리 대상 (선택된 목차 항목 + 선택된 그룹)
+    # -----------------------------------------------------
+    def selected_chapters(self):
+        """
+        선택된 TOC 항목과 그룹을 챕터 목록으로 반환. 취소하면 None.
+        폴더 이름은 선택과 무관하게 고정된다:
+          TOC 항목 → chapter_{TOC index}, 그룹 → group_p{start}-{end}
+        """
+        toc_by_index = {item["index"]: item for item in self.toc_items}
+        items = [toc_by_index[i] for i in self.toc_view.selected_indices() if i in toc_by_index]
+        groups = [g for i, g in enumerate(self.user_groups) if i in self.selected_groups]
+
+        if not items and not groups:
+            if not self.process_all.get():
+                if not messagebox.askyesno("확인", "선택된 항목이 없습니다. 전체를 처리할까요?"):
+                    return None
+            # 전체: 그룹이 있으면 그룹 기준, 없으면 TOC 항목 그대로
+            if self.user_groups:
+                groups = list(self.user_groups)
+            else:
+                items = list(self.toc_items)
+
+        chapters = [{
+            "index": item["index"],
+            "title": item["title"],
+            "start": item["start"],
+            "end": item["end"],
+            "dir_name": f"chapter_{item['index']:02d}",
+        } for item in items]
+        chapters += [{
+            "index": g["group_index"],
+            "title": g["title"],
+            "start": g["start"],
+            "end": g["end"],
+            "items": g["items"],
+            "dir_name": self.group_dir_name(g),
+        } for g in groups]
+        return chapters
+
     # -----------------------------------------------------
     # 추출 시작
     # -----------------------------------------------------
@@ -311,40 +528,94 @@ class FullGUI(ctk.CTk):
             return messagebox.showerror("오류", "PDF 파일과 출력 폴더를 확인하세요.")
 
         domain = self.domain_var.get() or "default"
-
-        # 그룹이 있으면 → 그룹 기준
-        if self.user_groups:
-            chapters = [{
-                "index": i + 1,
-                "title": g["title"],
-                "start": g["start"],
-                "end": g["end"]
-            } for i, g in enumerate(self.user_groups)]
+        ocr = (self.ocr_mode.get() == "auto")
+        limit = self.memory_limit.get().strip()
+        if limit in ("", "off"):
+            memory_limit_mb = None
+        elif limit.isdigit() and int(limit) > 0:
+            memory_limit_mb = int(limit)
         else:
-            # TOC 항목 그대로 챕터로 사용
-            chapters = [{
-                "index": i + 1,
-                "title": item["title"],
-                "start": item["start"],
-                "end": item["end"],
-            } for i, item in enumerate(self.toc_items)]
+            return messagebox.showerror("오류", "메모리 한도는 MB 단위 숫자 또는 off 로 입력하세요.")
+
+        chapters = self.selected_chapters()
+        if not chapters:
+            return
 
         threading.Thread(
-            target=self.extract_worker, args=(pdf, out, chapters, domain), daemon=True
+            target=self.extract_worker, args=(pdf, out, chapters, domain, ocr, memory_limit_mb), daemon=True
         ).start()
 
     # -----------------------------------------------------
     # 추출 worker
     # -----------------------------------------------------
-    def extract_worker(self, pdf, out, chapters, domain):
+    def extract_worker(self, pdf, out, chapters, domain, ocr=False, memory_limit_mb=None):
+        fitz = _lazy("fitz")
+        extract_chapter = _lazy("scripts.extract_chapter")
+
+        instrument.start_run(os.path.join(out, "_runs"), "extract")
         doc = fitz.open(pdf)
         for ch in chapters:
+            # 그룹은 이미 추출된 TOC 항목 결과로 먼저 구성해 본다
+            if ch.get("items"):
+                sources = [os.path.join(out, f"chapter_{i:02d}") for i in ch["items"]]
+                result = extract_chapter.compose_chapter(ch, sources, out, domain=domain)
+                if result:
+                    self.log_write(f"[그룹 구성] {ch['index']} - {ch['title']}")
+                    self.log_write(f"  → 저장됨: {result}")
+                    continue
             self.log_write(f"[추출] {ch['index']} - {ch['title']}")
-            result = extract_chapter.extract_one_chapter(doc, ch, out, domain=domain)
+            try:
+                result = extract_chapter.extract_one_chapter(
+                    doc, ch, out, domain=domain, ocr=ocr,
+                    figure_store_dir=os.path.join(out, "_figures"),
+                    memory_limit_mb=memory_limit_mb,
+                )
+            except RuntimeError as e:
+                self.log_write(f"  → 추출 실패: {e}")
+                continue
             self.log_write(f"  → 저장됨: {result}")
+            self.log_chapter_report(result)
         doc.close()
+
+        # 프롬프트용 본문 검색 색인 (바뀐 chapter.json 만 다시 색인)
+        text_index = _lazy("scripts.text_index")
+        with text_index.TextIndex(text_index.index_path(out)) as idx:
+            stats = idx.update_all(out)
+        self.log_write(
+            f"[검색 색인] 추가 {stats['added']}, 갱신 {stats['updated']}, "
+            f"유지 {stats['unchanged']}, 제거 {stats['removed']}"
+        )
+        self.log_run_summary()
         self.log_write("[완료] 챕터 추출 종료")
 
+    def log_chapter_report(self, chapter_json):
+        try:
+            with open(chapter_json, "r", encoding="utf-8") as f:
+                meta = json.load(f).get("meta", {})
+        except (OSError, ValueError):
+            return
+        if meta.get("ocr_pages"):
+            self.log_write(f"  → OCR 보정 페이지: {meta['ocr_pages']}")
+        memory = meta.get("memory")
+        if memory and (memory["zoom"] != 3 or memory["store_shrinks"]):
+            self.log_write(
+                f"  → 메모리 한도 {memory['limit_mb']} MB 근처: 렌더링 배율 {memory['zoom']}, "
+                f"캐시 비움 {memory['store_shrinks']}회 (최대 {memory['peak_rss_mb']} MB)"
+            )
+        dedupe = meta.get("figure_dedupe")
+        if dedupe and dedupe["shared"]:
+            self.log_write(
+                f"  → 중복 그림 {dedupe['shared']}/{dedupe['figures']}개 공유 파일로 합침 "
+                f"({dedupe['bytes_saved'] // 1024} KB 절감)"
+            )
+        report = meta.get("boilerplate")
+        if report and report["removed_blocks"]:
+            self.log_write(
+                f"  → 반복 머리말/꼬리말 {report['removed_blocks']}개 제거: "
+                f"{report['removed_chars']}자, 약 {report['est_tokens_saved']} 토큰 절감 "
+                f"({report['saved_ratio'] * 100:.1f}%)"
+            )
+
     # -----------------------------------------------------
     # 요약
     # -----------------------------------------------------
@@ -360,22 +631,22 @@ class FullGUI(ctk.CTk):
         use_images = self.use_images.get()
         domain = self.domain_var.get()
         diagram_only = (self.diagram_only.get() == "on")
+        ratio = self.condense_ratio.get().strip()
+        try:
+            condense_ratio = None if ratio in ("", "off") else float(ratio)
+        except ValueError:
+            condense_ratio = -1
+        if condense_ratio is not None and not 0 < condense_ratio <= 1:
+            return messagebox.showerror("오류", "본문 압축 비율은 0~1 사이 숫자 또는 off 로 입력하세요.")
+        structured = (self.structured_output.get() == "on")
+
+        chapters = self.selected_chapters()
+        if not chapters:
+            return
+        for ch in chapters:
+            ch["dir"] = os.path.join(out, ch["dir_name"])
 
-        # 그룹 우선
-        if self.user_groups:
-            chapters = [{
-                "index": i + 1,
-                "title": g["title"],
-                "dir": os.path.join(out, f"chapter_{i+1:02d}")
-            } for i, g in enumerate(self.user_groups)]
-        else:
-            chapters = [{
-                "index": i + 1,
-                "title": item["title"],
-                "dir": os.path.join(out, f"chapter_{i+1:02d}")
-            } for i, item in enumerate(self.toc_items)]
-
-        self.progress.set(0)
+        self.set_progress(0)
         self.stop_flag = False
 
         # 사용자 추가 요약 지시문 읽기
@@ -387,14 +658,19 @@ class FullGUI(ctk.CTk):
 
         threading.Thread(
             target=self.summary_worker,
-            args=(chapters, use_images, domain, diagram_only, custom_prompt),
+            args=(chapters, use_images, domain, diagram_only, custom_prompt, self.force_regen.get(), condense_ratio,
+                  structured),
             daemon=True,
         ).start()
 
     # -----------------------------------------------------
     # summary worker
     # -----------------------------------------------------
-    def summary_worker(self, chapters, use_images, domain, diagram_only, user_instruction):
+    def summary_worker(self, chapters, use_images, domain, diagram_only, user_instruction, force=False,
+                       condense_ratio=None, structured=True):
+        explanation_pipeline = _lazy("scripts.easy_explanation_pipeline")
+        if chapters:
+            instrument.start_run(os.path.join(os.path.dirname(chapters[0]["dir"]), "_runs"), "explain")
         total = len(chapters)
         for i, ch in enumerate(chapters):
             if self.stop_flag:
@@ -411,12 +687,21 @@ class FullGUI(ctk.CTk):
                 # current chapter base: i / total
                 # current chapter progress: v / total
                 global_p = (i + v) / total
-                self.progress.set(global_p)
+                self.set_progress(global_p)
 
             def stop_check():
                 return self.stop_flag
 
             try:
+                # 입력/옵션/모델/프롬프트가 그대로면 건너뜀
+                fingerprint = explanation_pipeline.compute_fingerprint(
+                    chap_dir, domain, use_images, diagram_only, user_instruction, condense_ratio, structured
+                )
+                if not force and explanation_pipeline.is_up_to_date(chap_dir, fingerprint):
+                    self.log_write("  → 변경 없음, 건너뜀")
+                    update_progress(1.0)
+                    continue
+
                 html = explanation_pipeline.easy_explain_chapter(
                     chap_dir,
                     domain=domain,
@@ -425,8 +710,13 @@ class FullGUI(ctk.CTk):
                     progress_callback=update_progress,
                     stop_flag=stop_check,
                     user_instruction=user_instruction,
+                    condense_ratio=condense_ratio,
+                    structured=structured,
                 )
-                out_path = explanation_pipeline.save_explanation(chap_dir, html)
+                if self.stop_flag:
+                    # 중단된 결과는 저장하지 않음 (이전 해설서와 fingerprint 유지)
+                    continue
+                out_path = explanation_pipeline.save_explanation(chap_dir, html, fingerprint)
                 self.log_write(f"  → 쉬운 해설서 저장: {out_path}")
                 try:
                     webbrowser.open(out_path)
@@ -435,15 +725,66 @@ class FullGUI(ctk.CTk):
             except Exception as e:
                 self.log_write(f"  → 쉬운 해설서 생성 실패: {e}")
 
-        self.progress.set(1.0)
+        self.set_progress(1.0)
+        self.log_run_summary()
         self.log_write("[완료] 요약 생성 종료")
 
+    # -----------------------------------------------------
+    # static site export
+    # -----------------------------------------------------
+    def start_site_export(self):
+        out = self.out_var.get()
+        if not out:
+            return messagebox.showerror("오류", "출력 폴더를 먼저 선택하세요.")
+        threading.Thread(target=self.site_export_worker, args=(out,), daemon=True).start()
+
+    def site_export_worker(self, out):
+        site_export = _lazy("scripts.site_export")
+        self.log_write("[사이트] 내보내는 중...")
+        try:
+            stats = site_export.export_site(out)
+        except Exception as e:
+            self.log_write(f"[사이트 오류] {e}")
+            return
+        self.log_write(site_export.format_stats(stats))
+        try:
+            webbrowser.open(stats["index"])
+        except Exception:
+            pass
+
+    def log_run_summary(self):
+        summary = instrument.finish_run()
+        if not summary:
+            return
+        for line in instrument.format_summary(summary):
+            self.log_write(line)
+
     # -----------------------------------------------------
     # 로그 출력
     # -----------------------------------------------------
     def log_write(self, msg):
-        self.log.insert("end", msg + "\n")
-        self.log.see("end")
+        # 어느 스레드에서 불러도 안전 (실제 출력은 _drain_ui 에서)
+        self.ui.log(msg)
+
+    def set_progress(self, value):
+        self.ui.progress(value)
+
+    def _drain_ui(self):
+        try:
+            logs, progress, calls = self.ui.drain()
+            if logs:
+                self.log.insert("end", "\n".join(logs) + "\n")
+                # 로그가 너무 길어지면 앞부분 삭제
+                lines = int(self.log.index("end-1c").split(".")[0])
+                if lines > MAX_LOG_LINES:
+                    self.log.delete("1.0", f"{lines - MAX_LOG_LINES + 1}.0")
+                self.log.see("end")
+            if progress is not None:
+                self.progress.set(progress)
+            for fn, args in calls:
+                fn(*args)
+        finally:
+            self.after(UI_DRAIN_MS, self._drain_ui)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+# instrument.py
+# -*- coding: utf-8 -*-
+"""
+Per-stage timing / resource instrumentation
+
+추출·생성 파이프라인의 단계별 시간과 토큰 사용량을 JSON lines 로 기록하고,
+실행이 끝나면 가장 느린 페이지/챕터와 전체 토큰 사용량을 요약한다.
+
+    rec = instrument.start_run(os.path.join(out, "_runs"), "extract")
+    ...                                   # 파이프라인 코드는 get_recorder().emit(...)
+    summary = instrument.finish_run()
+
+recorder 는 스레드별로 설정된다 (GUI 의 추출/요약 worker 가 각자 run 을 가진다).
+run 이 시작되지 않은 스레드에서는 모든 기록이 무시된다.
+
+레코드 종류:
+  page     {"chapter", "page", "times": {"text_parse", "get_drawings", "render", "encode"}, "images"}
+  chapter  {"stage": "extract" | "explain" | "quiz", "chapter", "times": {...}, "usage": {...}}
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+@contextmanager
+def timed(times, key):
+    """times[key] 에 경과 시간(초)을 더한다. times 가 None 이면 아무것도 하지 않는다."""
+    if times is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        times[key] = times.get(key, 0.0) + (time.perf_counter() - t0)
+
+
+def usage_dict(usage):
+    """OpenAI 응답의 res.usage → dict (없으면 빈 dict)"""
+    if usage is None:
+        return {}
+    out = {}
+    for k in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        v = getattr(usage, k, None)
+        if v is not None:
+            out[k] = v
+    return out
+
+
+def _rounded(times):
+    return {k: round(v, 5) for k, v in times.items()}
+
+
+class RunRecorder:
+    def __init__(self, run_dir: str, name: str = "run"):
+        os.makedirs(run_dir, exist_ok=True)
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}"
+        self.path = os.path.join(run_dir, f"{self.run_id}.jsonl")
+        self.summary_path = os.path.join(run_dir, f"{self.run_id}.summary.json")
+        self._f = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self.pages = []
+        self.chapters = []
+
+    def emit(self, kind: str, **fields):
+        if "times" in fields:
+            fields["times"] = _rounded(fields["times"])
+        rec = {"kind": kind, "t": round(time.perf_counter() - self._t0, 4)}
+        rec.update(fields)
+        with self._lock:
+            self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            if kind == "page":
+                self.pages.append(rec)
+            elif kind == "chapter":
+                self.chapters.append(rec)
+
+    def summary(self, top: int = 10) -> dict:
+        def total(r):
+            return sum(r.get("times", {}).values())
+
+        stage_totals = {}
+        for r in self.pages:
+            for k, v in r["times"].items():
+                stage_totals[k] = stage_totals.get(k, 0.0) + v
+
+        usage = {}
+        for r in self.chapters:
+            for k, v in r.get("usage", {}).items():
+                usage[k] = usage.get(k, 0) + v
+
+        condensed = [r for r in self.chapters if r.get("condense")]
+        chars_in = sum(r["condense"]["chars_in"] for r in condensed)
+        chars_out = sum(r["condense"]["chars_out"] for r in condensed)
+
+        return {
+            "run_id": self.run_id,
+            "elapsed_sec": round(time.perf_counter() - self._t0, 3),
+            "pages": len(self.pages),
+            "chapters": len(self.chapters),
+            "page_stage_totals": _rounded(stage_totals),
+            "slowest_pages": [
+                {"chapter": r.get("chapter"), "page": r.get("page"), "sec": round(total(r), 4), "times": r["times"]}
+                for r in sorted(self.pages, key=total, reverse=True)[:top]
+            ],
+            "slowest_chapters": [
+                {"stage": r.get("stage"), "chapter": r.get("chapter"), "sec": round(total(r), 4), "times": r["times"]}
+                for r in sorted(self.chapters, key=total, reverse=True)[:top]
+            ],
+            "tokens": usage,
+            "condense": {
+                "chars_in": chars_in,
+                "chars_out": chars_out,
+                "ratio": round(chars_out / chars_in, 4) if chars_in else None,
+                "chapters": [
+                    {"stage": r.get("stage"), "chapter": r.get("chapter"), "ratio": r["condense"]["ratio"]}
+                    for r in condensed
+                ],
+            } if condensed else None,
+        }
+
+    def close(self) -> dict:
+        s = self.summary()
+        self.emit("summary", **s)
+        with self._lock:
+            self._f.close()
+        with open(self.summary_path, "w", encoding="utf-8") as f:
+            json.dump(s, f, ensure_ascii=False, indent=2)
+        return s
+
+
+class _NullRecorder:
+    def emit(self, kind, **fields):
+        pass
+
+
+_NULL = _NullRecorder()
+_local = threading.local()
+
+
+def get_recorder():
+    return getattr(_local, "recorder", None) or _NULL
+
+
+def start_run(run_dir: str, name: str = "run") -> RunRecorder:
+    rec = RunRecorder(run_dir, name)
+    _local.recorder = rec
+    return rec
+
+
+def finish_run():
+    """현재 스레드의 run 을 닫고 요약 dict 를 반환 (run 이 없으면 None)"""
+    rec = getattr(_local, "recorder", None)
+    _local.recorder = None
+    return rec.close() if rec else None
+
+
+def format_summary(summary: dict, top: int = 3) -> list:
+    """GUI 로그용 요약 줄 목록"""
+    lines = [f"[실행 요약] {summary['elapsed_sec']}s, 페이지 {summary['pages']}개, 챕터 {summary['chapters']}개"]
+    if summary["page_stage_totals"]:
+        stages = ", ".join(f"{k} {v:.2f}s" for k, v in summary["page_stage_totals"].items())
+        lines.append(f"  단계별 합계: {stages}")
+    for r in summary["slowest_pages"][:top]:
+        lines.append(f"  느린 페이지: ch{r['chapter']} p{r['page']} {r['sec']:.3f}s")
+    for r in summary["slowest_chapters"][:top]:
+        lines.append(f"  느린 챕터: [{r['stage']}] {r['chapter']} {r['sec']:.2f}s")
+    if summary["tokens"]:
+        lines.append(f"  토큰 사용: {summary['tokens']}")
+    condensed = summary.get("condense")
+    if condensed:
+        per_chapter = ", ".join(f"{r['chapter']} {r['ratio']}" for r in condensed["chapters"])
+        lines.append(
+            f"  본문 압축: {condensed['chars_in']} → {condensed['chars_out']} chars "
+            f"(ratio {condensed['ratio']}; {per_chapter})"
+        )
+    return lines
@@ -0,0 +1,207 @@
+# job_client.py
+# -*- coding: utf-8 -*-
+"""
+Client for the local job service (scripts/job_service.py)
+
+표준 라이브러리(urllib)만 쓰므로 GUI 나 다른 스크립트가 가볍게 가져다 쓸 수 있다.
+
+  client = JobClient("http://127.0.0.1:8765")
+  book = client.add_book("D:/books/ds.pdf")               # 서비스와 같은 PC 의 경로
+  book = client.upload_book("ds.pdf")                     # 다른 PC 에서는 업로드
+  job = client.submit("explain", book["id"], chapter=3)   # 추출이 안 돼 있으면 서비스가 먼저 추출
+  job = client.wait(job["id"])
+  client.download(book["id"], "chapter_03/easy_explanation.html", "out.html")
+
+  python scripts/job_client.py add-book D:/books/ds.pdf
+  python scripts/job_client.py submit explain <book id> 3 5 7 --wait
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import urllib.error
+import urllib.request
+from urllib.parse import quote, urlencode
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobServiceError(RuntimeError):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class JobClient:
+    def __init__(self, base_url: str = DEFAULT_URL, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None, data=None, headers=None):
+        headers = dict(headers or {})
+        if body is not None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as res:
+                return json.loads(res.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode("utf-8")).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise JobServiceError(e.code, message) from None
+
+    # -----------------------------------------------------
+    # 책
+    # -----------------------------------------------------
+    def health(self):
+        return self._request("GET", "/health")
+
+    def books(self):
+        return self._request("GET", "/books")
+
+    def book(self, book_id):
+        return self._request("GET", f"/books/{book_id}")
+
+    def add_book(self, pdf_path: str):
+        """서비스가 읽을 수 있는 경로로 등록 (같은 PC)"""
+        return self._request("POST", "/books", body={"path": os.path.abspath(pdf_path)})
+
+    def upload_book(self, pdf_path: str):
+        """PDF 파일을 업로드해서 등록 (파일을 통째로 메모리에 올리지 않고 스트리밍)"""
+        size = os.path.getsize(pdf_path)
+        name = quote(os.path.basename(pdf_path))
+        with open(pdf_path, "rb") as f:
+            return self._request(
+                "POST", f"/books?name={name}", data=f,
+                headers={"Content-Type": "application/pdf", "Content-Length": str(size)},
+            )
+
+    # -----------------------------------------------------
+    # 작업
+    # -----------------------------------------------------
+    def submit(self, job_type, book_id, chapter=None, chapters=None, options=None, force=False):
+        """chapter: TOC index 또는 {"items": [...], "title": ...}. chapters 를 주면 작업 목록을 반환."""
+        body = {"type": job_type, "book": book_id, "options": options or {}, "force": force}
+        if chapters is not None:
+            body["chapters"] = list(chapters)
+        else:
+            body["chapter"] = chapter
+        return self._request("POST", "/jobs", body=body)
+
+    def job(self, job_id):
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def jobs(self, book=None, status=None, job_type=None):
+        query = urlencode({k: v for k, v in (("book", book), ("status", status), ("type", job_type)) if v})
+        return self._request("GET", "/jobs" + (f"?{query}" if query else ""))
+
+    def artifacts(self, job_id):
+        return self._request("GET", f"/jobs/{job_id}/artifacts")
+
+    def cancel(self, job_id):
+        return self._request("DELETE", f"/jobs/{job_id}")
+
+    def wait(self, job_id, poll: float = 1.0, timeout: float = None, on_update=None):
+        """작업이 끝날 때까지 poll 초마다 확인. on_update(job) 는 상태가 바뀔 때마다 호출."""
+        t0 = time.monotonic()
+        last = None
+        while True:
+            job = self.job(job_id)
+            state = (job["status"], job["progress"])
+            if on_update and state != last:
+                on_update(job)
+            last = state
+            if job["status"] in FINISHED:
+                return job
+            if timeout is not None and time.monotonic() - t0 > timeout:
+                raise TimeoutError(f"작업이 {timeout}s 안에 끝나지 않았습니다: {job_id}")
+            time.sleep(poll)
+
+    def download(self, book_id, rel_path: str, dest: str):
+        url = f"{self.base_url}/books/{book_id}/files/{quote(rel_path)}"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as res, open(dest, "wb") as f:
+                while True:
+                    chunk = res.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+        except urllib.error.HTTPError as e:
+            raise JobServiceError(e.code, e.reason) from None
+        return dest
+
+
+# ---------------------------------------------------------
+# CLI
+# ---------------------------------------------------------
+def _print(obj):
+    print(json.dumps(obj, ensure_ascii=False, indent=2))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="로컬 작업 서비스 클라이언트")
+    ap.add_argument("--url", default=DEFAULT_URL)
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("add-book", help="PDF 등록 (경로, --upload 면 업로드)")
+    b.add_argument("pdf")
+    b.add_argument("--upload", action="store_true")
+
+    t = sub.add_parser("toc", help="책 TOC 출력")
+    t.add_argument("book")
+
+    s = sub.add_parser("submit", help="작업 제출")
+    s.add_argument("type", choices=["extract", "explain", "quiz"])
+    s.add_argument("book")
+    s.add_argument("chapters", nargs="+", type=int, help="TOC index")
+    s.add_argument("--options", default="{}", help='JSON, 예: {"domain": "it"}')
+    s.add_argument("--force", action="store_true")
+    s.add_argument("--wait", action="store_true", help="끝날 때까지 기다림")
+
+    j = sub.add_parser("jobs", help="작업 목록")
+    j.add_argument("--book")
+    j.add_argument("--status")
+
+    w = sub.add_parser("wait", help="작업이 끝날 때까지 기다림")
+    w.add_argument("job")
+    args = ap.parse_args(argv)
+
+    client = JobClient(args.url)
+    try:
+        if args.command == "add-book":
+            book = client.upload_book(args.pdf) if args.upload else client.add_book(args.pdf)
+            print(f"{book['id']}  {book['name']}  ({book['page_count']} pages, TOC {len(book['toc'])}, "
+                  f"{'새로 등록' if book['created'] else '이미 등록됨'})")
+        elif args.command == "toc":
+            for item in client.book(args.book)["toc"]:
+                print(f"{item['index']:4d} {'  ' * (item['level'] - 1)}{item['title']} "
+                      f"(p {item['start'] + 1}~{item['end'] + 1})")
+        elif args.command == "submit":
+            jobs = client.submit(args.type, args.book, chapters=args.chapters, options=json.loads(args.options),
+                                 force=args.force)
+            for job in jobs:
+                print(f"{job['id']}  {job['type']} {job['chapter']['dir_name']}  {job['status']}"
+                      + ("  (중복 → 기존 작업)" if job["deduplicated"] else ""))
+            if args.wait:
+                for job in jobs:
+                    job = client.wait(job["id"])
+                    print(f"{job['id']}  {job['status']}  {job.get('error') or ''}")
+        elif args.command == "jobs":
+            for job in client.jobs(args.book, args.status):
+                chapter = (job["chapter"] or {}).get("dir_name", "-")
+                print(f"{job['id']}  {job['type']:8s} {chapter:24s} {job['status']:9s} {job['progress']:.0%}")
+        elif args.command == "wait":
+            _print(client.wait(args.job, on_update=lambda j: print(f"[{j['status']}] {j['progress']:.0%}",
+                                                                   file=sys.stderr)))
+    except JobServiceError as e:
+        sys.exit(f"오류 {e.status}: {e.message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,687 @@
+# job_service.py
+# -*- coding: utf-8 -*-
+"""
+Local job service (HTTP, JSON)
+
+여러 사람이 같은 책을 각자 GUI 로 추출/생성하면 추출 CPU 와 LLM 비용이 중복된다.
+이 서비스는 책과 작업을 한 곳에서 관리한다:
+
+  - 책: PDF 업로드 또는 로컬 경로 등록. 내용 sha256 으로 식별하므로 같은 PDF 는 한 번만 등록된다.
+  - 작업: extract (CPU, 프로세스 풀) / explain, quiz (LLM 대기, 스레드 풀)
+  - 같은 책·챕터·옵션의 작업은 대기/실행 중이거나 끝난 작업을 그대로 돌려준다 (force 로 다시 실행)
+  - explain/quiz 를 요청했는데 챕터가 아직 추출되지 않았으면 extract 작업을 먼저 걸고 끝나면 이어서 실행
+
+  python scripts/job_service.py --root D:/lecturenote_jobs --port 8765
+
+  <root>/books/<book id>/book.json     책 정보 + TOC
+  <root>/books/<book id>/source.pdf    업로드한 PDF (경로 등록이면 원본 경로를 그대로 씀)
+  <root>/books/<book id>/output/       GUI 출력 폴더와 같은 구조 (chapter_XX/, _figures/, _runs/ ...)
+
+API
+  GET    /health
+  GET    /books                        책 목록
+  POST   /books                        PDF 업로드 (Content-Type: application/pdf, ?name=파일이름)
+                                       또는 {"path": "D:/books/x.pdf"}
+  GET    /books/<id>                   책 정보 + TOC
+  GET    /books/<id>/files/<경로>       출력 폴더 안 파일 (chapter_03/easy_explanation.html ...)
+  POST   /jobs                         {"type": "extract"|"explain"|"quiz", "book": id,
+                                        "chapter": TOC index | {"items": [TOC index...], "title": ...},
+                                        "chapters": [...] (여러 개), "options": {...}, "force": false}
+  GET    /jobs?book=&status=&type=     작업 목록
+  GET    /jobs/<id>                    작업 상태
+  GET    /jobs/<id>/artifacts          작업 결과 파일 목록 (다운로드 URL 포함)
+  DELETE /jobs/<id>                    대기 중이면 취소, 실행 중인 explain 은 중단 요청
+
+작업 목록은 메모리에만 있다. 서비스를 다시 띄우면 책과 결과 파일은 남고, 같은 작업을 다시 보내면
+explain 은 fingerprint 가 같아 LLM 호출 없이 끝난다.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import argparse
+import mimetypes
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote, unquote
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scripts.generation as generation
+import scripts.instrument as instrument
+
+DEFAULT_PORT = 8765
+CHUNK = 1024 * 1024
+MAX_UPLOAD_MB = 2048
+JOB_TYPES = ("extract", "explain", "quiz")
+# 작업 종류별 옵션 기본값 (dedupe 키에 들어가므로 빠진 옵션은 기본값으로 채운다)
+DEFAULT_OPTIONS = {
+    "extract": {"domain": "default", "ocr": False, "memory_limit_mb": None},
+    **generation.DEFAULT_OPTIONS,
+}
+ACTIVE = ("queued", "waiting", "running")
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------
+# 작업 함수 (extract 는 별도 프로세스에서 실행되므로 모듈 최상위 함수, 무거운 import 는 안에서;
+#           explain/quiz 는 scripts.generation 의 runner 를 스레드 풀에서)
+# ---------------------------------------------------------
+_docs = {}  # 프로세스별 열린 PDF (경로 → fitz.Document)
+
+
+def _open_doc(pdf_path):
+    import fitz  # PyMuPDF
+
+    doc = _docs.get(pdf_path)
+    if doc is None:
+        doc = _docs[pdf_path] = fitz.open(pdf_path)
+    return doc
+
+
+def run_prepare(job_id, pdf_path, out_root):
+    """책 단위 준비: 검색 색인 스키마 (챕터 추출들이 동시에 만들지 않도록). 페이지 store 는 챕터 추출이 채운다."""
+    import scripts.text_index as text_index
+
+    text_index.TextIndex(text_index.index_path(out_root)).close()
+    return {"files": []}
+
+
+def run_extract(job_id, pdf_path, out_root, chapter, options):
+    import scripts.extract_chapter as extract_chapter
+    import scripts.text_index as text_index
+
+    instrument.start_run(os.path.join(out_root, "_runs"), f"job-{job_id}")
+    try:
+        result = None
+        composed = False
+        if chapter.get("items"):
+            sources = [os.path.join(out_root, f"chapter_{i:02d}") for i in chapter["items"]]
+            result = extract_chapter.compose_chapter(chapter, sources, out_root, domain=options["domain"])
+            composed = bool(result)
+        if not result:
+            result = extract_chapter.extract_one_chapter(
+                _open_doc(pdf_path), chapter, out_root, domain=options["domain"], ocr=options["ocr"],
+                figure_store_dir=os.path.join(out_root, "_figures"),
+                memory_limit_mb=options["memory_limit_mb"],
+            )
+        chapter_dir = os.path.dirname(result)
+        with text_index.TextIndex(text_index.index_path(out_root)) as idx:
+            indexed = idx.update_chapter(chapter_dir)
+    finally:
+        run = generation.run_summary()
+    return {"composed": composed, "index": indexed, "run": run, "files": [result]}
+
+
+# ---------------------------------------------------------
+# 작업 관리
+# ---------------------------------------------------------
+class Job:
+    def __init__(self, job_type, book, chapter, options, key, deps=()):
+        self.id = uuid.uuid4().hex[:12]
+        self.type = job_type
+        self.book = book
+        self.chapter = chapter
+        self.options = options
+        self.key = key
+        self.deps = list(deps)
+        self.waiters = []
+        self.force = False
+        self.status = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.cancel_requested = False
+        self.future = None
+        self.input_sig = None  # explain/quiz: 실행했을 때의 chapter.json (크기, mtime)
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def dir_name(self):
+        return self.chapter.get("dir_name") if self.chapter else None
+
+    def refresh(self):
+        # 프로세스 풀 작업은 실제 시작을 알려주지 않으므로 future 상태로 판단한다
+        if self.status == "queued" and self.future is not None and self.future.running():
+            self.status = "running"
+            self.started = time.time()
+
+    def to_dict(self):
+        self.refresh()
+        return {
+            "id": self.id,
+            "type": self.type,
+            "book": self.book,
+            "chapter": self.chapter,
+            "options": self.options,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "deps": self.deps,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobService:
+    def __init__(self, root: str, extract_workers: int = None, llm_workers: int = 4):
+        self.root = os.path.abspath(root)
+        self.books_dir = os.path.join(self.root, "books")
+        os.makedirs(self.books_dir, exist_ok=True)
+
+        # spawn: HTTP 스레드가 도는 프로세스를 fork 하지 않는다 (Windows 와 같은 동작)
+        self.extract_workers = extract_workers or max((os.cpu_count() or 2) - 1, 1)
+        self.llm_workers = llm_workers
+        self._cpu = ProcessPoolExecutor(self.extract_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._llm = ThreadPoolExecutor(llm_workers, thread_name_prefix="llm")
+
+        self._lock = threading.RLock()
+        self.jobs = {}     # id → Job
+        self._by_key = {}  # dedupe 키 → 가장 최근 Job id
+        self.books = {}
+        for name in sorted(os.listdir(self.books_dir)):
+            path = os.path.join(self.books_dir, name, "book.json")
+            if os.path.isfile(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    book = json.load(f)
+                if os.path.isfile(book["pdf"]):
+                    self.books[book["id"]] = book
+
+    def close(self):
+        self._llm.shutdown(wait=False, cancel_futures=True)
+        self._cpu.shutdown(wait=False, cancel_futures=True)
+
+    # -----------------------------------------------------
+    # 책
+    # -----------------------------------------------------
+    def add_book_path(self, pdf_path: str):
+        pdf_path = os.path.abspath(pdf_path)
+        if not os.path.isfile(pdf_path):
+            raise ApiError(HTTPStatus.NOT_FOUND, f"파일이 없습니다: {pdf_path}")
+        return self._register(_sha256_file(pdf_path), pdf_path, os.path.basename(pdf_path), uploaded=False)
+
+    def add_book_upload(self, stream, length: int, name: str):
+        """요청 본문을 해시하면서 임시 파일로 받고, 처음 보는 PDF 면 books/<id>/source.pdf 로 옮긴다"""
+        tmp = os.path.join(self.books_dir, f".upload-{uuid.uuid4().hex}.pdf")
+        h = hashlib.sha256()
+        try:
+            with open(tmp, "wb") as f:
+                remaining = length
+                while remaining > 0:
+                    chunk = stream.read(min(CHUNK, remaining))
+                    if not chunk:
+                        raise ApiError(HTTPStatus.BAD_REQUEST, "업로드가 중간에 끊겼습니다.")
+                    h.update(chunk)
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            book_id = h.hexdigest()[:16]
+            dest = os.path.join(self.books_dir, book_id, "source.pdf")
+            with self._lock:
+                if book_id in self.books:
+                    return self.books[book_id], False
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                os.replace(tmp, dest)
+            return self._register(h.hexdigest(), dest, name or "upload.pdf", uploaded=True)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _register(self, sha, pdf_path, name, uploaded):
+        import fitz  # PyMuPDF
+        import scripts.extract_chapter as extract_chapter
+
+        book_id = sha[:16]
+        with self._lock:
+            if book_id in self.books:
+                return self.books[book_id], False
+
+            try:
+                with fitz.open(pdf_path) as doc:
+                    toc = extract_chapter.get_toc_items(doc)
+                    page_count = doc.page_count
+            except RuntimeError as e:  # 목차 없음 / 열 수 없는 PDF
+                if uploaded:
+                    shutil.rmtree(os.path.dirname(pdf_path), ignore_errors=True)
+                raise ApiError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+
+            book_dir = os.path.join(self.books_dir, book_id)
+            book = {
+                "id": book_id,
+                "sha256": sha,
+                "name": name,
+                "pdf": pdf_path,
+                "output": os.path.join(book_dir, "output"),
+                "page_count": page_count,
+                "toc": toc,
+                "added": time.time(),
+            }
+            os.makedirs(book["output"], exist_ok=True)
+            with open(os.path.join(book_dir, "book.json"), "w", encoding="utf-8") as f:
+                json.dump(book, f, ensure_ascii=False, indent=2)
+            self.books[book_id] = book
+            return book, True
+
+    def book(self, book_id):
+        book = self.books.get(book_id)
+        if book is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"책이 없습니다: {book_id}")
+        return book
+
+    def resolve_chapter(self, book, spec):
+        """TOC index (int) 또는 그룹 {"items": [...], "title"?} → extract_one_chapter 용 chapter dict"""
+        toc = {item["index"]: item for item in book["toc"]}
+        if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+            item = toc.get(int(spec))
+            if item is None:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"TOC 항목이 없습니다: {spec}")
+            return {"index": item["index"], "title": item["title"], "start": item["start"], "end": item["end"],
+                    "dir_name": f"chapter_{item['index']:02d}"}
+
+        if isinstance(spec, dict) and spec.get("items"):
+            try:
+                items = [toc[int(i)] for i in spec["items"]]
+            except (KeyError, ValueError, TypeError):
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"그룹에 없는 TOC 항목이 있습니다: {spec['items']}")
+            start = min(x["start"] for x in items)
+            end = max(x["end"] for x in items)
+            return {"index": spec.get("index", items[0]["index"]), "title": spec.get("title") or items[0]["title"],
+                    "start": start, "end": end, "items": sorted(int(i) for i in spec["items"]),
+                    "dir_name": f"group_p{start + 1:04d}-{end + 1:04d}"}
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"chapter 는 TOC index 또는 {{\"items\": [...]}} 이어야 합니다: {spec!r}")
+
+    # -----------------------------------------------------
+    # 작업 제출
+    # -----------------------------------------------------
+    def _key(self, job_type, book_id, chapter, options):
+        ident = {k: chapter.get(k) for k in ("dir_name", "start", "end", "items")} if chapter else None
+        raw = json.dumps([job_type, book_id, ident, options], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def submit(self, job_type, book_id, chapter_spec=None, options=None, force=False):
+        """(Job, deduplicated) 반환. 같은 작업이 대기/실행 중이거나 끝났으면(force 아님) 그 작업을 돌려준다."""
+        if job_type not in JOB_TYPES and job_type != "prepare":
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"알 수 없는 작업 종류: {job_type}")
+        book = self.book(book_id)
+        chapter = self.resolve_chapter(book, chapter_spec) if job_type != "prepare" else None
+
+        opts = dict(DEFAULT_OPTIONS.get(job_type, {}))
+        unknown = set(options or {}) - set(opts)
+        if unknown:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"{job_type} 에 없는 옵션: {sorted(unknown)}")
+        opts.update(options or {})
+        key = self._key(job_type, book_id, chapter, opts)
+
+        with self._lock:
+            existing = self.jobs.get(self._by_key.get(key))
+            if existing and existing.status in ACTIVE:
+                return existing, True
+            # 끝난 작업은 그 사이 챕터가 다시 추출되지 않았을 때만 재사용
+            if (existing and existing.status == "done" and not force
+                    and existing.input_sig == self._input_sig(book_id, existing.dir_name, existing.type)):
+                return existing, True
+
+            deps = self._dependencies(job_type, book, chapter)
+            job = Job(job_type, book_id, chapter, opts, key, deps)
+            job.force = force
+            self.jobs[job.id] = job
+            self._by_key[key] = job.id
+            self._schedule(job)
+            return job, False
+
+    def _input_sig(self, book_id, dir_name, job_type="explain"):
+        if job_type not in ("explain", "quiz"):
+            return None
+        try:
+            st = os.stat(os.path.join(self.books[book_id]["output"], dir_name, "chapter.json"))
+        except OSError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    def _dependencies(self, job_type, book, chapter):
+        """extract 는 책 준비 작업 뒤, explain/quiz 는 (아직 없거나 진행 중인) 챕터 추출 뒤에 실행"""
+        if job_type == "prepare":
+            return []
+        if job_type == "extract":
+            prepare, _ = self.submit("prepare", book["id"])
+            deps = [prepare.id]
+            # 그룹은 가능하면 이미 추출된 TOC 항목으로 구성하므로, 진행 중인 항목 추출을 기다린다
+            for i in chapter.get("items", ()):
+                running = self._active_extract(book["id"], f"chapter_{i:02d}")
+                if running:
+                    deps.append(running.id)
+            return deps
+
+        running = self._active_extract(book["id"], chapter["dir_name"])
+        if running:
+            return [running.id]
+        if os.path.isfile(os.path.join(book["output"], chapter["dir_name"], "chapter.json")):
+            return []
+        spec = {"items": chapter["items"], "title": chapter["title"]} if chapter.get("items") else chapter["index"]
+        extract, _ = self.submit("extract", book["id"], spec)
+        return [extract.id]
+
+    def _active_extract(self, book_id, dir_name):
+        for job in self.jobs.values():
+            if job.type == "extract" and job.book == book_id and job.dir_name == dir_name and job.status in ACTIVE:
+                return job
+        return None
+
+    def _schedule(self, job):
+        """의존 작업이 모두 끝났으면 풀에 넣고, 아니면 waiting 으로 둔다 (lock 안에서 호출)"""
+        if job.status not in ("waiting", "queued") or job.future is not None:
+            return  # 이미 풀에 들어갔거나 취소/종료된 작업
+        failed = [d for d in job.deps if self.jobs[d].status in ("failed", "cancelled")]
+        if failed:
+            self._finish(job, error=f"선행 작업 실패: {', '.join(failed)}")
+            return
+        pending = [d for d in job.deps if self.jobs[d].status != "done"]
+        if pending:
+            job.status = "waiting"
+            for d in pending:
+                if job.id not in self.jobs[d].waiters:
+                    self.jobs[d].waiters.append(job.id)
+            return
+
+        book = self.books[job.book]
+        job.status = "queued"
+        if job.type == "prepare":
+            job.future = self._cpu.submit(run_prepare, job.id, book["pdf"], book["output"])
+        elif job.type == "extract":
+            job.future = self._cpu.submit(run_extract, job.id, book["pdf"], book["output"], job.chapter, job.options)
+        else:
+            fn = generation.RUNNERS[job.type]
+            job.future = self._llm.submit(self._run_in_thread, job, fn, book["output"])
+        job.future.add_done_callback(lambda f, job=job: self._on_done(job, f))
+
+    def _run_in_thread(self, job, fn, out_root):
+        job.status = "running"
+        job.started = time.time()
+
+        def progress(v):
+            job.progress = v
+
+        return fn(f"job-{job.id}", out_root, job.dir_name, job.options, force=job.force, progress=progress,
+                  stop_flag=lambda: job.cancel_requested)
+
+    def _on_done(self, job, future):
+        with self._lock:
+            if future.cancelled():
+                self._finish(job, status="cancelled")
+                return
+            err = future.exception()
+            if err is not None and job.cancel_requested:
+                self._finish(job, status="cancelled")
+            elif err is not None:
+                self._finish(job, error=f"{type(err).__name__}: {err}")
+            else:
+                self._finish(job, result=future.result())
+
+    def _finish(self, job, result=None, error=None, status=None):
+        job.finished = time.time()
+        job.status = status or ("failed" if error else "done")
+        job.error = error
+        job.progress = 1.0 if job.status == "done" else job.progress
+        if job.status == "done" and job.type in ("explain", "quiz"):
+            job.input_sig = self._input_sig(job.book, job.dir_name)
+        if result is not None:
+            out_root = self.books[job.book]["output"]
+            result["files"] = [os.path.relpath(p, out_root).replace(os.sep, "/") for p in result.get("files", [])]
+            job.result = result
+        waiters, job.waiters = job.waiters, []
+        for w in waiters:
+            self._schedule(self.jobs[w])
+
+    def cancel(self, job_id):
+        job = self.job(job_id)
+        with self._lock:
+            if job.status == "waiting":
+                for d in job.deps:
+                    if job.id in self.jobs[d].waiters:
+                        self.jobs[d].waiters.remove(job.id)
+                self._finish(job, status="cancelled")
+            elif job.status in ("queued", "running"):
+                job.cancel_requested = True
+                if job.future is not None:
+                    job.future.cancel()  # 아직 시작 전이면 취소되고 _on_done 이 cancelled 로 표시
+        return job
+
+    # -----------------------------------------------------
+    # 조회
+    # -----------------------------------------------------
+    def job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"작업이 없습니다: {job_id}")
+        job.refresh()
+        return job
+
+    def list_jobs(self, book=None, status=None, job_type=None):
+        with self._lock:
+            jobs = sorted(self.jobs.values(), key=lambda j: j.created)
+        for j in jobs:
+            j.refresh()
+        return [
+            j for j in jobs
+            if (not book or j.book == book) and (not status or j.status == status) and (not job_type or j.type == job_type)
+        ]
+
+    def artifacts(self, job_id):
+        """작업이 만든 파일과 같은 챕터 폴더의 해설서/퀴즈 (있는 것만), 다운로드 URL 포함"""
+        job = self.job(job_id)
+        out_root = self.books[job.book]["output"]
+        files = list((job.result or {}).get("files", []))
+        if job.dir_name:
+            for name in ("chapter.json", "easy_explanation.html", "quiz.html"):
+                rel = f"{job.dir_name}/{name}"
+                if rel not in files and os.path.isfile(os.path.join(out_root, rel)):
+                    files.append(rel)
+        out = []
+        for rel in files:
+            path = os.path.join(out_root, rel)
+            if os.path.isfile(path):
+                out.append({"path": rel, "bytes": os.path.getsize(path),
+                            "url": f"/books/{job.book}/files/{quote(rel)}"})
+        return out
+
+    def file_path(self, book_id, rel):
+        """출력 폴더 밖을 가리키는 경로(../)는 거부"""
+        out_root = os.path.realpath(self.book(book_id)["output"])
+        path = os.path.realpath(os.path.join(out_root, rel))
+        if os.path.commonpath([out_root, path]) != out_root or not os.path.isfile(path):
+            raise ApiError(HTTPStatus.NOT_FOUND, f"파일이 없습니다: {rel}")
+        return path
+
+    def health(self):
+        counts = {}
+        with self._lock:
+            for j in self.jobs.values():
+                counts[j.status] = counts.get(j.status, 0) + 1
+        return {"ok": True, "books": len(self.books), "jobs": counts,
+                "workers": {"extract": self.extract_workers, "llm": self.llm_workers}}
+
+
+# ---------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------
+def _book_summary(book):
+    return dict({k: book[k] for k in ("id", "name", "page_count", "added")}, toc_items=len(book["toc"]))
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "LectureNoteJobs/1.0"
+
+    @property
+    def service(self) -> JobService:
+        return self.server.service
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status, obj):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, path):
+        ctype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if ctype.startswith("text/") or ctype == "application/json":
+            ctype += "; charset=utf-8"
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile, CHUNK)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "JSON 본문을 읽을 수 없습니다.")
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            self._route(method, parts, query)
+        except ApiError as e:
+            self._send_json(e.status, {"error": e.message})
+        except Exception as e:  # 서비스는 계속 떠 있어야 한다
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _route(self, method, parts, query):
+        svc = self.service
+        if method == "GET" and parts == ["health"]:
+            return self._send_json(HTTPStatus.OK, svc.health())
+
+        if parts[:1] == ["books"]:
+            if method == "GET" and len(parts) == 1:
+                return self._send_json(HTTPStatus.OK, [_book_summary(b) for b in svc.books.values()])
+            if method == "POST" and len(parts) == 1:
+                return self._post_book(query)
+            if method == "GET" and len(parts) == 2:
+                return self._send_json(HTTPStatus.OK, svc.book(parts[1]))
+            if method == "GET" and len(parts) >= 4 and parts[2] == "files":
+                return self._send_file(svc.file_path(parts[1], unquote("/".join(parts[3:]))))
+
+        if parts[:1] == ["jobs"]:
+            if method == "GET" and len(parts) == 1:
+                jobs = svc.list_jobs(query.get("book"), query.get("status"), query.get("type"))
+                return self._send_json(HTTPStatus.OK, [j.to_dict() for j in jobs])
+            if method == "POST" and len(parts) == 1:
+                return self._post_jobs()
+            if method == "GET" and len(parts) == 2:
+                return self._send_json(HTTPStatus.OK, svc.job(parts[1]).to_dict())
+            if method == "GET" and len(parts) == 3 and parts[2] == "artifacts":
+                return self._send_json(HTTPStatus.OK, svc.artifacts(parts[1]))
+            if method == "DELETE" and len(parts) == 2:
+                return self._send_json(HTTPStatus.OK, svc.cancel(parts[1]).to_dict())
+
+        raise ApiError(HTTPStatus.NOT_FOUND, f"{method} {self.path}")
+
+    def _post_book(self, query):
+        ctype = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+        if ctype == "application/json":
+            body = self._read_json()
+            if not body.get("path"):
+                raise ApiError(HTTPStatus.BAD_REQUEST, '{"path": "..."} 가 필요합니다.')
+            book, created = self.service.add_book_path(body["path"])
+        else:
+            length = self.headers.get("Content-Length")
+            if not length:
+                raise ApiError(HTTPStatus.LENGTH_REQUIRED, "Content-Length 가 필요합니다.")
+            if int(length) > MAX_UPLOAD_MB * 1024 * 1024:
+                raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"{MAX_UPLOAD_MB} MB 보다 큰 PDF 입니다.")
+            book, created = self.service.add_book_upload(self.rfile, int(length), query.get("name"))
+        self._send_json(HTTPStatus.CREATED if created else HTTPStatus.OK, dict(book, created=created))
+
+    def _post_jobs(self):
+        body = self._read_json()
+        specs = body.get("chapters") if "chapters" in body else [body.get("chapter")]
+        if body.get("type") != "prepare" and (not specs or any(s is None for s in specs)):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "chapter 또는 chapters 가 필요합니다.")
+        out = []
+        for spec in specs:
+            job, dedup = self.service.submit(body.get("type"), body.get("book"), spec, body.get("options"),
+                                             bool(body.get("force")))
+            out.append(dict(job.to_dict(), deduplicated=dedup))
+        status = HTTPStatus.OK if all(j["deduplicated"] for j in out) else HTTPStatus.ACCEPTED
+        self._send_json(status, out if "chapters" in body else out[0])
+
+
+def serve(root, host="127.0.0.1", port=DEFAULT_PORT, extract_workers=None, llm_workers=4, verbose=False):
+    service = JobService(root, extract_workers, llm_workers)
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    httpd.service = service
+    httpd.verbose = verbose
+    return httpd
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="추출/해설서/퀴즈 작업을 받는 로컬 HTTP 서비스")
+    ap.add_argument("--root", required=True, help="책과 출력이 저장될 폴더")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--extract-workers", type=int, help="추출 프로세스 수 (기본: CPU 수 - 1)")
+    ap.add_argument("--llm-workers", type=int, default=4, help="동시에 보낼 LLM 요청 수")
+    ap.add_argument("--verbose", action="store_true", help="요청 로그 출력")
+    args = ap.parse_args(argv)
+
+    httpd = serve(args.root, args.host, args.port, args.extract_workers, args.llm_workers, args.verbose)
+    svc = httpd.service
+    print(f"[jobs] http://{args.host}:{args.port}  root={svc.root}  "
+          f"추출 프로세스 {svc.extract_workers}, LLM 스레드 {svc.llm_workers}, 책 {len(svc.books)}권")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        svc.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# llm_client.py
+# -*- coding: utf-8 -*-
+"""
+Shared OpenAI client
+
+쉬운 해설서/퀴즈 파이프라인이 같이 쓰는 OpenAI client. 처음 호출할 때 만든다 (import 시간 단축).
+테스트/벤치마크에서는 client 에 다른 객체를 직접 넣어 쓸 수 있다:
+
+  import scripts.llm_client as llm_client
+  llm_client.client = FakeClient(...)
+"""
+import os
+import threading
+
+from dotenv import load_dotenv
+
+client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                from openai import OpenAI
+
+                load_dotenv()
+                client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client
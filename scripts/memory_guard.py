@@ -0,0 +1,169 @@
+# memory_guard.py
+# -*- coding: utf-8 -*-
+"""
+Memory ceiling for long extractions
+
+수천 페이지짜리 스캔 교재를 추출할 때 RSS 가 설정한 한도(memory_limit_mb)에
+가까워지면 단계적으로 부담을 줄인다:
+
+  사용률 >= SHRINK_AT     MuPDF store 비우기 (fitz.TOOLS.store_shrink) + gc
+  사용률 >= ZOOM_STEPS    도식 렌더링 배율을 3 → 2 → 1.5 로 낮춤 (한 번 낮추면 유지)
+  OCR worker 수           남은 여유 메모리 / OCR_WORKER_MB 로 제한 (한도가 없어도 MAX_OCR_WORKERS 와
+                          시스템 가용 메모리로 제한: default_ocr_workers)
+
+RSS 는 psutil 없이 /proc/self/statm (Linux) 또는 GetProcessMemoryInfo (Windows) 로 읽는다.
+둘 다 안 되는 환경에서는 peak RSS 로 대신한다 (줄어들지 않으므로 보수적으로 동작).
+"""
+import gc
+import os
+import sys
+
+import fitz  # PyMuPDF
+
+DEFAULT_ZOOM = 3
+# (사용률, 배율): 사용률이 기준을 넘으면 해당 배율 이하로 렌더링
+ZOOM_STEPS = ((0.6, 2), (0.8, 1.5))
+SHRINK_AT = 0.75
+OCR_WORKER_MB = 400  # easyocr worker 하나가 모델을 올리는 데 드는 대략의 메모리
+MAX_OCR_WORKERS = 4  # worker 마다 모델을 따로 올리므로 코어가 많아도 이 이상은 띄우지 않는다
+
+
+def current_rss_mb():
+    """현재 프로세스 RSS (MB), 알 수 없으면 None"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class _Counters(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = _Counters()
+            counters.cb = ctypes.sizeof(_Counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize / (1024 * 1024)
+        except (OSError, AttributeError):
+            pass
+        return None
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 는 bytes, Linux 는 KB
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def available_mb():
+    """시스템 가용 메모리 (MB), 알 수 없으면 None"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if sys.platform == "win32":
+        try:
+            import ctypes
+
+            class _MemoryStatus(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong),
+                    ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong),
+                    ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong),
+                    ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong),
+                    ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            status = _MemoryStatus()
+            status.dwLength = ctypes.sizeof(_MemoryStatus)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullAvailPhys / (1024 * 1024)
+        except (OSError, AttributeError):
+            pass
+    return None
+
+
+def default_ocr_workers():
+    """OCR worker 기본 수: CPU 수 - 1, MAX_OCR_WORKERS, 시스템 가용 메모리 / OCR_WORKER_MB 중 가장 작은 값"""
+    n = min(MAX_OCR_WORKERS, max((os.cpu_count() or 2) - 1, 1))
+    avail = available_mb()
+    if avail is not None:
+        n = min(n, int(avail // OCR_WORKER_MB))
+    return max(n, 1)
+
+
+class MemoryGuard:
+    def __init__(self, limit_mb: float, zoom: float = DEFAULT_ZOOM):
+        if limit_mb <= 0:
+            raise ValueError(f"memory_limit_mb must be positive: {limit_mb}")
+        self.limit_mb = limit_mb
+        self.zoom = zoom
+        self.peak_mb = 0.0
+        self.shrinks = 0
+
+    def usage(self) -> float:
+        """한도 대비 현재 RSS 비율 (측정 불가면 0)"""
+        rss = current_rss_mb()
+        if rss is None:
+            return 0.0
+        self.peak_mb = max(self.peak_mb, rss)
+        return rss / self.limit_mb
+
+    def check(self) -> float:
+        """페이지마다 호출: 한도에 가까우면 캐시를 비우고 렌더링 배율을 낮춘다. 사용률 반환."""
+        ratio = self.usage()
+        if ratio >= SHRINK_AT:
+            fitz.TOOLS.store_shrink(100)
+            gc.collect()
+            self.shrinks += 1
+            ratio = self.usage()
+
+        for threshold, zoom in ZOOM_STEPS:
+            if ratio >= threshold:
+                self.zoom = min(self.zoom, zoom)
+        return ratio
+
+    def ocr_workers(self, requested=None):
+        """남은 여유 메모리로 띄울 수 있는 OCR worker 수 (requested=None 이면 default_ocr_workers())"""
+        if requested is None:
+            requested = default_ocr_workers()
+        rss = current_rss_mb()
+        if rss is None:
+            return requested
+        headroom = self.limit_mb - rss
+        return max(1, min(requested, int(headroom // OCR_WORKER_MB)))
+
+    def report(self) -> dict:
+        return {
+            "limit_mb": self.limit_mb,
+            "peak_rss_mb": round(self.peak_mb, 1),
+            "zoom": self.zoom,
+            "store_shrinks": self.shrinks,
+        }
@@ -0,0 +1,211 @@
+# ocr_fallback.py
+# -*- coding: utf-8 -*-
+"""
+OCR fallback
+
+ToUnicode 매핑이 없는 PDF 나 스캔본 페이지는 get_text() 결과가 비어 있거나
+깨진 문자(사용자 정의 영역, U+FFFD)로 가득하다. 이런 페이지만 골라 easyocr 로
+다시 읽는다.
+
+ - classify_page(page, page_texts): 텍스트 밀도/깨진 문자 비율로 페이지 분류 (저렴)
+ - run_ocr(pdf_path, pages, cache_dir): 분류된 페이지만 CPU process pool 에서 OCR,
+   결과는 페이지 단위로 cache_dir 에 저장되어 다음 실행에서 재사용된다.
+"""
+import os
+import json
+import hashlib
+import importlib.util
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz  # PyMuPDF
+
+import scripts.memory_guard as memory_guard
+
+DEFAULT_LANGS = ("ko", "en")
+DEFAULT_DPI = 200
+
+# 분류 기준
+MIN_CHARS = 50              # 이보다 적으면 '텍스트 없음' 으로 본다
+MIN_IMAGE_COVERAGE = 0.5    # 이미지가 페이지 면적의 절반 이상이면 스캔 페이지
+MAX_BAD_RATIO = 0.3         # 깨진 문자가 30% 이상이면 garbled
+
+
+def _is_bad_char(ch):
+    cp = ord(ch)
+    if cp == 0xFFFD:
+        return True
+    # Private Use Area (BMP, plane 15/16)
+    if 0xE000 <= cp <= 0xF8FF or cp >= 0xF0000:
+        return True
+    return unicodedata.category(ch) == "Cc" and ch not in "\n\t\r"
+
+
+def bad_char_ratio(text: str) -> float:
+    chars = [ch for ch in text if not ch.isspace()]
+    if not chars:
+        return 0.0
+    return sum(1 for ch in chars if _is_bad_char(ch)) / len(chars)
+
+
+def _image_coverage(page):
+    area = abs(page.rect)
+    if not area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        r = fitz.Rect(info["bbox"]) & page.rect
+        covered += abs(r)
+    return min(covered / area, 1.0)
+
+
+# ---------------------------------------------------------
+# 페이지 분류
+# ---------------------------------------------------------
+def classify_page(page, page_texts):
+    """
+    반환: {"class": "text" | "garbled" | "scanned" | "empty", "chars", "bad_ratio"}
+    "garbled" / "scanned" 인 페이지만 OCR 대상이다.
+    """
+    text = "".join(page_texts)
+    chars = sum(1 for ch in text if not ch.isspace())
+    ratio = bad_char_ratio(text)
+
+    info = {"chars": chars, "bad_ratio": round(ratio, 3)}
+
+    if chars >= MIN_CHARS:
+        info["class"] = "garbled" if ratio >= MAX_BAD_RATIO else "text"
+        return info
+
+    # 텍스트가 거의 없을 때만 이미지 면적을 계산한다
+    coverage = _image_coverage(page)
+    info["image_coverage"] = round(coverage, 3)
+    if coverage >= MIN_IMAGE_COVERAGE:
+        info["class"] = "scanned"
+    elif chars and ratio >= MAX_BAD_RATIO:
+        info["class"] = "garbled"
+    else:
+        info["class"] = "empty"
+    return info
+
+
+def needs_ocr(page_class: dict) -> bool:
+    return page_class.get("class") in ("garbled", "scanned")
+
+
+# ---------------------------------------------------------
+# 페이지 단위 결과 캐시
+# ---------------------------------------------------------
+def pdf_signature(pdf_path: str) -> str:
+    """파일 크기 + 앞/뒤 64KB 해시 (전체 해시보다 훨씬 싸다)"""
+    h = hashlib.sha1()
+    size = os.path.getsize(pdf_path)
+    h.update(str(size).encode())
+    with open(pdf_path, "rb") as f:
+        h.update(f.read(65536))
+        if size > 65536:
+            f.seek(max(size - 65536, 65536))
+            h.update(f.read(65536))
+    return h.hexdigest()
+
+
+class OcrCache:
+    def __init__(self, cache_dir: str, signature: str, langs, dpi):
+        self.cache_dir = cache_dir
+        self.signature = signature
+        self.tag = f"{','.join(langs)}@{dpi}"
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, page_index):
+        key = hashlib.sha1(f"{self.signature}:{page_index}:{self.tag}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, page_index):
+        try:
+            with open(self._path(page_index), "r", encoding="utf-8") as f:
+                return json.load(f)["blocks"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, page_index, blocks):
+        path = self._path(page_index)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"page_index": page_index, "blocks": blocks}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+# ---------------------------------------------------------
+# OCR worker (process pool)
+# ---------------------------------------------------------
+_reader = None
+
+
+def _init_worker(langs):
+    # easyocr 모델 로딩은 무겁기 때문에 프로세스당 한 번만
+    global _reader
+    import easyocr
+
+    _reader = easyocr.Reader(list(langs), gpu=False, verbose=False)
+
+
+def _ocr_page(pdf_path, page_index, dpi):
+    doc = fitz.open(pdf_path)
+    try:
+        page = doc.load_page(page_index)
+        pix = page.get_pixmap(dpi=dpi)
+        png = pix.tobytes("png")
+    finally:
+        doc.close()
+
+    scale = 72.0 / dpi
+    blocks = []
+    for box, text in _reader.readtext(png, detail=1, paragraph=True):
+        xs = [pt[0] for pt in box]
+        ys = [pt[1] for pt in box]
+        text = text.strip()
+        if text:
+            blocks.append({
+                "text": text,
+                "bbox": [min(xs) * scale, min(ys) * scale, max(xs) * scale, max(ys) * scale],
+            })
+    # 위→아래, 왼쪽→오른쪽 읽기 순서
+    blocks.sort(key=lambda b: (round(b["bbox"][1]), b["bbox"][0]))
+    return page_index, blocks
+
+
+def run_ocr(pdf_path, page_indices, cache_dir, langs=DEFAULT_LANGS, dpi=DEFAULT_DPI, workers=None):
+    """
+    page_indices(0-based) 페이지를 OCR 해서 {page_index: [{"text", "bbox"}, ...]} 반환.
+    캐시에 있는 페이지는 OCR 하지 않는다.
+    """
+    cache = OcrCache(cache_dir, pdf_signature(pdf_path), langs, dpi)
+
+    results = {}
+    missing = []
+    for p in page_indices:
+        blocks = cache.get(p)
+        if blocks is None:
+            missing.append(p)
+        else:
+            results[p] = blocks
+
+    if not missing:
+        return results
+
+    if importlib.util.find_spec("easyocr") is None:
+        raise RuntimeError("OCR 에 필요한 easyocr 가 설치되어 있지 않습니다. (pip install easyocr)")
+
+    if workers is None:
+        # worker 마다 easyocr/torch 모델을 따로 올리므로 코어 수가 아니라 메모리로 제한
+        workers = memory_guard.default_ocr_workers()
+    workers = max(1, min(workers, len(missing)))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tuple(langs),)) as pool:
+        futures = [pool.submit(_ocr_page, pdf_path, p, dpi) for p in missing]
+        for fut in as_completed(futures):
+            p, blocks = fut.result()
+            cache.put(p, blocks)
+            results[p] = blocks
+
+    return results
@@ -0,0 +1,277 @@
+# page_store.py
+# -*- coding: utf-8 -*-
+"""
+Book-level page text store
+
+책 전체의 페이지 텍스트를 하나의 blob 과 offset 테이블로 저장하고,
+mmap 으로 읽어 임의 페이지/페이지 범위의 텍스트를 파싱 없이 꺼낸다.
+
+  out_root/_pages/pages.bin   페이지 텍스트(UTF-8)를 이어붙인 blob (뒤에 추가, 버려진 부분이 커지면 압축)
+  out_root/_pages/pages.idx   페이지마다 uint64 little-endian (start, end) 쌍 (page_count 개)
+  out_root/_pages/pages.json  원본 PDF 정보 (다른 PDF 로 만든 store 인지 판단용)
+
+페이지 i 의 텍스트는 blob[start:end] 이며, 블록 사이는 "\\n" 으로 이어져 있다.
+store 는 extract_one_chapter 가 챕터를 쓸 때 그 페이지들만 채운다 (OCR 보정·머리말/꼬리말 제거 후,
+chapter.json 의 text_blocks 와 같은 텍스트). 아직 추출하지 않은 페이지는 비어 있다(missing).
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+
+import scripts.figure_store as figure_store
+
+STORE_DIRNAME = "_pages"
+STORE_VERSION = 2
+
+_BLOB = "pages.bin"
+_INDEX = "pages.idx"
+_META = "pages.json"
+_MISSING = 0xFFFFFFFFFFFFFFFF  # 아직 추출하지 않은 페이지의 (start, end)
+_COMPACT_MIN_BYTES = 1 << 20   # 다시 추출해서 버려진 부분이 이보다 크고 blob 의 절반을 넘으면 압축
+
+
+def store_dir(out_root: str) -> str:
+    return os.path.join(out_root, STORE_DIRNAME)
+
+
+def _source_info(doc) -> dict:
+    info = {"source": os.path.abspath(doc.name) if doc.name else "", "page_count": doc.page_count}
+    try:
+        info["size"] = os.path.getsize(doc.name)
+    except (OSError, TypeError):
+        pass
+    return info
+
+
+def _same_source(meta: dict, info: dict) -> bool:
+    """같은 PDF 로 만든 store 인지 (경로/mtime 은 복사·shard merge 로 바뀌므로 비교하지 않는다)"""
+    return (meta.get("version") == STORE_VERSION
+            and all(meta.get(k) == info.get(k) for k in ("page_count", "size")))
+
+
+def _read_index(path: str, page_count: int) -> list:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        data = b""
+    if len(data) != page_count * 16:
+        return [_MISSING] * (page_count * 2)
+    return list(struct.unpack(f"<{page_count * 2}Q", data))
+
+
+def _write_index(path: str, offsets: list):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------
+# store 작성 (챕터 추출 때마다 그 페이지들만)
+# ---------------------------------------------------------
+def write_pages(out_root: str, doc, pages) -> str:
+    """
+    pages([(0-based 페이지, 텍스트)]) 를 store 에 기록하고 store 디렉터리를 반환.
+    다른 PDF 로 만든 store 이면 비우고 새로 시작한다. 이미 있는 페이지는 새 텍스트로 바뀐다.
+    같은 책의 챕터를 여러 프로세스가 동시에 추출할 수 있으므로 lock 안에서 쓴다.
+    """
+    d = store_dir(out_root)
+    info = _source_info(doc)
+    n = info["page_count"]
+    with figure_store.locked(d):
+        blob_path = os.path.join(d, _BLOB)
+        index_path = os.path.join(d, _INDEX)
+        meta_path = os.path.join(d, _META)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+
+        fresh = not _same_source(meta, info) or not os.path.exists(blob_path)
+        offsets = [_MISSING] * (n * 2) if fresh else _read_index(index_path, n)
+        with open(blob_path, "wb" if fresh else "ab") as fb:
+            pos = fb.tell()
+            for p, text in pages:
+                data = text.encode("utf-8")
+                fb.write(data)
+                offsets[2 * p], offsets[2 * p + 1] = pos, pos + len(data)
+                pos += len(data)
+
+        live = sum(e - s for s, e in zip(offsets[::2], offsets[1::2]) if s != _MISSING)
+        if pos - live > max(_COMPACT_MIN_BYTES, live):
+            offsets = _compact(blob_path, offsets)
+        # index 를 마지막에 교체해서, 중간에 실패해도 이전 index 가 가리키는 내용은 그대로 남는다
+        _write_index(index_path, offsets)
+
+        if fresh:
+            meta = dict(info, version=STORE_VERSION)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+    return d
+
+
+def _compact(blob_path: str, offsets: list) -> list:
+    """다시 추출되어 가리키는 곳이 없는 부분을 뺀 blob 으로 교체하고 새 offset 을 반환"""
+    out = list(offsets)
+    tmp = blob_path + ".tmp"
+    with open(blob_path, "rb") as src, open(tmp, "wb") as dst:
+        for i in range(0, len(offsets), 2):
+            s, e = offsets[i], offsets[i + 1]
+            if s == _MISSING:
+                continue
+            src.seek(s)
+            out[i] = dst.tell()
+            dst.write(src.read(e - s))
+            out[i + 1] = dst.tell()
+    os.replace(tmp, blob_path)
+    return out
+
+
+def merge_stores(out_root: str, source_roots) -> str:
+    """
+    같은 PDF 의 store 여럿(shard 마다 일부 페이지)을 out_root 의 store 하나로 합친다.
+    같은 페이지가 여러 곳에 있으면 나중 source 의 텍스트를 쓴다. 합칠 것이 없으면 None.
+    """
+    merged, meta = {}, None
+    for root in source_roots:
+        d = store_dir(root)
+        try:
+            with open(os.path.join(d, _META), "r", encoding="utf-8") as f:
+                src_meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if src_meta.get("version") != STORE_VERSION:
+            continue
+        if meta is None:
+            meta = src_meta
+        elif not _same_source(meta, src_meta):
+            raise ValueError(f"다른 PDF 로 만든 page store 입니다: {d}")
+        with PageStore(root) as store:
+            for p in store.pages():
+                merged[p] = store.page_bytes(p)
+    if meta is None:
+        return None
+
+    d = store_dir(out_root)
+    os.makedirs(d, exist_ok=True)
+    offsets = [_MISSING] * (meta["page_count"] * 2)
+    with open(os.path.join(d, _BLOB), "wb") as fb:
+        for p in sorted(merged):
+            offsets[2 * p] = fb.tell()
+            fb.write(merged[p])
+            offsets[2 * p + 1] = fb.tell()
+    _write_index(os.path.join(d, _INDEX), offsets)
+    with open(os.path.join(d, _META), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return d
+
+
+# ---------------------------------------------------------
+# store 읽기 (mmap)
+# ---------------------------------------------------------
+class PageStore:
+    """
+    mmap 기반 읽기 전용 page store.
+
+        with PageStore(out_root) as store:
+            text = store.range_text(group["start"], group["end"])
+
+    페이지 번호는 get_toc_items 의 start/end 와 같은 0-based 이다.
+    아직 추출하지 않은 페이지를 읽으면 KeyError (has_range 로 먼저 확인할 수 있다).
+    """
+
+    def __init__(self, out_root: str):
+        d = store_dir(out_root)
+        self._files = []
+        self._maps = []
+
+        self._blob = self._map(os.path.join(d, _BLOB))
+        index = self._map(os.path.join(d, _INDEX))
+        self._views = []
+        if len(index) % 16:
+            raise RuntimeError(f"page store 가 손상되었습니다: {d}")
+        if sys.byteorder == "little":
+            view = memoryview(index)
+            self._offsets = view.cast("Q")
+            self._views = [self._offsets, view]
+        else:
+            n = len(index) // 8
+            self._offsets = struct.unpack(f"<{n}Q", index[:n * 8])
+
+    def _map(self, path):
+        f = open(path, "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(m)
+        return m
+
+    def __len__(self):
+        return len(self._offsets) // 2
+
+    def _check(self, p):
+        if p < 0 or p >= len(self):
+            raise IndexError(f"page {p} out of range (0..{len(self) - 1})")
+
+    def has_page(self, p: int) -> bool:
+        self._check(p)
+        return self._offsets[2 * p] != _MISSING
+
+    def has_range(self, start: int, end: int) -> bool:
+        """start~end(포함) 페이지가 모두 추출되어 있으면 True"""
+        if start < 0 or end >= len(self):
+            return False
+        return all(self._offsets[2 * p] != _MISSING for p in range(start, end + 1))
+
+    def pages(self) -> list:
+        """store 에 들어 있는 페이지 번호 (0-based)"""
+        return [p for p in range(len(self)) if self._offsets[2 * p] != _MISSING]
+
+    def page_bytes(self, p: int) -> bytes:
+        if not self.has_page(p):
+            raise KeyError(f"page {p} 은 아직 store 에 없습니다")
+        return self._blob[self._offsets[2 * p]:self._offsets[2 * p + 1]]
+
+    def page_text(self, p: int) -> str:
+        return self.page_bytes(p).decode("utf-8")
+
+    def range_text(self, start: int, end: int) -> str:
+        """start~end(포함) 페이지 텍스트를 하나로 이어서 반환"""
+        self._check(start)
+        self._check(end)
+        parts = [self.page_bytes(p) for p in range(start, end + 1)]
+        return b"\n".join(x for x in parts if x).decode("utf-8")
+
+    def close(self):
+        # mmap 을 닫기 전에 offset 테이블의 memoryview 를 먼저 해제해야 한다
+        for v in self._views:
+            v.release()
+        self._views = []
+        for m in self._maps:
+            m.close()
+        for f in self._files:
+            f.close()
+        self._maps = []
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def range_text_or_none(out_root: str, start: int, end: int):
+    """start~end(포함) 텍스트. store 가 없거나 범위 중 추출하지 않은 페이지가 있으면 None"""
+    try:
+        with PageStore(out_root) as store:
+            if not store.has_range(start, end):
+                return None
+            return store.range_text(start, end)
+    except (OSError, RuntimeError):
+        return None
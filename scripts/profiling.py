@@ -0,0 +1,175 @@
+# profiling.py
+# -*- coding: utf-8 -*-
+"""
+Opt-in per-page profiling
+
+특정 교재의 추출이 느릴 때, 시간이 page.get_text("dict"), page.get_drawings(),
+pix.save 중 어디에 쓰이는지 페이지 단위로 확인하기 위한 프로파일러.
+
+  mode="deterministic"  cProfile (정확하지만 오버헤드가 큼)
+  mode="sampled"        별도 스레드가 interval 마다 스택을 샘플링 (오버헤드 작음)
+
+sampled 의 한계: 샘플러도 파이썬 스레드라서 대상 스레드가 GIL 을 쥔 채 C 호출
+(fitz get_text/get_drawings/get_pixmap) 안에 있는 동안에는 돌지 못한다. 그런 구간은
+샘플이 적게 잡히거나 C 호출이 끝난 뒤의 프레임으로 잡힌다. 보고서에 이 주의 문구와
+페이지별 sample_coverage(샘플 수 × interval / 페이지 시간)를 남기니, coverage 가 낮은
+페이지는 deterministic(cProfile) 으로 C 호출 시간을 다시 확인한다.
+
+페이지 시간이 중앙값의 outlier_factor 배를 넘는 페이지만 프로파일을 파일로 남긴다:
+
+  <chapter_dir>/_profile/profile_outliers.json
+  <chapter_dir>/_profile/p0123.prof        (deterministic, pstats 로 열기)
+  <chapter_dir>/_profile/p0123.folded      (sampled, flamegraph collapsed 형식)
+
+extract_one_chapter(profile="sampled") 또는 환경변수 LECTURENOTE_PROFILE=sampled 로 켠다.
+"""
+import os
+import sys
+import json
+import time
+import cProfile
+import statistics
+import threading
+from contextlib import contextmanager
+
+MODES = ("deterministic", "sampled")
+ENV_VAR = "LECTURENOTE_PROFILE"
+
+
+SAMPLED_NOTE = (
+    "sampled 프로파일은 파이썬 스레드에서 sys._current_frames() 로 샘플링한다. "
+    "대상 스레드가 GIL 을 쥔 C 호출(fitz get_text/get_drawings/get_pixmap) 중에는 샘플러가 돌지 못해 "
+    "그 구간은 적게 잡히거나 다른 프레임으로 잡힌다. sample_coverage 가 낮은 페이지는 "
+    "LECTURENOTE_PROFILE=deterministic 으로 C 호출 시간을 확인할 것."
+)
+
+
+class _StackSampler:
+    """
+    대상 스레드의 호출 스택을 interval 마다 모아 collapsed stack 카운트로 만든다.
+    GIL 을 쥔 C 호출 중에는 샘플을 뜨지 못한다 (SAMPLED_NOTE 참고).
+    """
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class PageProfiler:
+    def __init__(self, mode="sampled", outlier_factor=3.0, min_seconds=0.05, interval=0.002):
+        if mode not in MODES:
+            raise ValueError(f"profile mode must be one of {MODES}: {mode}")
+        self.mode = mode
+        self.outlier_factor = outlier_factor
+        self.min_seconds = min_seconds
+        self.interval = interval
+        self.pages = []  # [(page_number, seconds, profile)]
+
+    @contextmanager
+    def page(self, page_number):
+        if self.mode == "deterministic":
+            prof = cProfile.Profile()
+            t0 = time.perf_counter()
+            prof.enable()
+            try:
+                yield
+            finally:
+                prof.disable()
+                self.pages.append((page_number, time.perf_counter() - t0, prof))
+        else:
+            sampler = _StackSampler(threading.get_ident(), self.interval)
+            t0 = time.perf_counter()
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                self.pages.append((page_number, time.perf_counter() - t0, sampler.counts))
+
+    def outliers(self):
+        """(median, [(page_number, seconds, profile), ...]) — 중앙값의 outlier_factor 배를 넘는 페이지"""
+        if not self.pages:
+            return 0.0, []
+        median = statistics.median(sec for _, sec, _ in self.pages)
+        limit = max(median * self.outlier_factor, self.min_seconds)
+        return median, [p for p in self.pages if p[1] > limit]
+
+    def write(self, out_dir):
+        """outlier 페이지 프로파일과 요약을 out_dir 에 기록하고 요약 dict 를 반환"""
+        median, outliers = self.outliers()
+        report = {
+            "mode": self.mode,
+            "pages": len(self.pages),
+            "median_sec": round(median, 5),
+            "outlier_factor": self.outlier_factor,
+        }
+        if self.mode == "sampled":
+            report["interval_sec"] = self.interval
+            report["note"] = SAMPLED_NOTE
+        report["outliers"] = []
+
+        if outliers:
+            os.makedirs(out_dir, exist_ok=True)
+        for page_number, sec, prof in outliers:
+            if self.mode == "deterministic":
+                fname = f"p{page_number:04d}.prof"
+                prof.dump_stats(os.path.join(out_dir, fname))
+            else:
+                fname = f"p{page_number:04d}.folded"
+                with open(os.path.join(out_dir, fname), "w", encoding="utf-8") as f:
+                    for stack, n in sorted(prof.items(), key=lambda kv: -kv[1]):
+                        f.write(f"{stack} {n}\n")
+            entry = {
+                "page_number": page_number,
+                "sec": round(sec, 5),
+                "x_median": round(sec / median, 2) if median else None,
+                "file": fname,
+            }
+            if self.mode == "sampled":
+                # 1.0 에 가까우면 interval 마다 샘플이 잡힌 것, 낮으면 GIL 을 쥔 C 호출 구간이 길다
+                entry["sample_coverage"] = round(min(sum(prof.values()) * self.interval / sec, 1.0), 3) if sec else None
+            report["outliers"].append(entry)
+
+        if outliers:
+            with open(os.path.join(out_dir, "profile_outliers.json"), "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+
+def make_profiler(profile):
+    """profile 인자(None/모드 이름/PageProfiler) 또는 환경변수로 profiler 를 만든다"""
+    if isinstance(profile, PageProfiler):
+        return profile
+    mode = profile or os.environ.get(ENV_VAR)
+    return PageProfiler(mode) if mode else None
+
+
+@contextmanager
+def page_scope(profiler, page_number):
+    if profiler is None:
+        yield
+    else:
+        with profiler.page(page_number):
+            yield
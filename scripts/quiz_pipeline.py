@@ -2,12 +2,13 @@
 # -*- coding: utf-8 -*-
 import os
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+import scripts.condense as condense
+import scripts.instrument as instrument
+import scripts.llm_client as llm_client
+import scripts.text_index as text_index
 
+QUIZ_TEXT_CHARS = 8000  # 프롬프트에 넣을 본문 최대 길이 (넘으면 색인에서 관련 문단을 고름)
 
 DOMAIN_RULES = {
     "it": (
@@ -38,7 +39,7 @@ def _build_prompt(domain: str, chapter_text: str, captions: list, num_q: int = 6
     rules = DOMAIN_RULES.get(domain, DOMAIN_RULES["default"])
 
     # NFR: 텍스트 길이/캡션 제한
-    chapter_text = (chapter_text or "")[:8000]
+    chapter_text = (chapter_text or "")[:QUIZ_TEXT_CHARS]
     captions = captions[:10]
 
     caption_block = "\n".join([f"- {c}" for c in captions]) if captions else "없음"
@@ -73,35 +74,63 @@ def _build_prompt(domain: str, chapter_text: str, captions: list, num_q: int = 6
     return prompt
 
 
-def generate_quiz(chapter_dir: str, domain: str = "default", chapter_text: str = "", images: list = None, num_questions: int = 6) -> str:
+def generate_quiz(chapter_dir: str, domain: str = "default", chapter_text: str = "", images: list = None, num_questions: int = 6,
+                  condense_ratio: float = None) -> str:
     """Generate quiz HTML string using LLM.
 
     Args:
-        chapter_dir: directory for context (not used to read files here)
+        chapter_dir: chapter directory (used to look up the local text index)
         domain: one of math/it/biz/default
-        chapter_text: raw chapter text (will be truncated to <=8000 chars)
+        chapter_text: raw chapter text (if longer than 8000 chars, passages related to
+            the captions are retrieved from the text index; otherwise truncated)
         images: list of caption strings
         num_questions: desired number of questions (5-8 recommended)
+        condense_ratio: if set (0~1], condense the chapter offline (TextRank) to about
+            that share of characters before prompting. Uses chapter_dir/chapter.json like the
+            explanation pipeline, so figure local_text and code blocks are kept the same way
 
     Returns:
         HTML string containing the quiz page
     """
+    times = {}
     captions = images or []
-    prompt = _build_prompt(domain, chapter_text, captions, num_q=min(max(5, num_questions), 8))
+    condense_report = None
+    if condense_ratio and chapter_text:
+        # 해설서와 같은 본문이 남도록 chapter.json 으로 줄인다 (local_text·코드 블록 보호)
+        chapter_json = os.path.join(chapter_dir, "chapter.json")
+        with instrument.timed(times, "condense"):
+            if os.path.isfile(chapter_json):
+                with open(chapter_json, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                chapter_text, condense_report = condense.condense_chapter(data, condense_ratio, QUIZ_TEXT_CHARS)
+            else:
+                kept, condense_report = condense.condense_blocks(chapter_text.split("\n"), condense_ratio, captions,
+                                                                 max_chars=QUIZ_TEXT_CHARS)
+                chapter_text = "\n".join(kept)
+    with instrument.timed(times, "prompt_build"):
+        chapter_text = text_index.fit_text(chapter_dir, chapter_text or "", QUIZ_TEXT_CHARS, captions)
+        prompt = _build_prompt(domain, chapter_text, captions, num_q=min(max(5, num_questions), 8))
 
     # LLM 호출
-    res = client.chat.completions.create(
-        model="gpt-4.1",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "당신은 교육용 퀴즈를 HTML로 잘 만드는 전문가입니다. "
-                    "학생 친화적이고 간결한 문제와 해설을 생성하세요."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ],
+    with instrument.timed(times, "llm"):
+        res = llm_client.get_client().chat.completions.create(
+            model="gpt-4.1",
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "당신은 교육용 퀴즈를 HTML로 잘 만드는 전문가입니다. "
+                        "학생 친화적이고 간결한 문제와 해설을 생성하세요."
+                    ),
+                },
+                {"role": "user", "content": prompt},
+            ],
+        )
+
+    instrument.get_recorder().emit(
+        "chapter", stage="quiz", chapter=os.path.basename(os.path.normpath(chapter_dir)),
+        prompt_chars=len(prompt), times=times, usage=instrument.usage_dict(getattr(res, "usage", None)),
+        condense=condense_report,
     )
 
     quiz_html = res.choices[0].message.content
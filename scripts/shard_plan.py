@@ -0,0 +1,663 @@
+# shard_plan.py
+# -*- coding: utf-8 -*-
+"""
+Sharded library processing
+
+교재 수백 권을 여러 PC 에 나눠 추출/생성하고 결과를 하나의 출력 폴더로 합친다.
+
+  1) plan   PDF 들의 TOC 로 챕터(페이지 범위) 목록을 만들고, 예상 비용(페이지 수 + 그림 밀도)이
+            비슷하도록 N 개 shard 에 나눈 manifest 를 쓴다 (LPT: 큰 챕터부터 가장 가벼운 shard 에)
+  2) run    PC 마다 자기 shard 만 실행 (같은 추출/생성 코드). PDF 는 sha256 으로 확인하고,
+            결과 파일의 sha256 을 <shard 폴더>/shard.json 에 기록한다. 중간에 멈추면 이어서 실행.
+  3) merge  shard 폴더들을 검증(manifest 일치, 빠진 챕터, 파일 sha256)한 뒤 한 출력 폴더로 합치고
+            책별 검색 색인과 전체 목록(library.json)을 만든다.
+  local     한 PC 에서 shard 들을 프로세스 worker 로 동시에 실행하고 merge 까지 (테스트/소규모용)
+
+  python scripts/shard_plan.py plan D:/catalog --shards 8 -o manifest.json --explain
+  python scripts/shard_plan.py run manifest.json --shard 3 --out E:/shard_03 --pdf-root Z:/catalog
+  python scripts/shard_plan.py merge manifest.json E:/shard_00 E:/shard_01 ... --out D:/library
+  python scripts/shard_plan.py local manifest.json --workers 4 --work D:/shards --out D:/library
+
+출력 폴더: <root>/<책 이름>-<sha 8자리>/ 아래가 GUI 출력 폴더와 같은 구조 (chapter_XX/, _figures/, _pages/, _index/)
+"""
+import os
+import re
+import sys
+import json
+import time
+import heapq
+import shutil
+import hashlib
+import argparse
+import platform
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scripts.instrument as instrument
+
+MANIFEST_VERSION = 1
+SHARD_REPORT = "shard.json"
+LIBRARY_INDEX = "library.json"
+
+# 챕터 비용 추정 (단위: 캡션 없는 텍스트 페이지 하나).
+# 캡션이 있는 페이지는 도식 분석(get_drawings)과 렌더링을 하므로 몇 배 느리다 (bench_extraction 참고).
+PAGE_COST = 1.0
+CAPTION_PAGE_COST = 3.0
+IMAGE_COST = 0.5       # 삽입 이미지 하나 (스트림 추출/저장)
+SAMPLE_PAGES = 12      # 챕터마다 캡션/이미지를 세어 볼 페이지 수 (고르게 표본 추출)
+
+
+class MergeError(RuntimeError):
+    def __init__(self, problems):
+        super().__init__(f"{len(problems)} problem(s): " + "; ".join(problems[:5]))
+        self.problems = problems
+
+
+def _log(msg):
+    print(f"{time.strftime('%H:%M:%S')} [shard] {msg}", flush=True)
+
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _digest(path):
+    return {"sha256": _sha256_file(path), "bytes": os.path.getsize(path)}
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def manifest_hash(manifest: dict) -> str:
+    """shard 결과가 같은 plan 에서 나왔는지 확인하는 데 쓰는 manifest 내용 해시"""
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def book_dir_name(name: str, sha256: str) -> str:
+    stem = re.sub(r"[^\w\-]+", "_", os.path.splitext(name)[0]).strip("_")[:60] or "book"
+    return f"{stem}-{sha256[:8]}"
+
+
+# ---------------------------------------------------------
+# plan
+# ---------------------------------------------------------
+def estimate_chapter(doc, start: int, end: int) -> dict:
+    """표본 페이지의 캡션/삽입 이미지 수로 챕터 추출 비용을 추정"""
+    import scripts.extract_chapter as extract_chapter
+
+    pages = end - start + 1
+    step = max(pages / SAMPLE_PAGES, 1)
+    sample = sorted({start + int(i * step) for i in range(min(pages, SAMPLE_PAGES))})
+    caption_pages = images = 0
+    for p in sample:
+        page = doc.load_page(p)
+        if any(extract_chapter._is_caption_text(line) for line in page.get_text("text").splitlines()):
+            caption_pages += 1
+        images += len(page.get_images(full=False))
+
+    caption_ratio = caption_pages / len(sample)
+    images_per_page = images / len(sample)
+    cost = pages * (PAGE_COST + CAPTION_PAGE_COST * caption_ratio + IMAGE_COST * images_per_page)
+    return {"pages": pages, "caption_ratio": round(caption_ratio, 3),
+            "images_per_page": round(images_per_page, 3), "cost": round(cost, 2)}
+
+
+def scan_book(path: str, source_root: str, levels: int = 1):
+    """PDF 하나 → (book dict, 챕터 단위 목록). TOC 가 없으면 문서 전체가 한 챕터."""
+    import fitz  # PyMuPDF
+    import scripts.extract_chapter as extract_chapter
+
+    sha = _sha256_file(path)
+    name = os.path.basename(path)
+    book = {
+        "id": sha[:16],
+        "sha256": sha,
+        "name": name,
+        "path": os.path.relpath(path, source_root).replace(os.sep, "/"),
+        "dir": book_dir_name(name, sha),
+    }
+    with fitz.open(path) as doc:
+        book["page_count"] = doc.page_count
+        chapters, book["toc"] = extract_chapter.chapters_for(doc, os.path.splitext(name)[0], levels)
+        units = []
+        for chapter in chapters:
+            start, end = chapter["start"], chapter["end"]
+            units.append(dict(estimate_chapter(doc, start, end), book=book["id"], chapter=chapter))
+    return book, units
+
+
+def balance(units, n_shards: int):
+    """LPT: 비용이 큰 단위부터 현재 가장 가벼운 shard 에 넣는다. 각 shard 는 원래 순서(책, 챕터)로 정렬."""
+    heap = [(0.0, k) for k in range(n_shards)]
+    assigned = [[] for _ in range(n_shards)]
+    for u in sorted(units, key=lambda u: -u["cost"]):
+        cost, k = heapq.heappop(heap)
+        assigned[k].append(u)
+        heapq.heappush(heap, (cost + u["cost"], k))
+
+    order = {id(u): i for i, u in enumerate(units)}
+    shards = []
+    for k, us in enumerate(assigned):
+        us.sort(key=lambda u: order[id(u)])
+        shards.append({
+            "id": k,
+            "cost": round(sum(u["cost"] for u in us), 2),
+            "pages": sum(u["pages"] for u in us),
+            "units": us,
+        })
+    return shards
+
+
+def _find_pdfs(inputs):
+    out = []
+    for p in inputs:
+        if os.path.isdir(p):
+            for root, _, files in os.walk(p):
+                out += [os.path.join(root, n) for n in files if n.lower().endswith(".pdf")]
+        elif p.lower().endswith(".pdf"):
+            out.append(p)
+    return sorted(os.path.abspath(p) for p in out)
+
+
+def plan(inputs, n_shards: int, options: dict, levels: int = 1, workers: int = None) -> dict:
+    pdfs = _find_pdfs(inputs)
+    if not pdfs:
+        raise ValueError("PDF 가 없습니다.")
+    source_root = os.path.commonpath([os.path.dirname(p) for p in pdfs])
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers or max((os.cpu_count() or 2) - 1, 1), mp_context=ctx) as pool:
+        scanned = list(pool.map(scan_book, pdfs, [source_root] * len(pdfs), [levels] * len(pdfs)))
+
+    books, units, seen = [], [], set()
+    for book, book_units in scanned:
+        if book["id"] in seen:  # 같은 PDF 사본
+            continue
+        seen.add(book["id"])
+        books.append(book)
+        units += book_units
+
+    return {
+        "version": MANIFEST_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source_root": source_root,
+        "options": options,
+        "levels": levels,
+        "books": books,
+        "shards": balance(units, max(1, min(n_shards, len(units)))),
+    }
+
+
+def format_plan(manifest: dict) -> str:
+    shards = manifest["shards"]
+    costs = [s["cost"] for s in shards]
+    mean = sum(costs) / len(costs)
+    lines = [f"[plan] 책 {len(manifest['books'])}권, 챕터 {sum(len(s['units']) for s in shards)}, shard {len(shards)}"]
+    for s in shards:
+        lines.append(f"  shard {s['id']:3d}: 챕터 {len(s['units']):4d}, 페이지 {s['pages']:6d}, 비용 {s['cost']:9.1f}")
+    if mean:
+        lines.append(f"  불균형 (최대/평균 비용): {max(costs) / mean:.3f}")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------
+# run (shard 하나)
+# ---------------------------------------------------------
+def _unit_id(unit):
+    return f"{unit['book']}/{unit['chapter']['dir_name']}"
+
+
+def _unit_files(book_dir, dir_name):
+    """챕터 폴더 파일 digest (책 폴더 기준 경로) + chapter.json 이 참조하는 공유 그림 이름"""
+    files, figures = {}, []
+    chap = os.path.join(book_dir, dir_name)
+    for root, _, names in os.walk(chap):
+        for n in names:
+            if n.endswith(".tmp") or n == "_pages.spool.jsonl":
+                continue
+            p = os.path.join(root, n)
+            files[os.path.relpath(p, book_dir).replace(os.sep, "/")] = _digest(p)
+    data = _read_json(os.path.join(chap, "chapter.json"))
+    for img in data.get("images", []):
+        rel = os.path.relpath(os.path.normpath(os.path.join(chap, img["file"])), book_dir).replace(os.sep, "/")
+        if rel.startswith("_figures/"):
+            figures.append(rel)
+    return files, sorted(set(figures))
+
+
+def _verify(base, files):
+    """[(경로, 문제)] — 없거나 sha256 이 다른 파일"""
+    problems = []
+    for rel, d in files.items():
+        path = os.path.join(base, rel)
+        if not os.path.isfile(path):
+            problems.append((rel, "missing"))
+        elif os.path.getsize(path) != d["bytes"] or _sha256_file(path) != d["sha256"]:
+            problems.append((rel, "sha256 mismatch"))
+    return problems
+
+
+def _tree_digests(base, sub):
+    out = {}
+    d = os.path.join(base, sub)
+    if os.path.isdir(d):
+        for root, _, names in os.walk(d):
+            for n in names:
+                if n.endswith(".tmp") or n == ".lock":
+                    continue
+                p = os.path.join(root, n)
+                out[os.path.relpath(p, base).replace(os.sep, "/")] = _digest(p)
+    return out
+
+
+def run_shard(manifest: dict, shard_id: int, out_dir: str, pdf_root: str = None, llm_workers: int = 4) -> dict:
+    """
+    shard 하나의 챕터들을 추출(+생성)하고 <out_dir>/shard.json 을 쓴다.
+    같은 manifest 로 이미 끝난 챕터는 파일이 그대로면 건너뛴다.
+    """
+    import fitz  # PyMuPDF
+    import scripts.extract_chapter as extract_chapter
+    import scripts.text_index as text_index
+    import scripts.generation as generation
+
+    shard = manifest["shards"][shard_id]
+    opts = manifest["options"]
+    books = {b["id"]: b for b in manifest["books"]}
+    mh = manifest_hash(manifest)
+    report_path = os.path.join(out_dir, SHARD_REPORT)
+
+    report = None
+    if os.path.exists(report_path):
+        report = _read_json(report_path)
+        if report.get("manifest") != mh or report.get("shard") != shard_id:
+            raise ValueError(f"{out_dir} 에는 다른 manifest/shard 결과가 있습니다.")
+    if report is None:
+        report = {"manifest": mh, "shard": shard_id, "units": {}, "books": {}}
+    report.update(host=platform.node(), started=time.time(), finished=None)
+
+    def save():
+        _write_json(report_path, report)
+
+    by_book = {}
+    for u in shard["units"]:
+        by_book.setdefault(u["book"], []).append(u)
+
+    t0 = time.perf_counter()
+    for book_id, units in by_book.items():
+        book = books[book_id]
+        book_dir = os.path.join(out_dir, book["dir"])
+        todo = []
+        for u in units:
+            prev = report["units"].get(_unit_id(u))
+            if prev and prev["status"] == "done" and not _verify(book_dir, prev["files"]):
+                continue
+            todo.append(u)
+        if not todo:
+            continue
+
+        pdf = os.path.join(pdf_root or manifest["source_root"], book["path"])
+        if not os.path.isfile(pdf) or _sha256_file(pdf) != book["sha256"]:
+            err = f"PDF 가 없거나 내용이 다릅니다: {pdf}"
+            for u in todo:
+                report["units"][_unit_id(u)] = {"status": "failed", "error": err}
+            save()
+            _log(f"shard {shard_id}: {err}")
+            continue
+
+        _log(f"shard {shard_id}: {book['name']} 챕터 {len(todo)}개")
+        os.makedirs(book_dir, exist_ok=True)
+        instrument.start_run(os.path.join(book_dir, "_runs"), f"shard{shard_id:03d}")
+        try:
+            with fitz.open(pdf) as doc:
+                for u in todo:
+                    try:
+                        extract_chapter.extract_one_chapter(
+                            doc, u["chapter"], book_dir, domain=opts["domain"], ocr=opts["ocr"],
+                            figure_store_dir=os.path.join(book_dir, "_figures"),
+                            memory_limit_mb=opts["memory_limit_mb"],
+                        )
+                        report["units"][_unit_id(u)] = {"status": "extracted"}
+                    except RuntimeError as e:
+                        report["units"][_unit_id(u)] = {"status": "failed", "error": str(e)}
+                    save()
+        finally:
+            instrument.finish_run()
+
+        extracted = [u for u in todo if report["units"][_unit_id(u)]["status"] == "extracted"]
+        stages = [s for s in ("explain", "quiz") if opts.get(s)]
+        if stages and extracted:
+            # 프롬프트 본문 선택용 (이 shard 챕터만, merge 때 전체로 다시 만든다)
+            with text_index.TextIndex(text_index.index_path(book_dir)) as idx:
+                idx.update_all(book_dir)
+
+            def generate(u):
+                name = u["chapter"]["dir_name"]
+                for stage in stages:
+                    stage_opts = dict(generation.DEFAULT_OPTIONS[stage], domain=opts["domain"])
+                    try:
+                        generation.RUNNERS[stage](f"shard{shard_id:03d}-{stage}-{name}", book_dir, name, stage_opts)
+                    except Exception as e:  # 생성 실패는 그 챕터만
+                        return f"{stage}: {type(e).__name__}: {e}"
+                return None
+
+            with ThreadPoolExecutor(llm_workers) as pool:
+                errors = dict(zip(map(_unit_id, extracted), pool.map(generate, extracted)))
+        else:
+            errors = {}
+
+        for u in extracted:
+            uid = _unit_id(u)
+            files, figures = _unit_files(book_dir, u["chapter"]["dir_name"])
+            status = "failed" if errors.get(uid) else "done"
+            report["units"][uid] = {"status": status, "error": errors.get(uid), "files": files, "figures": figures}
+
+        # 책 단위 공유 파일 (그림/페이지 store 는 챕터마다 커지므로 마지막 상태를 기록)
+        report["books"][book_id] = {
+            "figures": _tree_digests(book_dir, "_figures"),
+            "page_store": _tree_digests(book_dir, "_pages"),
+        }
+        save()
+
+    report["finished"] = time.time()
+    report["elapsed_sec"] = round(time.perf_counter() - t0, 3)
+    save()
+    done = sum(1 for u in shard["units"] if report["units"].get(_unit_id(u), {}).get("status") == "done")
+    _log(f"shard {shard_id}: 완료 {done}/{len(shard['units'])}")
+    return report
+
+
+def run_shard_file(manifest_path, shard_id, out_dir, pdf_root=None, llm_workers=4):
+    """프로세스 worker 용 (manifest 는 경로로 넘긴다)"""
+    run_shard(_read_json(manifest_path), shard_id, out_dir, pdf_root, llm_workers)
+    return shard_id
+
+
+# ---------------------------------------------------------
+# merge
+# ---------------------------------------------------------
+def _merge_figure_stores(sources, dst_root):
+    """
+    책 하나의 shard 별 figure store 들을 dst_root 하나로 합친다. sources: [(shard id, shard 책 폴더, 그림 digest)]
+    같은 키라도 내용(sha256)이 다른 파일은 "<key>-<sha 8자리>" 키로 따로 둔다 (다른 shard 챕터가 검증받은 그림이
+    바뀌지 않게). 반환: {shard id: {원래 파일 이름: (새 키, 새 파일 이름)}}
+    """
+    index, placed, renames = {}, {}, {}
+    for k, src_book, digests in sources:
+        src_index = os.path.join(src_book, "_figures", "index.json")
+        if not os.path.exists(src_index):
+            continue
+        for key, entry in _read_json(src_index).get("figures", {}).items():
+            dig = digests.get(f"_figures/{entry['file']}")
+            if dig is None:
+                continue
+            new_key, new_file = key, entry["file"]
+            if placed.get(key, dig["sha256"]) != dig["sha256"]:
+                new_key = f"{key}-{dig['sha256'][:8]}"
+                new_file = new_key + os.path.splitext(entry["file"])[1]
+                renames.setdefault(k, {})[entry["file"]] = (new_key, new_file)
+            if new_key in index:
+                index[new_key]["refs"] = index[new_key].get("refs", 0) + entry.get("refs", 0)
+                continue
+            placed[new_key] = dig["sha256"]
+            index[new_key] = dict(entry, file=new_file)
+            _copy(os.path.join(src_book, "_figures", entry["file"]), os.path.join(dst_root, new_file))
+    if index:
+        _write_json(os.path.join(dst_root, "index.json"), {"figures": index})
+    return renames
+
+
+def _rewrite_figure_refs(path, renames):
+    """복사한 챕터 파일(chapter.json, html)의 공유 그림 참조를 merge 에서 바뀐 이름으로"""
+    if os.path.basename(path) == "chapter.json":
+        data = _read_json(path)
+        for img in data.get("images", []):
+            head, _, name = img.get("file", "").rpartition("/")
+            if head.endswith("_figures") and name in renames:
+                img["phash"], new_file = renames[name]
+                img["file"] = f"{head}/{new_file}"
+        _write_json(path, data)
+    elif path.endswith(".html"):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        for old, (_, new_file) in renames.items():
+            text = text.replace(f"_figures/{old}", f"_figures/{new_file}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def _copy(src, dst):
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    shutil.copy2(src, dst)
+
+
+def merge(manifest: dict, shard_dirs, out_root: str, allow_partial: bool = False) -> dict:
+    """
+    shard 결과를 검증하고 out_root 로 합친다. 문제가 있으면 (allow_partial 이 아니면)
+    아무것도 쓰지 않고 MergeError. 반환: {"units", "merged", "missing", "problems", ...}
+    """
+    import scripts.page_store as page_store
+    import scripts.text_index as text_index
+
+    mh = manifest_hash(manifest)
+    books = {b["id"]: b for b in manifest["books"]}
+    problems = []
+
+    reports = {}
+    for d in shard_dirs:
+        path = os.path.join(d, SHARD_REPORT)
+        if not os.path.exists(path):
+            problems.append(f"{d}: {SHARD_REPORT} 없음")
+            continue
+        r = _read_json(path)
+        if r.get("manifest") != mh:
+            problems.append(f"{d}: 다른 manifest 의 결과")
+            continue
+        if r["shard"] in reports:
+            problems.append(f"{d}: shard {r['shard']} 중복")
+            continue
+        reports[r["shard"]] = (d, r)
+
+    # 챕터별 검증
+    accepted = []  # (shard id, shard 폴더, unit, unit 결과)
+    missing = []
+    for shard in manifest["shards"]:
+        if shard["id"] not in reports:
+            problems.append(f"shard {shard['id']} 결과 없음")
+            missing += [_unit_id(u) for u in shard["units"]]
+            continue
+        d, r = reports[shard["id"]]
+        for u in shard["units"]:
+            uid = _unit_id(u)
+            res = r["units"].get(uid)
+            if not res or res["status"] != "done":
+                missing.append(uid)
+                problems.append(f"{uid}: {res['error'] if res else '실행되지 않음'}")
+                continue
+            book_dir = os.path.join(d, books[u["book"]]["dir"])
+            bad = _verify(book_dir, res["files"])
+            known_figs = r["books"].get(u["book"], {}).get("figures", {})
+            bad += [(f, "not in figure store") for f in res.get("figures", []) if f not in known_figs]
+            if bad:
+                missing.append(uid)
+                problems += [f"{uid}: {rel} {why}" for rel, why in bad]
+                continue
+            accepted.append((shard["id"], d, u, res))
+
+    # 책 단위 공유 파일 검증 (page store 가 깨진 shard 는 합치지 않는다)
+    page_sources = {}  # book id → [검증된 shard 책 폴더]
+    for k, (d, r) in sorted(reports.items()):
+        for book_id, shared in r["books"].items():
+            book_dir = os.path.join(d, books[book_id]["dir"])
+            for rel, why in _verify(book_dir, shared["figures"]):
+                problems.append(f"shard {k} {books[book_id]['dir']}: {rel} {why}")
+            bad = _verify(book_dir, shared["page_store"])
+            problems += [f"shard {k} {books[book_id]['dir']}: {rel} {why}" for rel, why in bad]
+            if shared["page_store"] and not bad:
+                page_sources.setdefault(book_id, []).append(book_dir)
+
+    if problems and not allow_partial:
+        raise MergeError(problems)
+
+    # 복사: 그림 store → 챕터 폴더 (바뀐 그림 이름 반영) → page store
+    os.makedirs(out_root, exist_ok=True)
+    renames = {}  # (shard id, book id) → {원래 파일 이름: (새 키, 새 파일 이름)}
+    for book_id, book in books.items():
+        sources = [(k, os.path.join(d, book["dir"]), r["books"][book_id]["figures"])
+                   for k, (d, r) in sorted(reports.items()) if book_id in r["books"]]
+        merged = _merge_figure_stores(sources, os.path.join(out_root, book["dir"], "_figures"))
+        renames.update({(k, book_id): m for k, m in merged.items()})
+
+    for k, d, u, res in accepted:
+        book = books[u["book"]]
+        shard_renames = renames.get((k, u["book"]))
+        for rel in res["files"]:
+            dst = os.path.join(out_root, book["dir"], rel)
+            _copy(os.path.join(d, book["dir"], rel), dst)
+            if shard_renames:
+                _rewrite_figure_refs(dst, shard_renames)
+
+    # shard 마다 자기 챕터 페이지만 가진 page store 를 책 하나로 합친다
+    for book_id, src_books in page_sources.items():
+        page_store.merge_stores(os.path.join(out_root, books[book_id]["dir"]), src_books)
+
+    for k, (d, r) in sorted(reports.items()):
+        for book_id in r["books"]:
+            src_book = os.path.join(d, books[book_id]["dir"])
+            dst_book = os.path.join(out_root, books[book_id]["dir"])
+            runs = os.path.join(src_book, "_runs")
+            if os.path.isdir(runs):
+                for n in os.listdir(runs):
+                    _copy(os.path.join(runs, n), os.path.join(dst_book, "_runs", n))
+
+    # 책별 검색 색인 + 전체 목록
+    shard_of = {_unit_id(u): k for k in reports for u in manifest["shards"][k]["units"]}
+    merged_ids = {_unit_id(u) for _, _, u, _ in accepted}
+    library = {"manifest": mh, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "books": [], "missing": missing}
+    for book in manifest["books"]:
+        book_dir = os.path.join(out_root, book["dir"])
+        if os.path.isdir(book_dir):
+            with text_index.TextIndex(text_index.index_path(book_dir)) as idx:
+                idx.update_all(book_dir)
+        chapters = []
+        for shard in manifest["shards"]:
+            for u in shard["units"]:
+                if u["book"] != book["id"]:
+                    continue
+                name = u["chapter"]["dir_name"]
+                chap = os.path.join(book_dir, name)
+                chapters.append({
+                    "dir": name, "title": u["chapter"]["title"],
+                    "pages": [u["chapter"]["start"] + 1, u["chapter"]["end"] + 1],
+                    "shard": shard_of.get(_unit_id(u)), "merged": _unit_id(u) in merged_ids,
+                    "explanation": os.path.isfile(os.path.join(chap, "easy_explanation.html")),
+                    "quiz": os.path.isfile(os.path.join(chap, "quiz.html")),
+                })
+        chapters.sort(key=lambda c: c["pages"][0])
+        entry = {k: book[k] for k in ("id", "name", "dir", "sha256", "page_count", "toc")}
+        entry["chapters"] = chapters
+        library["books"].append(entry)
+    _write_json(os.path.join(out_root, LIBRARY_INDEX), library)
+
+    return {"units": sum(len(s["units"]) for s in manifest["shards"]), "merged": len(accepted),
+            "missing": missing, "problems": problems, "library": os.path.join(out_root, LIBRARY_INDEX)}
+
+
+def run_local(manifest_path, work_dir, out_root, workers=2, pdf_root=None, allow_partial=False):
+    """한 PC 에서 shard 들을 worker 프로세스로 동시에 실행한 뒤 merge"""
+    manifest = _read_json(manifest_path)
+    shard_dirs = [os.path.join(work_dir, f"shard_{s['id']:03d}") for s in manifest["shards"]]
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=ctx) as pool:
+        futures = [pool.submit(run_shard_file, os.path.abspath(manifest_path), s["id"], d, pdf_root)
+                   for s, d in zip(manifest["shards"], shard_dirs)]
+        for f in futures:
+            f.result()
+    return merge(manifest, shard_dirs, out_root, allow_partial)
+
+
+def _format_merge(result):
+    lines = [f"[merge] 챕터 {result['merged']}/{result['units']} 합침 → {result['library']}"]
+    for p in result["problems"][:20]:
+        lines.append(f"  ! {p}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="여러 PC 에 나눠 처리하는 shard 계획/실행/병합")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("plan", help="PDF 들로 shard manifest 만들기")
+    p.add_argument("inputs", nargs="+", help="PDF 파일 또는 폴더")
+    p.add_argument("--shards", type=int, required=True)
+    p.add_argument("-o", "--output", required=True, help="manifest JSON 경로")
+    p.add_argument("--levels", type=int, default=1, help="챕터로 나눌 TOC 깊이")
+    p.add_argument("--workers", type=int, help="계획할 때 PDF 를 읽는 프로세스 수")
+    p.add_argument("--domain", default="default")
+    p.add_argument("--ocr", action="store_true")
+    p.add_argument("--memory-limit-mb", type=float)
+    p.add_argument("--explain", action="store_true", help="쉬운 해설서도 생성")
+    p.add_argument("--quiz", action="store_true", help="퀴즈도 생성")
+
+    r = sub.add_parser("run", help="shard 하나 실행")
+    r.add_argument("manifest")
+    r.add_argument("--shard", type=int, required=True)
+    r.add_argument("--out", required=True, help="이 shard 의 출력 폴더")
+    r.add_argument("--pdf-root", help="이 PC 에서 PDF 들이 있는 위치 (manifest 의 source_root 대신)")
+    r.add_argument("--llm-workers", type=int, default=4)
+
+    m = sub.add_parser("merge", help="shard 출력들을 검증하고 합치기")
+    m.add_argument("manifest")
+    m.add_argument("shard_dirs", nargs="+")
+    m.add_argument("--out", required=True)
+    m.add_argument("--allow-partial", action="store_true", help="문제가 있는 챕터는 빼고 합치기")
+
+    lo = sub.add_parser("local", help="한 PC 에서 worker 여러 개로 모든 shard 실행 + merge")
+    lo.add_argument("manifest")
+    lo.add_argument("--workers", type=int, default=2)
+    lo.add_argument("--work", required=True, help="shard 출력들을 둘 폴더")
+    lo.add_argument("--out", required=True)
+    lo.add_argument("--pdf-root")
+    lo.add_argument("--allow-partial", action="store_true")
+    args = ap.parse_args(argv)
+
+    try:
+        if args.command == "plan":
+            options = {"domain": args.domain, "ocr": args.ocr, "memory_limit_mb": args.memory_limit_mb,
+                       "explain": args.explain, "quiz": args.quiz}
+            manifest = plan(args.inputs, args.shards, options, args.levels, args.workers)
+            _write_json(args.output, manifest)
+            print(format_plan(manifest))
+        elif args.command == "run":
+            run_shard(_read_json(args.manifest), args.shard, args.out, args.pdf_root, args.llm_workers)
+        elif args.command == "merge":
+            print(_format_merge(merge(_read_json(args.manifest), args.shard_dirs, args.out, args.allow_partial)))
+        elif args.command == "local":
+            print(_format_merge(run_local(args.manifest, args.work, args.out, args.workers, args.pdf_root,
+                                          args.allow_partial)))
+    except MergeError as e:
+        for problem in e.problems[:50]:
+            print(f"  ! {problem}", file=sys.stderr)
+        sys.exit(f"[merge] 검증 실패: 문제 {len(e.problems)}건 (--allow-partial 로 나머지만 합칠 수 있음)")
+    except ValueError as e:
+        sys.exit(f"[shard] {e}")
+
+
+if __name__ == "__main__":
+    main()
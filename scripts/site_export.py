@@ -0,0 +1,459 @@
+# site_export.py
+# -*- coding: utf-8 -*-
+"""
+Static site export
+
+출력 폴더의 챕터별 쉬운 해설서/퀴즈 페이지를 책 단위 정적 사이트로 묶는다.
+
+  <output>/_site/index.html                        책 목차 (챕터별 해설서/퀴즈 링크)
+  <output>/_site/assets/explanation.<hash>.css     공유 스타일시트 (내용 해시 파일 이름 → 오래 캐시 가능)
+  <output>/_site/assets/fonts/<name>.<hash>.woff2  --font-dir 을 줬을 때만 (없으면 시스템 글꼴)
+  <output>/_site/img/<hash>-<폭>.webp              그림 폭별 썸네일 (srcset + loading="lazy")
+  <output>/_site/<챕터 폴더>/easy_explanation.html, quiz.html
+  *.gz, *.br                                       정적 서버용으로 미리 압축한 파일 (.br 은 brotli 설치 시)
+
+각 해설서에 들어 있던 <style> 과 원격 글꼴 @import 는 공유 CSS 링크로 바뀌고,
+3배율 원본 PNG 대신 폭에 맞는 WebP 썸네일을 브라우저가 골라 필요할 때 받는다.
+썸네일은 원본 내용 해시로 이름을 붙이므로 다시 내보낼 때 바뀐 그림만 새로 만든다.
+
+  python scripts/site_export.py <output> [--font-dir fonts] [--widths 480,960,1600]
+"""
+import os
+import re
+import sys
+import glob
+import gzip
+import json
+import time
+import hashlib
+import argparse
+from html import escape as html_escape
+
+from PIL import Image
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scripts.easy_explanation_pipeline as explanation_pipeline
+
+SITE_DIRNAME = "_site"
+PAGES = ("easy_explanation.html", "quiz.html")
+DEFAULT_WIDTHS = (480, 960, 1600)
+# .container 는 최대 800px, 좌우 padding 60px → 본문 폭 680px
+IMG_SIZES = "(max-width: 800px) 100vw, 680px"
+WEBP_QUALITY = 80
+COMPRESS_EXTS = {".html", ".css", ".js", ".json", ".svg", ".txt", ".ttf", ".otf"}
+FONT_EXTS = (".woff2", ".woff", ".ttf", ".otf")
+# 글꼴 파일 이름의 굵기 표기 → font-weight (Pretendard-SemiBold.woff2 → 600)
+FONT_WEIGHTS = (
+    ("extralight", 200), ("ultralight", 200), ("semibold", 600), ("demibold", 600),
+    ("extrabold", 800), ("ultrabold", 800), ("thin", 100), ("light", 300), ("medium", 500),
+    ("bold", 700), ("black", 900), ("heavy", 900),
+)
+
+_STYLE_BLOCK = re.compile(r"<style\b[^>]*>.*?</style>", re.S | re.I)
+_IMG_TAG = re.compile(r"<img\b[^>]*>", re.I)
+_ATTR = re.compile(r'([\w-]+)\s*=\s*("[^"]*"|\'[^\']*\')')
+_BODY_OPEN = re.compile(r"<body\b[^>]*>", re.I)
+
+
+def site_path(out_root: str) -> str:
+    return os.path.join(out_root, SITE_DIRNAME)
+
+
+def _hashed_name(stem: str, data: bytes, ext: str) -> str:
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def _write_if_changed(path: str, data: bytes) -> bool:
+    """내용이 같으면 쓰지 않는다 (mtime 유지 → 압축 파일도 다시 만들지 않음). 썼으면 True."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
+
+
+# ---------------------------------------------------------
+# 공유 CSS / 글꼴
+# ---------------------------------------------------------
+def _font_weight(name: str) -> int:
+    lower = name.lower()
+    for key, weight in FONT_WEIGHTS:
+        if key in lower:
+            return weight
+    return 400
+
+
+def build_stylesheet(site_dir: str, font_dir: str = None) -> str:
+    """
+    assets/ 아래에 해시 이름의 공유 CSS (와 글꼴)를 쓰고, 사이트 루트 기준 CSS 경로를 반환.
+    font_dir 이 없으면 원격 @import 없이 시스템 글꼴 스택만 쓴다 (오프라인에서도 바로 표시).
+    """
+    assets = os.path.join(site_dir, "assets")
+    faces = []
+    if font_dir:
+        for path in sorted(glob.glob(os.path.join(font_dir, "*"))):
+            ext = os.path.splitext(path)[1].lower()
+            if ext not in FONT_EXTS:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            stem = os.path.splitext(os.path.basename(path))[0]
+            name = _hashed_name(stem, data, ext)
+            _write_if_changed(os.path.join(assets, "fonts", name), data)
+            fmt = {".woff2": "woff2", ".woff": "woff", ".ttf": "truetype", ".otf": "opentype"}[ext]
+            faces.append(
+                "@font-face {\n"
+                "    font-family: Pretendard;\n"
+                f"    font-weight: {_font_weight(stem)};\n"
+                "    font-display: swap;\n"
+                f"    src: url('fonts/{name}') format('{fmt}');\n"
+                "}\n"
+            )
+
+    css = ("\n".join(faces) + "\n" if faces else "") + explanation_pipeline.EXPLANATION_CSS + SITE_CSS
+    data = css.encode("utf-8")
+    name = _hashed_name("explanation", data, ".css")
+    _write_if_changed(os.path.join(assets, name), data)
+
+    # 이전 내보내기에서 남은 CSS 정리
+    for old in glob.glob(os.path.join(assets, "explanation.*.css")):
+        if os.path.basename(old) != name:
+            os.remove(old)
+            for sibling in (old + ".gz", old + ".br"):
+                if os.path.exists(sibling):
+                    os.remove(sibling)
+    return f"assets/{name}"
+
+
+# 목차 페이지와 내비게이션용 (해설서 CSS 뒤에 붙인다)
+SITE_CSS = """
+.site-nav {
+    max-width: 800px;
+    margin: 0 auto 16px;
+    font-size: 0.95rem;
+}
+
+.site-nav a, .toc a {
+    color: var(--primary-color);
+    text-decoration: none;
+}
+
+.toc .pages {
+    color: #94a3b8;
+    font-size: 0.9rem;
+    margin-left: 8px;
+}
+
+.toc .links a {
+    margin-right: 12px;
+    font-size: 0.95rem;
+}
+"""
+
+
+# ---------------------------------------------------------
+# 썸네일
+# ---------------------------------------------------------
+class ThumbnailSet:
+    """원본 그림 → 폭별 WebP 썸네일. 원본 내용 해시로 이름을 붙여 챕터/내보내기 간 재사용한다."""
+
+    def __init__(self, site_dir: str, widths=DEFAULT_WIDTHS):
+        self.img_dir = os.path.join(site_dir, "img")
+        self.widths = sorted(set(int(w) for w in widths))
+        self._done = {}  # 원본 절대 경로 → [(폭, 높이, 파일 이름)]
+        self._used = set()
+        self.stats = {"images": 0, "written": 0, "source_bytes": 0, "thumb_bytes": 0}
+        os.makedirs(self.img_dir, exist_ok=True)
+
+    def get(self, src_path: str):
+        """[(폭, 높이, img/ 기준 파일 이름)] (폭 오름차순), 원본을 열 수 없으면 None"""
+        src_path = os.path.abspath(src_path)
+        if src_path in self._done:
+            return self._done[src_path]
+        try:
+            with open(src_path, "rb") as f:
+                data = f.read()
+            im = Image.open(src_path)
+            im.load()
+        except (OSError, ValueError):
+            self._done[src_path] = None
+            return None
+
+        key = hashlib.sha256(data).hexdigest()[:16]
+        ow, oh = im.size
+        # 원본보다 큰 폭은 만들지 않는다. 원본이 가장 큰 폭보다 작으면 원본 폭을 마지막 후보로.
+        # 원본이 가장 큰 폭보다 넓으면 그 폭이 두 번 들어가지 않도록 집합으로 모은다.
+        widths = sorted({w for w in self.widths if w < ow} | {min(ow, max(self.widths))})
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info or im.mode in ("LA", "PA") else "RGB")
+
+        out = []
+        for w in widths:
+            h = max(1, round(oh * w / ow))
+            name = f"{key}-{w}.webp"
+            path = os.path.join(self.img_dir, name)
+            if not os.path.exists(path):
+                thumb = im if w == ow else im.resize((w, h), Image.LANCZOS)
+                thumb.save(path, "WEBP", quality=WEBP_QUALITY, method=4)
+                self.stats["written"] += 1
+            self.stats["thumb_bytes"] += os.path.getsize(path)
+            out.append((w, h, name))
+            self._used.add(name)
+
+        self.stats["images"] += 1
+        self.stats["source_bytes"] += len(data)
+        self._done[src_path] = out
+        return out
+
+    def prune(self) -> int:
+        """이번 내보내기에서 쓰지 않은 썸네일 삭제, 지운 개수 반환"""
+        removed = 0
+        for name in os.listdir(self.img_dir):
+            if name not in self._used:
+                os.remove(os.path.join(self.img_dir, name))
+                removed += 1
+        return removed
+
+
+def _attrs(tag: str) -> dict:
+    return {k.lower(): v[1:-1] for k, v in _ATTR.findall(tag)}
+
+
+def rewrite_images(html: str, chapter_dir: str, thumbs: ThumbnailSet, img_prefix: str = "../img/") -> str:
+    """
+    <img src="(챕터 폴더 기준 경로)"> → 썸네일 srcset + loading="lazy" 태그.
+    원격/data URL 이나 찾을 수 없는 파일은 src 를 그대로 두고 lazy 속성만 붙인다.
+    """
+    def repl(m):
+        attrs = _attrs(m.group(0))
+        src = attrs.get("src", "")
+        variants = None
+        if src and not re.match(r"^(https?:|data:|//)", src, re.I):
+            variants = thumbs.get(os.path.join(chapter_dir, src.split("?")[0]))
+        if not variants:
+            tag = m.group(0)
+            if "loading" not in attrs:
+                tag = tag[:-1].rstrip("/ ") + ' loading="lazy">'
+            return tag
+
+        # 본문 폭(680px)을 덮는 가장 작은 후보를 기본 src 로 (srcset 을 모르는 환경용)
+        w, h, name = next((v for v in variants if v[0] >= 680), variants[-1])
+        srcset = ", ".join(f"{img_prefix}{n} {vw}w" for vw, _, n in variants)
+        alt = attrs.get("alt", "")
+        return (
+            f'<img src="{img_prefix}{name}" srcset="{srcset}" sizes="{IMG_SIZES}" '
+            f'width="{w}" height="{h}" alt="{alt}" loading="lazy" decoding="async">'
+        )
+
+    return _IMG_TAG.sub(repl, html)
+
+
+# ---------------------------------------------------------
+# 페이지
+# ---------------------------------------------------------
+def _nav(links) -> str:
+    return '<nav class="site-nav">' + " · ".join(f'<a href="{href}">{text}</a>' for href, text in links) + "</nav>"
+
+
+def export_page(src_path: str, dst_path: str, chapter_dir: str, thumbs: ThumbnailSet, css_href: str,
+                nav_links=()) -> bool:
+    """해설서/퀴즈 페이지 하나를 사이트용으로 바꿔 쓴다. 내용이 바뀌었으면 True."""
+    with open(src_path, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    link = f'<link rel="stylesheet" href="{css_href}">'
+    if os.path.basename(src_path) == "easy_explanation.html":
+        # 우리가 만든 페이지: 인라인 스타일(+원격 글꼴) → 공유 CSS
+        html = _STYLE_BLOCK.sub(lambda m: link, html, count=1)
+    else:
+        # LLM 이 만든 퀴즈 페이지: 자체 스타일은 두고 공유 CSS(내비게이션용)를 앞에 둔다
+        html = re.sub(r"</head>", link + "\n</head>", html, count=1, flags=re.I)
+
+    html = rewrite_images(html, chapter_dir, thumbs)
+    if nav_links:
+        html = _BODY_OPEN.sub(lambda m: m.group(0) + "\n" + _nav(nav_links), html, count=1)
+    return _write_if_changed(dst_path, html.encode("utf-8"))
+
+
+def _chapters(out_root: str):
+    """[(폴더 이름, chapter.json dict)] (폴더 이름 순, _ 로 시작하는 폴더 제외)"""
+    out = []
+    for name in sorted(os.listdir(out_root)):
+        path = os.path.join(out_root, name, "chapter.json")
+        if name.startswith("_") or not os.path.isfile(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data.pop("pages", None)  # 목차에는 필요 없음
+        out.append((name, data))
+    return out
+
+
+def render_index(title: str, entries, css_href: str) -> str:
+    """entries: [(폴더 이름, chapter dict, 있는 페이지 목록)]"""
+    body = ['<div class="container">', '<span class="badge">Book</span>', f"<h1>{html_escape(title)}</h1>"]
+    body.append('<ul class="toc">')
+    for name, data, pages in entries:
+        chap_title = html_escape(data.get("title") or name)
+        first = f"{name}/{pages[0]}" if pages else None
+        head = f'<a href="{first}">{chap_title}</a>' if first else chap_title
+        page_range = ""
+        if data.get("start_page"):
+            page_range = f'<span class="pages">p.{data["start_page"]}–{data.get("end_page", data["start_page"])}</span>'
+        links = []
+        if "easy_explanation.html" in pages:
+            links.append(f'<a href="{name}/easy_explanation.html">쉬운 해설서</a>')
+        if "quiz.html" in pages:
+            links.append(f'<a href="{name}/quiz.html">퀴즈</a>')
+        body.append(f'<li>{head}{page_range}<div class="links">{"".join(links)}</div></li>')
+    body.append("</ul>")
+    body.append("</div>")
+
+    html = [
+        "<!DOCTYPE html>", '<html lang="ko">', "<head>", '<meta charset="utf-8">',
+        '<meta name="viewport" content="width=device-width, initial-scale=1.0">',
+        f"<title>{html_escape(title)}</title>", f'<link rel="stylesheet" href="{css_href}">',
+        "</head>", "<body>", "\n".join(body), "</body>", "</html>",
+    ]
+    return "\n".join(html)
+
+
+# ---------------------------------------------------------
+# 미리 압축
+# ---------------------------------------------------------
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def precompress(site_dir: str) -> dict:
+    """
+    텍스트 파일마다 .gz (와 brotli 가 있으면 .br) 를 옆에 쓴다.
+    원본보다 오래된 압축 파일만 다시 만들고, 줄어들지 않으면 압축 파일을 두지 않는다.
+    """
+    brotli = _brotli()
+    stats = {"files": 0, "written": 0, "bytes": 0, "gz_bytes": 0, "br_bytes": 0, "brotli": brotli is not None}
+    for root, _, files in os.walk(site_dir):
+        for fname in files:
+            if os.path.splitext(fname)[1].lower() not in COMPRESS_EXTS:
+                continue
+            path = os.path.join(root, fname)
+            mtime = os.path.getmtime(path)
+            size = os.path.getsize(path)
+            stats["files"] += 1
+            stats["bytes"] += size
+
+            encoders = [(".gz", "gz_bytes", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                encoders.append((".br", "br_bytes", lambda d: brotli.compress(d, quality=11)))
+            data = None
+            for suffix, key, encode in encoders:
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+                    stats[key] += os.path.getsize(target)
+                    continue
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                packed = encode(data)
+                if len(packed) >= size:
+                    if os.path.exists(target):
+                        os.remove(target)
+                    stats[key] += size
+                    continue
+                with open(target, "wb") as f:
+                    f.write(packed)
+                stats["written"] += 1
+                stats[key] += len(packed)
+    return stats
+
+
+# ---------------------------------------------------------
+# 내보내기
+# ---------------------------------------------------------
+def export_site(out_root: str, site_dir: str = None, font_dir: str = None, widths=DEFAULT_WIDTHS,
+                title: str = None) -> dict:
+    """
+    out_root 의 챕터 페이지들을 site_dir (기본 <out_root>/_site) 로 내보내고 통계를 반환.
+    해설서도 퀴즈도 없는 챕터는 목차에 제목만 나온다.
+    """
+    t0 = time.perf_counter()
+    site_dir = site_dir or site_path(out_root)
+    os.makedirs(site_dir, exist_ok=True)
+    title = title or os.path.basename(os.path.normpath(os.path.abspath(out_root)))
+
+    css_href = build_stylesheet(site_dir, font_dir)
+    thumbs = ThumbnailSet(site_dir, widths)
+
+    entries = []
+    pages_written = 0
+    for name, data in _chapters(out_root):
+        chapter_dir = os.path.join(out_root, name)
+        present = [p for p in PAGES if os.path.isfile(os.path.join(chapter_dir, p))]
+        for page in present:
+            nav = [("../index.html", "← 목차")] + [(p, "퀴즈" if p == "quiz.html" else "쉬운 해설서")
+                                                  for p in present if p != page]
+            pages_written += export_page(
+                os.path.join(chapter_dir, page), os.path.join(site_dir, name, page), chapter_dir,
+                thumbs, "../" + css_href, nav,
+            )
+        entries.append((name, data, present))
+
+    index_path = os.path.join(site_dir, "index.html")
+    _write_if_changed(index_path, render_index(title, entries, css_href).encode("utf-8"))
+    thumbs.stats["pruned"] = thumbs.prune()
+    compress = precompress(site_dir)
+
+    return {
+        "site": site_dir,
+        "index": index_path,
+        "chapters": len(entries),
+        "pages": sum(len(p) for _, _, p in entries),
+        "pages_written": pages_written,
+        "css": css_href,
+        "images": thumbs.stats,
+        "compress": compress,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def format_stats(stats: dict) -> str:
+    img = stats["images"]
+    comp = stats["compress"]
+    lines = [
+        f"[site] {stats['index']}",
+        f"  챕터 {stats['chapters']}, 페이지 {stats['pages']} (갱신 {stats['pages_written']}), {stats['seconds']}s",
+        f"  그림 {img['images']}개: 원본 {img['source_bytes'] / 1024:.0f} KB → 썸네일 {img['thumb_bytes'] / 1024:.0f} KB "
+        f"(새로 만든 파일 {img['written']})",
+        f"  텍스트 {comp['files']}개 {comp['bytes'] / 1024:.0f} KB → gzip {comp['gz_bytes'] / 1024:.0f} KB"
+        + (f", brotli {comp['br_bytes'] / 1024:.0f} KB" if comp["brotli"] else " (brotli 미설치: .br 생략)"),
+    ]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="챕터 해설서/퀴즈를 책 단위 정적 사이트로 내보내기")
+    ap.add_argument("output", help="추출 출력 폴더")
+    ap.add_argument("--site", help=f"사이트 폴더 (기본: <output>/{SITE_DIRNAME})")
+    ap.add_argument("--font-dir", help="사이트에 같이 넣을 Pretendard 글꼴 파일 폴더 (woff2 등)")
+    ap.add_argument("--widths", default=",".join(str(w) for w in DEFAULT_WIDTHS), help="썸네일 폭 목록")
+    ap.add_argument("--title", help="목차 페이지 제목 (기본: 출력 폴더 이름)")
+    args = ap.parse_args(argv)
+
+    widths = [int(w) for w in args.widths.split(",") if w.strip()]
+    stats = export_site(args.output, args.site, args.font_dir, widths, args.title)
+    print(format_stats(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# text_index.py
+# -*- coding: utf-8 -*-
+"""
+Local full-text index (SQLite FTS5)
+
+추출된 chapter.json 들의 본문을 문단(passage) 단위로 FTS5 에 넣어 두고,
+프롬프트에 넣을 본문이 길 때 앞부분을 자르는 대신 캡션/제목/사용자 지시와
+관련 있는 문단을 BM25 순으로 골라 넣는다.
+
+  <output>/_index/text.sqlite
+
+  python scripts/text_index.py build <output>
+  python scripts/text_index.py query <output> "스택 push 연산" --chapter chapter_03
+
+chapter.json 의 sha256 이 바뀐 챕터만 다시 색인한다 (증분 갱신).
+
+한국어 어절은 조사가 붙어 있으므로("스택은", "스택의") unicode61 토크나이저로 어절을
+색인하고, 질의어는 끝의 조사를 떼어 prefix 검색("스택"*)으로 찾는다.
+"""
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+
+INDEX_DIRNAME = "_index"
+INDEX_FILE = "text.sqlite"
+PASSAGE_CHARS = 600   # 한 passage 로 합칠 최대 글자 수 (같은 페이지 블록끼리만)
+LEAD_CHARS = 2000     # 검색 결과와 별개로 항상 넣는 챕터 도입부 길이
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chapters (
+    dir TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    title TEXT,
+    passages INTEGER,
+    indexed_at REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+    text,
+    chapter UNINDEXED,
+    page UNINDEXED,
+    seq UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+_WORD = re.compile(r"\w+")
+# 질의어 끝에서 떼어낼 조사 (긴 것부터)
+_PARTICLES = ("으로", "에서", "에게", "까지", "부터", "은", "는", "이", "가", "을", "를", "의", "에", "와", "과", "로", "도", "만")
+_STOPWORDS = {"그림", "표", "figure", "fig", "table"}
+
+
+def index_path(out_root: str) -> str:
+    return os.path.join(out_root, INDEX_DIRNAME, INDEX_FILE)
+
+
+def _file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def query_terms(text: str):
+    """소문자화하고 끝의 조사를 뗀 단어 목록 (숫자, 한 글자, '그림'/'표' 등은 제외, 순서 유지)"""
+    terms = []
+    for w in _WORD.findall((text or "").lower()):
+        if w.isdigit():
+            continue
+        for p in _PARTICLES:
+            if len(w) > len(p) + 1 and w.endswith(p):
+                w = w[:-len(p)]
+                break
+        if len(w) < 2 or w in _STOPWORDS:
+            continue
+        terms.append(w)
+    return terms
+
+
+def to_match_query(text: str, max_terms: int = 12):
+    """
+    자유 텍스트(캡션, 제목, 지시문) → FTS5 MATCH 식. 쓸 만한 단어가 없으면 None.
+    '그림 3-2 스택의 push 연산' → '"스택"* OR "push"* OR "연산"*'
+    """
+    terms = list(dict.fromkeys(query_terms(text)))
+    if not terms:
+        return None
+    return " OR ".join(f'"{t}"*' for t in terms[:max_terms])
+
+
+def _passages_from_chapter(data):
+    """chapter.json → [(page_number, text)]; 같은 페이지의 블록을 PASSAGE_CHARS 까지 합친다"""
+    out = []
+    for page in data.get("pages", []):
+        buf = []
+        size = 0
+        for block in page.get("text_blocks", []):
+            if buf and size + len(block) > PASSAGE_CHARS:
+                out.append((page["page_number"], "\n".join(buf)))
+                buf, size = [], 0
+            buf.append(block)
+            size += len(block)
+        if buf:
+            out.append((page["page_number"], "\n".join(buf)))
+    return out
+
+
+class TextIndex:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -----------------------------------------------------
+    # 색인
+    # -----------------------------------------------------
+    def update_chapter(self, chapter_dir: str) -> str:
+        """chapter.json 이 바뀌었으면 다시 색인. 'added' / 'updated' / 'unchanged' 반환."""
+        name = os.path.basename(os.path.normpath(chapter_dir))
+        path = os.path.join(chapter_dir, "chapter.json")
+        sha = _file_sha256(path)
+
+        row = self._conn.execute("SELECT sha256 FROM chapters WHERE dir = ?", (name,)).fetchone()
+        if row and row[0] == sha:
+            return "unchanged"
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        passages = _passages_from_chapter(data)
+
+        with self._conn:
+            self._conn.execute("DELETE FROM passages WHERE chapter = ?", (name,))
+            self._conn.executemany(
+                "INSERT INTO passages (text, chapter, page, seq) VALUES (?, ?, ?, ?)",
+                [(text, name, page, seq) for seq, (page, text) in enumerate(passages)],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chapters (dir, sha256, title, passages, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (name, sha, data.get("title", ""), len(passages), time.time()),
+            )
+        return "updated" if row else "added"
+
+    def remove_chapter(self, name: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM passages WHERE chapter = ?", (name,))
+            self._conn.execute("DELETE FROM chapters WHERE dir = ?", (name,))
+
+    def update_all(self, out_root: str) -> dict:
+        """out_root 아래 chapter.json 이 있는 폴더를 모두 증분 색인, 사라진 폴더는 색인에서 제거"""
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        present = set()
+        for name in sorted(os.listdir(out_root)):
+            chapter_dir = os.path.join(out_root, name)
+            if not os.path.isfile(os.path.join(chapter_dir, "chapter.json")):
+                continue
+            present.add(name)
+            stats[self.update_chapter(chapter_dir)] += 1
+
+        for (name,) in self._conn.execute("SELECT dir FROM chapters").fetchall():
+            if name not in present:
+                self.remove_chapter(name)
+                stats["removed"] += 1
+        return stats
+
+    # -----------------------------------------------------
+    # 검색
+    # -----------------------------------------------------
+    def search(self, query: str, chapter: str = None, limit: int = 10):
+        """
+        자유 텍스트로 검색해 BM25 순 [{"chapter", "page_number", "seq", "text", "score"}] 반환.
+        score 는 작을수록(더 음수일수록) 관련도가 높다.
+        """
+        match = to_match_query(query)
+        if match is None:
+            return []
+        sql = "SELECT chapter, page, seq, text, bm25(passages) AS score FROM passages WHERE passages MATCH ?"
+        args = [match]
+        if chapter:
+            sql += " AND chapter = ?"
+            args.append(chapter)
+        sql += " ORDER BY score LIMIT ?"
+        args.append(limit)
+        return [
+            {"chapter": c, "page_number": p, "seq": s, "text": t, "score": round(score, 4)}
+            for c, p, s, t, score in self._conn.execute(sql, args)
+        ]
+
+    def passages(self, chapter: str):
+        """챕터의 모든 passage [(seq, page_number, text)] (원래 순서)"""
+        return self._conn.execute(
+            "SELECT seq, page, text FROM passages WHERE chapter = ? ORDER BY seq", (chapter,)
+        ).fetchall()
+
+
+# ---------------------------------------------------------
+# 프롬프트용 본문 고르기
+# ---------------------------------------------------------
+def select_passages(chapter_dir: str, queries, budget: int, lead_chars: int = LEAD_CHARS):
+    """
+    챕터 도입부(lead_chars) + 질의마다 관련도 높은 passage 를 번갈아 골라 budget 글자 안에서
+    원래 순서대로 이어 붙인 본문을 반환. 색인이 없거나 챕터가 색인되지 않았으면 None.
+    """
+    chapter_dir = os.path.abspath(chapter_dir)
+    path = index_path(os.path.dirname(chapter_dir))
+    if not os.path.exists(path):
+        return None
+    chapter = os.path.basename(chapter_dir)
+
+    with TextIndex(path) as idx:
+        all_passages = idx.passages(chapter)
+        if not all_passages:
+            return None
+        by_seq = {seq: (page, text) for seq, page, text in all_passages}
+        ranked = [[r["seq"] for r in idx.search(q, chapter=chapter, limit=20)] for q in queries if q]
+
+    chosen = set()
+    used = 0
+
+    def take(seq):
+        nonlocal used
+        size = len(by_seq[seq][1]) + 10  # "[p.123] " 표시 포함
+        if seq in chosen or used + size > budget:
+            return False
+        chosen.add(seq)
+        used += size
+        return True
+
+    for seq, _, text in all_passages:
+        if used + len(text) > lead_chars or not take(seq):
+            break
+
+    # 질의 하나가 budget 을 다 쓰지 않도록 순위별로 돌아가며 고른다
+    for rank in range(max((len(r) for r in ranked), default=0)):
+        for seqs in ranked:
+            if rank < len(seqs):
+                take(seqs[rank])
+
+    return "\n".join(f"[p.{by_seq[s][0]}] {by_seq[s][1]}" for s in sorted(chosen))
+
+
+def fit_text(chapter_dir: str, text: str, budget: int, queries=()):
+    """text 가 budget 보다 길면 색인에서 관련 passage 를 골라 대신 쓰고, 색인이 없으면 앞부분만 자른다"""
+    if len(text) <= budget:
+        return text
+    selected = select_passages(chapter_dir, queries, budget)
+    return selected if selected else text[:budget]
+
+
+# ---------------------------------------------------------
+# CLI
+# ---------------------------------------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="추출된 챕터 본문 전문 검색 색인 (SQLite FTS5)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="출력 폴더의 chapter.json 들을 (증분) 색인")
+    b.add_argument("output", help="추출 출력 폴더")
+
+    q = sub.add_parser("query", help="색인 검색")
+    q.add_argument("output", help="추출 출력 폴더")
+    q.add_argument("text", help="검색어 (자유 텍스트)")
+    q.add_argument("--chapter", help="챕터 폴더 이름으로 제한 (예: chapter_03)")
+    q.add_argument("--limit", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    path = index_path(args.output)
+    if args.command == "build":
+        with TextIndex(path) as idx:
+            stats = idx.update_all(args.output)
+        print(f"[index] {path}: 추가 {stats['added']}, 갱신 {stats['updated']}, "
+              f"유지 {stats['unchanged']}, 제거 {stats['removed']}")
+        return
+
+    if not os.path.exists(path):
+        sys.exit(f"색인이 없습니다: {path} (먼저 build 실행)")
+    with TextIndex(path) as idx:
+        results = idx.search(args.text, chapter=args.chapter, limit=args.limit)
+    for r in results:
+        snippet = r["text"].replace("\n", " ")
+        print(f"{r['chapter']} p.{r['page_number']} ({r['score']}): {snippet[:160]}")
+    if not results:
+        print("결과 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# thumbnails.py
+# -*- coding: utf-8 -*-
+"""
+Page thumbnail cache
+
+페이지 범위 미리보기용 저해상도 썸네일을 필요할 때만 렌더링하고,
+최근에 쓴 것부터 max_items 개까지만 메모리에 남긴다 (LRU).
+
+PyMuPDF Document 는 스레드 간 동시 사용이 안전하지 않으므로 렌더링은 lock 으로 직렬화한다.
+"""
+import threading
+from collections import OrderedDict
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+DEFAULT_WIDTH = 140  # 썸네일 가로 픽셀
+
+
+class ThumbnailCache:
+    def __init__(self, pdf_path: str, max_items: int = 64, width: int = DEFAULT_WIDTH):
+        self.pdf_path = pdf_path
+        self.max_items = max_items
+        self.width = width
+        self._doc = None
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # page_index -> PIL.Image
+
+    def get(self, page_index: int) -> Image.Image:
+        with self._lock:
+            img = self._cache.get(page_index)
+            if img is not None:
+                self._cache.move_to_end(page_index)
+                return img
+
+            if self._doc is None:
+                self._doc = fitz.open(self.pdf_path)
+            page = self._doc.load_page(page_index)
+            zoom = self.width / page.rect.width if page.rect.width else 0.2
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            del pix
+
+            self._cache[page_index] = img
+            while len(self._cache) > self.max_items:
+                self._cache.popitem(last=False)
+            return img
+
+    def close(self):
+        with self._lock:
+            self._cache.clear()
+            if self._doc is not None:
+                self._doc.close()
+                self._doc = None
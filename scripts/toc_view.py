@@ -0,0 +1,251 @@
+# toc_view.py
+# -*- coding: utf-8 -*-
+"""
+Virtualized TOC list
+
+목차 항목이 수천 개인 교재에서도 빠르게 그려지도록, 화면에 보이는 줄 수만큼의
+행 위젯만 만들어 두고 스크롤할 때 행에 표시할 항목만 바꿔 끼운다.
+
+선택/접기 상태는 위젯이 아니라 set 으로 관리한다:
+  selected   선택된 TOC index 집합
+  collapsed  하위 항목을 접은 TOC index 집합
+
+검색어 필터와 최대 레벨 필터를 지원한다.
+"""
+import tkinter as tk
+import customtkinter as ctk
+
+ROW_HEIGHT = 28
+LEVEL_CHOICES = ["전체", "1", "2", "3", "4"]
+
+
+class _Row:
+    def __init__(self, parent, on_toggle, on_check):
+        self.frame = ctk.CTkFrame(parent, height=ROW_HEIGHT, fg_color="transparent")
+        self.frame.pack_propagate(False)
+        self.var = ctk.BooleanVar()
+        self.arrow = ctk.CTkButton(self.frame, text="", width=22, height=22, fg_color="transparent",
+                                   text_color=("gray10", "gray90"), hover=False,
+                                   command=lambda: on_toggle(self))
+        self.arrow.pack(side="left", padx=(0, 2))
+        self.check = ctk.CTkCheckBox(self.frame, text="", variable=self.var,
+                                     command=lambda: on_check(self))
+        self.check.pack(side="left", fill="x", expand=True)
+        self.item = None
+
+    def show(self, item, text, checked, arrow):
+        self.item = item
+        self.check.configure(text=text)
+        self.var.set(checked)
+        self.arrow.configure(text=arrow)
+        self.frame.pack(fill="x")
+
+    def hide(self):
+        self.item = None
+        self.frame.pack_forget()
+
+
+class TocListView(ctk.CTkFrame):
+    def __init__(self, master, on_select=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_select = on_select
+
+        self.items = []
+        self.selected = set()
+        self.collapsed = set()
+        self._has_children = set()
+        self._visible = []  # 화면에 보일 수 있는 항목 위치 목록 (필터/접기 적용)
+        self._top = 0
+        self._rows = []
+        self._filter_job = None
+
+        # ----- 검색/레벨 필터 -----
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.pack(fill="x", padx=2, pady=(2, 0))
+
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *_: self._schedule_filter())
+        ctk.CTkLabel(bar, text="검색").pack(side="left", padx=(2, 2))
+        ctk.CTkEntry(bar, textvariable=self.filter_var).pack(side="left", fill="x", expand=True, padx=2)
+
+        ctk.CTkLabel(bar, text="레벨").pack(side="left", padx=(6, 2))
+        self.level_box = ctk.CTkComboBox(bar, values=LEVEL_CHOICES, width=70,
+                                         command=lambda _: self.refresh())
+        self.level_box.set("전체")
+        self.level_box.pack(side="left", padx=2)
+
+        ctk.CTkButton(bar, text="펼치기", width=60, command=self.expand_all).pack(side="left", padx=2)
+        ctk.CTkButton(bar, text="접기", width=50, command=self.collapse_all).pack(side="left", padx=2)
+
+        # ----- 행 영역 + 스크롤바 -----
+        body = ctk.CTkFrame(self, fg_color="transparent")
+        body.pack(fill="both", expand=True)
+
+        self.scrollbar = ctk.CTkScrollbar(body, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.rows_frame = ctk.CTkFrame(body, fg_color="transparent")
+        self.rows_frame.pack(side="left", fill="both", expand=True)
+        # 행 개수가 프레임 크기를 바꾸지 않도록 (크기 → 행 개수 방향으로만 결정)
+        self.rows_frame.pack_propagate(False)
+        self.rows_frame.bind("<Configure>", self._on_resize)
+
+        self._bind_wheel(self.rows_frame)
+
+    # -----------------------------------------------------
+    # 데이터
+    # -----------------------------------------------------
+    def set_items(self, items):
+        self.items = list(items)
+        self.selected = set()
+        self.collapsed = set()
+        self._has_children = {
+            item["index"] for item, nxt in zip(self.items, self.items[1:]) if nxt["level"] > item["level"]
+        }
+        self._top = 0
+        self.refresh()
+
+    def selected_indices(self):
+        return sorted(self.selected)
+
+    def deselect(self, indices):
+        self.selected.difference_update(indices)
+        self._render()
+
+    def expand_all(self):
+        self.collapsed = set()
+        self.refresh()
+
+    def collapse_all(self):
+        self.collapsed = set(self._has_children)
+        self.refresh()
+
+    # -----------------------------------------------------
+    # 필터 / 접기 적용
+    # -----------------------------------------------------
+    def _schedule_filter(self):
+        # 타이핑마다 다시 계산하지 않도록 잠깐 모아서 처리
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(150, self.refresh)
+
+    def refresh(self):
+        self._filter_job = None
+        query = self.filter_var.get().strip().lower()
+        level = self.level_box.get()
+        max_level = int(level) if level.isdigit() else None
+
+        visible = []
+        hide_below = None  # 접힌 항목의 레벨: 그보다 깊은 항목은 숨김
+        for pos, item in enumerate(self.items):
+            lv = item["level"]
+            if max_level is not None and lv > max_level:
+                continue
+            if query:
+                # 검색 중에는 접기를 무시하고 일치하는 항목만 평평하게 보여준다
+                if query in (item["title"] or "").lower() or query == str(item["index"]):
+                    visible.append(pos)
+                continue
+            if hide_below is not None:
+                if lv > hide_below:
+                    continue
+                hide_below = None
+            visible.append(pos)
+            if item["index"] in self.collapsed:
+                hide_below = lv
+
+        self._visible = visible
+        self._top = min(self._top, max(len(visible) - len(self._rows), 0))
+        self._render()
+
+    # -----------------------------------------------------
+    # 렌더링 (보이는 행만)
+    # -----------------------------------------------------
+    def _row_text(self, item):
+        indent = "    " * (item["level"] - 1)
+        return f"{indent}[{item['index']:02d}] {item['title']} (p {item['start']+1}~{item['end']+1})"
+
+    def _render(self):
+        for i, row in enumerate(self._rows):
+            n = self._top + i
+            if n >= len(self._visible):
+                row.hide()
+                continue
+            item = self.items[self._visible[n]]
+            idx = item["index"]
+            if idx in self._has_children and not self.filter_var.get().strip():
+                arrow = "▸" if idx in self.collapsed else "▾"
+            else:
+                arrow = ""
+            row.show(item, self._row_text(item), idx in self.selected, arrow)
+
+        total = len(self._visible)
+        if total:
+            first = self._top / total
+            last = min((self._top + len(self._rows)) / total, 1.0)
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_resize(self, event):
+        n = max(event.height // ROW_HEIGHT, 1)
+        while len(self._rows) < n:
+            row = _Row(self.rows_frame, self._on_toggle, self._on_check)
+            for w in (row.frame, row.check, row.arrow):
+                self._bind_wheel(w)
+            self._rows.append(row)
+        while len(self._rows) > n:
+            self._rows.pop().frame.destroy()
+        self._top = min(self._top, max(len(self._visible) - n, 0))
+        self._render()
+
+    # -----------------------------------------------------
+    # 이벤트
+    # -----------------------------------------------------
+    def _on_check(self, row):
+        if row.item is None:
+            return
+        idx = row.item["index"]
+        if row.var.get():
+            self.selected.add(idx)
+        else:
+            self.selected.discard(idx)
+        if self.on_select:
+            self.on_select(row.item)
+
+    def _on_toggle(self, row):
+        if row.item is None or row.item["index"] not in self._has_children:
+            return
+        self.collapsed ^= {row.item["index"]}
+        self.refresh()
+
+    def _scroll_to(self, top):
+        limit = max(len(self._visible) - len(self._rows), 0)
+        top = max(0, min(int(top), limit))
+        if top != self._top:
+            self._top = top
+            self._render()
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self._scroll_to(float(args[0]) * len(self._visible))
+        elif action == "scroll":
+            step = int(args[0])
+            if len(args) > 1 and args[1] == "pages":
+                step *= max(len(self._rows) - 1, 1)
+            self._scroll_to(self._top + step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4:
+            step = -3
+        elif getattr(event, "num", None) == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self._scroll_to(self._top + step)
+        return "break"
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel, add="+")
+        widget.bind("<Button-4>", self._on_wheel, add="+")
+        widget.bind("<Button-5>", self._on_wheel, add="+")
@@ -0,0 +1,48 @@
+# ui_bridge.py
+# -*- coding: utf-8 -*-
+"""
+Worker thread → Tk main loop message bridge
+
+Tk 위젯은 main thread 에서만 만져야 한다. worker 는 이 bridge 에 메시지를
+넣기만 하고(막히지 않음), main loop 가 타이머로 한 번에 모아서 처리한다.
+
+  log(msg)            로그 한 줄 (여러 줄을 한 번의 insert 로 합침)
+  progress(v)         진행률 (한 번 drain 할 때 마지막 값만 반영)
+  call(fn, *args)     main thread 에서 실행할 함수 (예: TOC 목록 갱신)
+"""
+import queue
+
+
+class UiBridge:
+    def __init__(self):
+        self._q = queue.SimpleQueue()
+
+    def log(self, msg: str):
+        self._q.put(("log", msg))
+
+    def progress(self, value: float):
+        self._q.put(("progress", value))
+
+    def call(self, fn, *args):
+        self._q.put(("call", fn, args))
+
+    def drain(self, max_items: int = 1000):
+        """
+        쌓인 메시지를 최대 max_items 개 꺼내서 (logs, progress, calls) 로 반환.
+        progress 는 마지막 값 하나만 (없으면 None).
+        """
+        logs, calls = [], []
+        progress = None
+        for _ in range(max_items):
+            try:
+                msg = self._q.get_nowait()
+            except queue.Empty:
+                break
+            kind = msg[0]
+            if kind == "log":
+                logs.append(msg[1])
+            elif kind == "progress":
+                progress = msg[1]
+            else:
+                calls.append((msg[1], msg[2]))
+        return logs, progress, calls
@@ -0,0 +1,338 @@
+# watch_folder.py
+# -*- coding: utf-8 -*-
+"""
+Watch-folder daemon
+
+공유 폴더에 새 강의 PDF 가 들어오거나 바뀌면 GUI 없이 목차 파싱 → 추출 →
+(선택) 쉬운 해설서/퀴즈 생성을 돌린다.
+
+  python scripts/watch_folder.py <감시 폴더> <출력 폴더> [--explain] [--quiz] [--workers 2]
+
+  <출력 폴더>/<PDF 이름>/               책마다 GUI 출력 폴더와 같은 구조 (chapter_XX/, _pages/ ...)
+  <출력 폴더>/<PDF 이름>/_status.json   책 진행 상태 (queued/extracting/generating/done/partial/failed, 챕터별 결과)
+  <출력 폴더>/_watch/state.json          처리한 PDF 의 크기/mtime/sha256 (재시작해도 다시 처리하지 않음)
+
+- 복사 중인 파일: 크기와 mtime 이 --settle 초 동안 그대로이고 PDF 로 열릴 때만 처리한다.
+- 바뀐 파일: 크기/mtime 이 달라졌고 sha256 도 다를 때만 다시 처리한다 (touch 만 한 파일은 건너뜀).
+- 동시에 처리하는 책 수는 --workers (프로세스), 책 안의 LLM 요청 수는 --llm-workers 로 제한한다.
+- 목차가 없는 PDF(슬라이드 등)는 문서 전체를 한 챕터로 처리한다.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scripts.instrument as instrument
+
+STATE_DIR = "_watch"
+STATE_FILE = "state.json"
+STATUS_FILE = "_status.json"
+DEFAULT_INTERVAL = 5    # 폴더를 다시 훑는 간격 (초)
+DEFAULT_SETTLE = 10     # 크기/mtime 이 이만큼 그대로여야 복사가 끝난 것으로 본다 (초)
+
+
+def _log(msg):
+    print(f"{time.strftime('%H:%M:%S')} [watch] {msg}", flush=True)
+
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def book_dir_name(rel_path: str) -> str:
+    """감시 폴더 기준 상대 경로 → 책 출력 폴더 이름 (하위 폴더 구분자는 "__")"""
+    stem = os.path.splitext(rel_path)[0]
+    return stem.replace("\\", "/").replace("/", "__")
+
+
+# ---------------------------------------------------------
+# 책 처리 (worker 프로세스)
+# ---------------------------------------------------------
+class BookStatus:
+    """<책 폴더>/_status.json. 생성 스레드들이 같이 갱신하므로 lock 으로 묶고 매번 통째로 다시 쓴다."""
+
+    def __init__(self, book_dir, pdf_path, sha256):
+        self.path = os.path.join(book_dir, STATUS_FILE)
+        self._lock = threading.Lock()
+        self.data = {"pdf": pdf_path, "sha256": sha256, "state": "queued", "error": None,
+                     "started": None, "finished": None, "toc": None, "chapters": {}}
+
+    def update(self, **fields):
+        with self._lock:
+            self.data.update(fields)
+            self._save()
+
+    def chapter(self, dir_name, **fields):
+        with self._lock:
+            self.data["chapters"].setdefault(dir_name, {}).update(fields)
+            self._save()
+
+    def _save(self):
+        self.data["updated"] = time.time()
+        _write_json(self.path, self.data)
+
+
+def process_book(pdf_path, book_dir, sha256, options):
+    """PDF 한 권: 챕터 추출(+페이지 store) → 검색 색인 → (선택) 해설서/퀴즈. 상태는 _status.json 에."""
+    import fitz  # PyMuPDF
+    import scripts.extract_chapter as extract_chapter
+    import scripts.text_index as text_index
+    import scripts.generation as generation
+
+    os.makedirs(book_dir, exist_ok=True)
+    status = BookStatus(book_dir, pdf_path, sha256)
+    status.update(state="extracting", started=time.time())
+    failed = 0
+    try:
+        with fitz.open(pdf_path) as doc:
+            title = os.path.splitext(os.path.basename(pdf_path))[0]
+            chapters, toc = extract_chapter.chapters_for(doc, title, options["levels"])
+            status.update(toc=toc, page_count=doc.page_count)
+            for ch in chapters:
+                status.chapter(ch["dir_name"], title=ch["title"], pages=[ch["start"] + 1, ch["end"] + 1],
+                               extract="pending")
+
+            instrument.start_run(os.path.join(book_dir, "_runs"), "watch-extract")
+            try:
+                for ch in chapters:
+                    try:
+                        extract_chapter.extract_one_chapter(
+                            doc, ch, book_dir, domain=options["domain"], ocr=options["ocr"],
+                            figure_store_dir=os.path.join(book_dir, "_figures"),
+                            memory_limit_mb=options["memory_limit_mb"],
+                        )
+                        status.chapter(ch["dir_name"], extract="done")
+                    except RuntimeError as e:
+                        failed += 1
+                        status.chapter(ch["dir_name"], extract="failed", error=str(e))
+            finally:
+                instrument.finish_run()
+
+        with text_index.TextIndex(text_index.index_path(book_dir)) as idx:
+            idx.update_all(book_dir)
+
+        stages = [s for s in ("explain", "quiz") if options[s]]
+        if stages:
+            status.update(state="generating")
+            done = [ch for ch in chapters if status.data["chapters"][ch["dir_name"]]["extract"] == "done"]
+
+            def generate(ch, stage):
+                name = ch["dir_name"]
+                status.chapter(name, **{stage: "running"})
+                opts = dict(generation.DEFAULT_OPTIONS[stage], domain=options["domain"])
+                try:
+                    result = generation.RUNNERS[stage](f"watch-{stage}-{name}", book_dir, name, opts)
+                except Exception as e:  # LLM/네트워크 오류는 그 챕터만 실패로
+                    status.chapter(name, **{stage: "failed", "error": f"{type(e).__name__}: {e}"})
+                    return False
+                status.chapter(name, **{stage: "skipped" if result.get("skipped") else "done"})
+                return True
+
+            with ThreadPoolExecutor(options["llm_workers"]) as pool:
+                results = list(pool.map(lambda a: generate(*a), [(ch, s) for ch in done for s in stages]))
+            failed += results.count(False)
+
+        status.update(state="partial" if failed else "done", finished=time.time())
+    except Exception as e:
+        status.update(state="failed", error=f"{type(e).__name__}: {e}", finished=time.time())
+        raise
+    return {"chapters": len(chapters), "failed": failed, "state": status.data["state"]}
+
+
+# ---------------------------------------------------------
+# 감시 (메인 프로세스)
+# ---------------------------------------------------------
+def _can_open(path):
+    """복사 중이라 잠겨 있거나 PDF 끝(xref)이 아직 없으면 False"""
+    import fitz  # PyMuPDF
+
+    try:
+        with open(path, "rb"):
+            pass
+        with fitz.open(path) as doc:
+            return doc.page_count > 0
+    except Exception:
+        return False
+
+
+class Watcher:
+    def __init__(self, watch_dir, out_root, options, workers=2, settle=DEFAULT_SETTLE, recursive=False):
+        self.watch_dir = os.path.abspath(watch_dir)
+        self.out_root = os.path.abspath(out_root)
+        self.options = options
+        self.settle = settle
+        self.recursive = recursive
+        self._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        self.running = {}     # rel → (future, sig, sha256)
+        self.candidates = {}  # rel → (sig, 처음 본 시각): 크기/mtime 이 가라앉기를 기다리는 파일
+
+        self._state_path = os.path.join(self.out_root, STATE_DIR, STATE_FILE)
+        os.makedirs(os.path.dirname(self._state_path), exist_ok=True)
+        try:
+            with open(self._state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+        # 지난번에 처리 도중 멈춘 책은 다시 처리
+        for entry in self.state.values():
+            if entry.get("status") == "running":
+                entry["sig"] = None
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _save_state(self):
+        _write_json(self._state_path, self.state)
+
+    def _pdfs(self):
+        if not self.recursive:
+            names = [n for n in os.listdir(self.watch_dir) if n.lower().endswith(".pdf")]
+            return sorted(names)
+        out = []
+        for root, dirs, files in os.walk(self.watch_dir):
+            dirs[:] = [d for d in dirs if not d.startswith((".", "_"))]
+            for n in files:
+                if n.lower().endswith(".pdf"):
+                    out.append(os.path.relpath(os.path.join(root, n), self.watch_dir))
+        return sorted(out)
+
+    def poll(self):
+        """폴더를 한 번 훑고, 안정된 새/바뀐 PDF 를 제출하고, 끝난 작업을 정리한다."""
+        now = time.time()
+        seen = set()
+        for rel in self._pdfs():
+            seen.add(rel)
+            path = os.path.join(self.watch_dir, rel)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            sig = [st.st_size, st.st_mtime_ns]
+            if rel in self.running or self.state.get(rel, {}).get("sig") == sig:
+                self.candidates.pop(rel, None)
+                continue
+
+            prev = self.candidates.get(rel)
+            if prev is None or prev[0] != sig:
+                self.candidates[rel] = (sig, now)  # 새로 보았거나 아직 쓰는 중
+                continue
+            if now - prev[1] < self.settle:
+                continue
+
+            del self.candidates[rel]
+            if not _can_open(path):
+                # 가라앉았는데도 열리지 않는 파일(깨졌거나 PDF 가 아님): 파일이 다시 바뀔 때까지 건너뛴다
+                self.state.setdefault(rel, {}).update(sig=sig, status="failed", error="PDF 로 열 수 없음", finished=now)
+                self._save_state()
+                _log(f"실패: {rel}: PDF 로 열 수 없음")
+                continue
+            sha = _sha256_file(path)
+            entry = self.state.get(rel)
+            if entry and entry.get("sha256") == sha and entry.get("status") in ("done", "partial"):
+                entry["sig"] = sig  # 내용은 그대로 (touch, 복사본 덮어쓰기)
+                self._save_state()
+                continue
+            self._submit(rel, path, sig, sha)
+
+        for rel in list(self.candidates):
+            if rel not in seen:
+                del self.candidates[rel]
+        for rel, entry in self.state.items():
+            if rel not in seen and entry.get("status") != "removed" and rel not in self.running:
+                entry["status"] = "removed"  # 출력은 그대로 둔다
+                self._save_state()
+                _log(f"사라짐: {rel}")
+        self._collect()
+
+    def _submit(self, rel, path, sig, sha):
+        book_dir = os.path.join(self.out_root, book_dir_name(rel))
+        _log(f"처리 시작: {rel} → {book_dir}")
+        future = self._pool.submit(process_book, path, book_dir, sha, self.options)
+        self.running[rel] = (future, sig, sha)
+        self.state[rel] = {"sig": None, "sha256": sha, "book_dir": book_dir, "status": "running",
+                           "submitted": time.time()}
+        self._save_state()
+
+    def _collect(self):
+        for rel, (future, sig, sha) in list(self.running.items()):
+            if not future.done():
+                continue
+            del self.running[rel]
+            entry = self.state[rel]
+            err = future.exception()
+            if err is not None:
+                entry.update(status="failed", error=f"{type(err).__name__}: {err}")
+                _log(f"실패: {rel}: {entry['error']}")
+            else:
+                result = future.result()
+                entry.update(status=result["state"], error=None)
+                _log(f"완료: {rel} ({result['state']}, 챕터 {result['chapters']}, 실패 {result['failed']})")
+            # 실패해도 같은 파일을 계속 재시도하지 않는다 (파일이 다시 바뀌면 재처리)
+            entry.update(sig=sig, finished=time.time())
+            self._save_state()
+
+    @property
+    def busy(self):
+        return bool(self.running or self.candidates)
+
+    def run(self, interval=DEFAULT_INTERVAL, once=False):
+        _log(f"감시: {self.watch_dir} → {self.out_root} (settle {self.settle}s)")
+        while True:
+            self.poll()
+            if once and not self.busy:
+                return
+            time.sleep(min(interval, self.settle / 2) if self.candidates else interval)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="폴더에 들어오는 PDF 를 자동으로 추출/생성")
+    ap.add_argument("watch_dir", help="감시할 폴더")
+    ap.add_argument("out_root", help="출력 폴더 (책마다 하위 폴더)")
+    ap.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="폴더를 훑는 간격 (초)")
+    ap.add_argument("--settle", type=float, default=DEFAULT_SETTLE, help="복사가 끝났다고 볼 무변화 시간 (초)")
+    ap.add_argument("--workers", type=int, default=2, help="동시에 처리할 책 수 (프로세스)")
+    ap.add_argument("--llm-workers", type=int, default=4, help="책 하나에서 동시에 보낼 LLM 요청 수")
+    ap.add_argument("--recursive", action="store_true", help="하위 폴더도 감시")
+    ap.add_argument("--levels", type=int, default=1, help="추출할 TOC 깊이 (1 = 최상위 항목만)")
+    ap.add_argument("--domain", default="default", help="math / it / biz / default")
+    ap.add_argument("--ocr", action="store_true", help="스캔/깨진 페이지 OCR 보정")
+    ap.add_argument("--memory-limit-mb", type=float, help="추출 메모리 한도 (MB)")
+    ap.add_argument("--explain", action="store_true", help="쉬운 해설서도 생성")
+    ap.add_argument("--quiz", action="store_true", help="퀴즈도 생성")
+    ap.add_argument("--once", action="store_true", help="지금 있는 PDF 만 처리하고 종료")
+    args = ap.parse_args(argv)
+
+    options = {
+        "levels": args.levels, "domain": args.domain, "ocr": args.ocr, "memory_limit_mb": args.memory_limit_mb,
+        "explain": args.explain, "quiz": args.quiz, "llm_workers": args.llm_workers,
+    }
+    watcher = Watcher(args.watch_dir, args.out_root, options, args.workers, args.settle, args.recursive)
+    try:
+        watcher.run(args.interval, once=args.once)
+    except KeyboardInterrupt:
+        _log("종료 중 (처리 중인 책은 끝까지 진행)...")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()